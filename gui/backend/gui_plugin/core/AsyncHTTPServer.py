@@ -0,0 +1,499 @@
+# Copyright (c) 2022, 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
+import selectors
+import socket
+import ssl
+import threading
+
+import gui_plugin.core.Logger as logger
+import gui_plugin.core.WebSocketCommon as WebSocket
+from gui_plugin.core.BackendDbLogger import BackendDbLogger
+from gui_plugin.core.ThreadedHTTPServer import ThreadedHTTPServer
+
+
+class WebSocketConnection:
+    """A WebSocket connection served by the event loop
+
+    The handler sends its frames through this object, the data is buffered
+    and written by the event loop once the socket is writable.
+    """
+
+    def __init__(self, server, handler):
+        self.server = server
+        self.handler = handler
+        self.socket = handler.request
+        self.lock = threading.Lock()
+        # The data received and not yet assembled in frames
+        self.buffer = bytearray()
+        # The data waiting to be written to the socket
+        self.output = bytearray()
+        # The frames waiting to be processed by the handler, None signals the
+        # connection was lost
+        self.frames = deque()
+        self.processing = False
+        # Set when responses are queued, cleared when they are being sent
+        self.responses_ready = False
+        self.sending = False
+        # The events the socket is registered for in the selector
+        self.registered = False
+        self.events = 0
+        # Cleared when no more data is read from the connection
+        self.reading = True
+        # Set when the peer closed the connection or it failed
+        self.lost = False
+        # Set when the handler is done, the socket is closed once the output
+        # is written
+        self.closing = False
+
+    def send(self, data):
+        if self.lost:
+            return
+
+        with self.lock:
+            self.output += data
+        self.server._update_connection(self)
+
+
+class AsyncHTTPServer(ThreadedHTTPServer):
+    """
+    HTTP server that multiplexes all the WebSocket connections on a single
+    event loop.
+
+    The HTTP requests, including the TLS and WebSocket handshakes, are still
+    handled in their own thread. Once the handshake is done the connection is
+    handed over to the event loop, so no thread is kept per connection.
+
+    The event loop only does the socket I/O: the sockets are non-blocking,
+    the received frames are processed and the queued responses are sent by
+    a pool of handler_workers threads, one job at a time per connection to
+    keep the order of the messages. The frames sent are buffered and written
+    by the event loop when the socket is writable, so a slow client does not
+    hold any other connection. The execution of the requests is done by the
+    RequestExecutor workers.
+    """
+    multiplexed = True
+
+    # Maximum number of bytes read from a connection at once
+    read_size = 65536
+
+    # Maximum number of bytes written to a connection at once
+    write_size = 262144
+
+    # Maximum number of responses sent to a connection before serving the
+    # other connections
+    max_responses_per_turn = 64
+
+    # The responses of a connection are not sent while it has more than this
+    # number of bytes waiting to be written
+    max_buffered_output = 1048576
+
+    # Number of threads processing the messages of the connections
+    handler_workers = 8
+
+    def __init__(self, server_address, RequestHandlerClass):
+        super().__init__(server_address, RequestHandlerClass)
+        self._selector = selectors.DefaultSelector()
+        self._loop_thread = None
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._new_connections = []
+        self._updated_connections = set()
+        self._worker_local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.handler_workers,
+            thread_name_prefix="AsyncHTTPServer",
+            initializer=self._init_worker)
+
+        # Used to wake up the event loop from other threads
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+
+    @property
+    def connection_count(self):
+        with self._lock:
+            return len(self._connections)
+
+    def is_event_loop_thread(self):
+        return threading.current_thread() is self._loop_thread
+
+    def is_server_thread(self):
+        """True if called from the event loop or one of the threads
+        processing the messages of the connections"""
+        return self.is_event_loop_thread() or \
+            getattr(self._worker_local, "is_worker", False)
+
+    def serve_forever(self):
+        """This is the event loop of the server"""
+        self._loop_thread = threading.current_thread()
+        self._selector.register(self.socket, selectors.EVENT_READ,
+                                self._accept)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ,
+                                self._wakeup)
+
+        try:
+            while not self.stopped:
+                for key, mask in self._selector.select():
+                    key.data(key.fileobj, mask)
+
+                self._add_new_connections()
+                self._update_connections()
+        finally:
+            with self._lock:
+                connections = list(self._connections.values())
+            for connection in connections:
+                self._connection_lost(connection)
+
+            self._executor.shutdown(wait=True)
+
+            for connection in connections:
+                self._close_websocket(connection)
+            self._selector.close()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+
+            BackendDbLogger.close()
+
+    def force_stop(self):
+        super().force_stop()
+        self._wake()
+
+    def get_request(self):
+        # The TLS handshake is done by the thread handling the request, an
+        # accepted connection must never block the event loop
+        if isinstance(self.socket, ssl.SSLSocket):
+            sock, address = socket.socket.accept(self.socket)
+            return self.socket.context.wrap_socket(
+                sock, server_side=True, do_handshake_on_connect=False), address
+
+        return super().get_request()
+
+    def finish_request(self, request, client_address):
+        if isinstance(request, ssl.SSLSocket):
+            request.do_handshake()
+        super().finish_request(request, client_address)
+
+    def register_websocket(self, handler):
+        """Hands over a connection that completed the WebSocket handshake to
+        the event loop.
+
+        Called from the thread handling the HTTP request.
+        """
+        connection = WebSocketConnection(self, handler)
+        handler.ws_output = connection
+        with self._lock:
+            self._connections[connection.socket] = connection
+            self._new_connections.append(connection)
+        self._wake()
+
+    def notify_responses(self, handler):
+        """Notifies there are responses queued for the given handler, they
+        are sent by the handler workers"""
+        connection = handler.ws_output
+        with connection.lock:
+            connection.responses_ready = True
+            if connection.sending or connection.closing or \
+                    len(connection.output) > self.max_buffered_output:
+                return
+            connection.sending = True
+
+        self._submit(self._send_responses, connection)
+
+    def shutdown_request(self, request):
+        # The connections handed over to the event loop are kept open when
+        # the thread handling the HTTP request finishes
+        with self._lock:
+            if request in self._connections:
+                return
+        super().shutdown_request(request)
+
+    def _init_worker(self):
+        self._worker_local.is_worker = True
+
+    def _submit(self, function, connection):
+        try:
+            self._executor.submit(function, connection)
+        except RuntimeError:
+            # The server is shutting down
+            pass
+
+    def _wake(self):
+        if self.is_event_loop_thread():
+            return
+        try:
+            self._wakeup_w.send(b"\0")
+        except OSError:
+            # The wakeup socket is full, so the loop will wake up anyway
+            pass
+
+    def _wakeup(self, sock, mask):
+        try:
+            while sock.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _accept(self, sock, mask):
+        self._handle_request_noblock()
+
+    def _add_new_connections(self):
+        with self._lock:
+            new_connections = self._new_connections
+            self._new_connections = []
+
+        for connection in new_connections:
+            connection.socket.setblocking(False)
+            connection.registered = True
+            self._flush(connection)
+
+    def _on_connection_event(self, sock, mask):
+        connection = self._connections.get(sock)
+        if connection is None:
+            return
+
+        if mask & selectors.EVENT_WRITE:
+            self._update_connection(connection)
+        if mask & selectors.EVENT_READ:
+            self._read(connection)
+
+    def _set_events(self, connection, events):
+        if events == connection.events:
+            return
+
+        if connection.events == 0:
+            self._selector.register(connection.socket, events,
+                                    self._on_connection_event)
+        elif events == 0:
+            self._selector.unregister(connection.socket)
+        else:
+            self._selector.modify(connection.socket, events,
+                                  self._on_connection_event)
+        connection.events = events
+
+    def _read(self, connection):
+        if not connection.reading:
+            return
+
+        sock = connection.socket
+        try:
+            data = sock.recv(self.read_size)
+            # Data already decrypted by the SSL layer is not signaled by the
+            # selector
+            while data and hasattr(sock, "pending") and sock.pending():
+                data += sock.recv(sock.pending())
+        except (BlockingIOError, InterruptedError, ssl.SSLWantReadError,
+                ssl.SSLWantWriteError):
+            # A partial TLS record, the rest is read once available
+            return
+        except OSError as e:
+            logger.error(f"Error reading from the web socket: {str(e)}")
+            data = b""
+
+        if not data:
+            # The connection was closed by the peer
+            self._connection_lost(connection)
+            return
+
+        connection.buffer += data
+        frames = []
+        while True:
+            try:
+                size = WebSocket.FrameReceiver.frame_size(connection.buffer)
+                if size is None or len(connection.buffer) < size:
+                    break
+
+                frames.append(WebSocket.FrameReceiver(
+                    io.BytesIO(connection.buffer[:size])))
+                del connection.buffer[:size]
+            except Exception as e:
+                # The stream can not be recovered from an invalid frame
+                logger.error(f"Error reading from the web socket: {str(e)}")
+                frames.append(None)
+                connection.reading = False
+                break
+
+        if frames:
+            self._queue_frames(connection, frames)
+        if not connection.reading:
+            self._flush(connection)
+
+    def _connection_lost(self, connection):
+        if connection.lost:
+            return
+
+        connection.lost = True
+        connection.reading = False
+        with connection.lock:
+            connection.output.clear()
+        self._queue_frames(connection, [None])
+        self._update_connection(connection)
+
+    def _queue_frames(self, connection, frames):
+        with connection.lock:
+            connection.frames.extend(frames)
+            if connection.processing:
+                return
+            connection.processing = True
+
+        self._submit(self._process_frames, connection)
+
+    def _process_frames(self, connection):
+        """Processes the received frames of the connection, runs on a handler
+        worker"""
+        handler = connection.handler
+        while True:
+            with connection.lock:
+                if not connection.frames:
+                    connection.processing = False
+                    return
+                frame = connection.frames.popleft()
+
+            try:
+                if frame is None:
+                    if handler.connected:
+                        handler._ws_close()
+                elif handler.connected:
+                    handler.process_frame(frame)
+            except Exception as e:
+                logger.error(f"Error processing a web socket frame: {str(e)}")
+
+            if not handler.connected:
+                with connection.lock:
+                    connection.frames.clear()
+                    connection.closing = True
+                self._update_connection(connection)
+
+    def _send_responses(self, connection):
+        """Sends the queued responses of the connection, runs on a handler
+        worker"""
+        handler = connection.handler
+        while True:
+            with connection.lock:
+                if connection.closing or \
+                        len(connection.output) > self.max_buffered_output:
+                    # Resumed by the event loop once the output is written
+                    connection.sending = False
+                    return
+                connection.responses_ready = False
+
+            try:
+                pending = handler.process_pending_responses(
+                    self.max_responses_per_turn)
+            except Exception as e:
+                logger.error(f"Exception sending the responses. {e}")
+                pending = False
+
+            with connection.lock:
+                if not pending and not connection.responses_ready:
+                    connection.sending = False
+                    return
+
+    def _update_connection(self, connection):
+        """Makes the event loop write the output of the connection or close
+        it"""
+        if self.is_event_loop_thread():
+            self._flush(connection)
+            return
+
+        with self._lock:
+            self._updated_connections.add(connection)
+        self._wake()
+
+    def _update_connections(self):
+        with self._lock:
+            connections = self._updated_connections
+            self._updated_connections = set()
+
+        for connection in connections:
+            self._flush(connection)
+
+    def _flush(self, connection):
+        if not connection.registered:
+            return
+
+        written = connection.lost or self._write(connection)
+        events = selectors.EVENT_READ if connection.reading else 0
+        if not written:
+            events |= selectors.EVENT_WRITE
+
+        with connection.lock:
+            resume = connection.responses_ready and not connection.sending and \
+                not connection.closing and \
+                len(connection.output) <= self.max_buffered_output
+            if resume:
+                connection.sending = True
+            done = connection.closing and (connection.lost or not connection.output)
+
+        if done:
+            self._close_websocket(connection)
+            return
+
+        self._set_events(connection, events)
+        if resume:
+            self._submit(self._send_responses, connection)
+
+    def _write(self, connection):
+        """Writes the buffered output of the connection
+
+        Returns:
+            True if all the output was written
+        """
+        sock = connection.socket
+        with connection.lock:
+            while connection.output:
+                try:
+                    sent = sock.send(connection.output[:self.write_size])
+                except (BlockingIOError, InterruptedError,
+                        ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    return False
+                except OSError as e:
+                    logger.error(
+                        f"Error writing to the web socket: {str(e)}")
+                    break
+                del connection.output[:sent]
+            else:
+                return True
+
+        self._connection_lost(connection)
+        return True
+
+    def _close_websocket(self, connection):
+        connection.registered = False
+        with self._lock:
+            self._connections.pop(connection.socket, None)
+            self._updated_connections.discard(connection)
+            if connection in self._new_connections:
+                self._new_connections.remove(connection)
+
+        if connection.events != 0:
+            try:
+                self._selector.unregister(connection.socket)
+            except (KeyError, ValueError):
+                pass
+            connection.events = 0
+
+        super().shutdown_request(connection.socket)
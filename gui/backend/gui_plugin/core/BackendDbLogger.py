@@ -21,13 +21,36 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
-from threading import Lock
+import datetime
+import sys
+import time
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+
 
 class BackendDbLogger:
+    """
+    Writes the log and message entries into the backend database.
+
+    By default the entries are queued and written by a background thread
+    that commits them in batches, the batch is written once it reaches
+    max_batch_size entries or max_latency seconds after its first entry was
+    queued. If the queue is full for more than queue_timeout seconds the
+    entry is rejected.
+
+    In durable mode every entry is committed before returning, so the caller
+    knows the entry was written.
+    """
     __instance = None
     __gui_backend_db = None
     lock = Lock()
 
+    durable = False
+    max_batch_size = 500
+    max_latency = 0.05
+    max_queue_size = 10000
+    queue_timeout = 5
+
     @staticmethod
     def get_instance(log_rotation=False) -> 'BackendDbLogger':
         if BackendDbLogger.__instance is None:
@@ -42,8 +65,59 @@ class BackendDbLogger:
             from gui_plugin.core.Db import GuiBackendDb
             BackendDbLogger.__instance = self
             self.__gui_backend_db = GuiBackendDb(log_rotation=log_rotation)
+            self._queue = Queue(maxsize=BackendDbLogger.max_queue_size)
+            self._writer = None
+            self._stats_lock = Lock()
+            self._stats = {
+                "queued_entries": 0,
+                "written_entries": 0,
+                "failed_entries": 0,
+                "rejected_entries": 0,
+                "batches": 0,
+                "max_batch_size": 0,
+                "max_queue_depth": 0,
+            }
+
+    @staticmethod
+    def configure(durable=None, max_batch_size=None, max_latency=None,
+                  max_queue_size=None, queue_timeout=None):
+        """Configures the way the entries are written
+
+        Args:
+            durable (bool): If True, every entry is committed before returning
+            max_batch_size (int): The maximum number of entries per batch
+            max_latency (float): The maximum time in seconds an entry waits
+                for the batch to be filled
+            max_queue_size (int): The maximum number of queued entries
+            queue_timeout (float): The time in seconds to wait for room in a
+                full queue before rejecting an entry
+        """
+        # The queue is kept, entries queued by concurrent callers are never
+        # dropped, only the parameters used for the next batches change
+        with BackendDbLogger.lock:
+            if max_batch_size is not None:
+                BackendDbLogger.max_batch_size = max(1, int(max_batch_size))
+            if max_latency is not None:
+                BackendDbLogger.max_latency = max(0, float(max_latency))
+            if queue_timeout is not None:
+                BackendDbLogger.queue_timeout = max(0, float(queue_timeout))
+            if max_queue_size is not None:
+                BackendDbLogger.max_queue_size = max(1, int(max_queue_size))
+                if BackendDbLogger.__instance is not None:
+                    queue = BackendDbLogger.__instance._queue
+                    with queue.mutex:
+                        queue.maxsize = BackendDbLogger.max_queue_size
+                        queue.not_full.notify_all()
+
+        if durable is not None:
+            BackendDbLogger.durable = durable
+
+            # Entries queued before are written before the durable ones
+            if durable and BackendDbLogger.__instance is not None:
+                BackendDbLogger.__instance._queue.join()
 
     def _close(self):
+        self._stop_writer()
         if self.__gui_backend_db:
             self.__gui_backend_db.close()
             self.__gui_backend_db = None
@@ -53,31 +127,132 @@ class BackendDbLogger:
     def close():
         BackendDbLogger.get_instance()._close()
 
-    def _message(self, session_id, message, is_response, request_id):
+    @staticmethod
+    def flush():
+        """Waits until all the queued entries are written"""
+        BackendDbLogger.get_instance()._queue.join()
+
+    @staticmethod
+    def get_stats():
+        """Returns the counters of the queue and the written batches"""
+        instance = BackendDbLogger.get_instance()
+        with instance._stats_lock:
+            stats = dict(instance._stats)
+        stats["queue_depth"] = instance._queue.qsize()
+        stats["durable"] = BackendDbLogger.durable
+        stats["average_batch_size"] = stats["written_entries"] / \
+            stats["batches"] if stats["batches"] else 0
+        return stats
+
+    def _write(self, entry):
+        kind, args = entry
+        if kind == "message":
+            self.__gui_backend_db.message(*args)
+        else:
+            self.__gui_backend_db.log(*args)
+
+    def _write_durable(self, entry):
         with self.lock:
             try:
                 self.__gui_backend_db.start_transaction()
-                self.__gui_backend_db.message(session_id, is_response, message, request_id)
+                self._write(entry)
                 self.__gui_backend_db.commit()
             except Exception:
                 self.__gui_backend_db.rollback()
                 return False
             return True
 
-    @staticmethod
-    def message(session_id, message, is_response, request_id=None):
-        return BackendDbLogger.get_instance()._message(session_id, message, is_response, request_id)
-
-    def _log(self, event_type, message):
+    def _write_batch(self, batch):
         with self.lock:
             try:
                 self.__gui_backend_db.start_transaction()
-                self.__gui_backend_db.log(event_type, message)
+                for entry in batch:
+                    self._write(entry)
                 self.__gui_backend_db.commit()
-            except Exception:
+            except Exception as e:
                 self.__gui_backend_db.rollback()
-                return False
-            return True
+                with self._stats_lock:
+                    self._stats["failed_entries"] += len(batch)
+                # The logger can not be used here as it may log into the
+                # backend database again
+                sys.real_stderr.write(
+                    f"Failed to write {len(batch)} log entries: {e}\n")
+                return
+
+        with self._stats_lock:
+            self._stats["written_entries"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["max_batch_size"] = max(
+                self._stats["max_batch_size"], len(batch))
+
+    def _run_writer(self, queue):
+        running = True
+        while running:
+            entry = queue.get()
+            if entry is None:
+                queue.task_done()
+                break
+
+            batch = [entry]
+            deadline = time.time() + BackendDbLogger.max_latency
+            while len(batch) < BackendDbLogger.max_batch_size:
+                try:
+                    entry = queue.get(
+                        timeout=max(0, deadline - time.time()))
+                except Empty:
+                    break
+
+                if entry is None:
+                    running = False
+                    break
+                batch.append(entry)
+
+            self._write_batch(batch)
+
+            # The stop entry is also accounted
+            for _ in range(len(batch) + (0 if running else 1)):
+                queue.task_done()
+
+    def _stop_writer(self):
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _enqueue(self, entry):
+        if BackendDbLogger.durable:
+            return self._write_durable(entry)
+
+        if self._writer is None:
+            with self.lock:
+                if self._writer is None:
+                    self._writer = Thread(target=self._run_writer, args=(
+                        self._queue,), name="backend-db-logger", daemon=True)
+                    self._writer.start()
+
+        try:
+            self._queue.put(entry, timeout=BackendDbLogger.queue_timeout)
+        except Full:
+            with self._stats_lock:
+                self._stats["rejected_entries"] += 1
+            return False
+
+        with self._stats_lock:
+            self._stats["queued_entries"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._queue.qsize())
+        return True
+
+    def _message(self, session_id, message, is_response, request_id):
+        return self._enqueue(("message", (session_id, is_response, message, request_id,
+                                          datetime.datetime.now())))
+
+    @staticmethod
+    def message(session_id, message, is_response, request_id=None):
+        return BackendDbLogger.get_instance()._message(session_id, message, is_response, request_id)
+
+    def _log(self, event_type, message):
+        return self._enqueue(("log", (event_type, message, datetime.datetime.now())))
 
     @staticmethod
     def log(event_type, message):
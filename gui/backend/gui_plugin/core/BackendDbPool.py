@@ -0,0 +1,148 @@
+# Copyright (c) 2022, 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+from threading import Lock
+
+import gui_plugin.core.Logger as logger
+from gui_plugin.core.GuiBackendDbManager import BackendSqliteDbManager
+
+
+class BackendDbPool:
+    """
+    Process wide pool of connections to the backend database.
+
+    The database is verified, created or upgraded once, when the pool is
+    created, instead of every time a GuiBackendDb is instantiated. A
+    connection is checked out by a single GuiBackendDb at a time and it is
+    returned to the pool when closed, so the following instances reuse it
+    together with its prepared statement cache. At most max_idle_connections
+    are kept open, the ones returned above that limit are closed.
+    """
+    __instance = None
+    __instance_lock = Lock()
+
+    max_idle_connections = 8
+
+    @staticmethod
+    def get_instance() -> 'BackendDbPool':
+        with BackendDbPool.__instance_lock:
+            if BackendDbPool.__instance is None:
+                BackendDbPool()
+            return BackendDbPool.__instance
+
+    def __init__(self):
+        if BackendDbPool.__instance is not None:
+            raise Exception(
+                "This class is a singleton, use get_instance function to get an instance.")
+
+        # Verifies the database exists and is up to date
+        self._manager = BackendSqliteDbManager()
+
+        BackendDbPool.__instance = self
+        self._lock = Lock()
+        self._idle = []
+        self._checked_out = 0
+        self._stats = {
+            "created_connections": 0,
+            "reused_connections": 0,
+            "closed_connections": 0,
+        }
+
+    @staticmethod
+    def configure(max_idle_connections=None):
+        """Configures the backend database pool
+
+        Args:
+            max_idle_connections (int): The maximum number of connections
+                kept open while not in use
+        """
+        if max_idle_connections is not None:
+            BackendDbPool.max_idle_connections = max(
+                0, int(max_idle_connections))
+
+    def acquire(self):
+        """Checks out a connection to the backend database
+
+        The connection must be given back with release() once done.
+        """
+        with self._lock:
+            self._checked_out += 1
+            if self._idle:
+                self._stats["reused_connections"] += 1
+                return self._idle.pop()
+
+        try:
+            db = self._manager.open_database()
+        except Exception:
+            with self._lock:
+                self._checked_out -= 1
+            raise
+
+        with self._lock:
+            self._stats["created_connections"] += 1
+
+        return db
+
+    def release(self, db):
+        """Returns a connection checked out with acquire() to the pool"""
+        try:
+            # A transaction left open is not carried to the next user
+            if db.conn.in_transaction:
+                db.rollback()
+        except Exception as e:
+            logger.error(f"Failed to reset a backend database connection: {e}")
+            keep = False
+        else:
+            keep = True
+
+        with self._lock:
+            self._checked_out -= 1
+            if keep and len(self._idle) < BackendDbPool.max_idle_connections:
+                self._idle.append(db)
+                return
+            self._stats["closed_connections"] += 1
+
+        db.close()
+
+    def rotate_logs(self):
+        """Starts moving the log entries from previous days to the daily
+        backup, in a background thread"""
+        self._manager.rotate_logs()
+
+    def clear(self):
+        """Closes the idle connections"""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+            self._stats["closed_connections"] += len(idle)
+
+        for db in idle:
+            db.close()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle_connections"] = len(self._idle)
+            stats["checked_out_connections"] = self._checked_out
+
+        return stats
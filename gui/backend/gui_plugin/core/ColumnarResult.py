@@ -0,0 +1,249 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+"""Binary columnar encoding for SQL result sets
+
+Result rows are sent as WebSocket binary frames with the following layout,
+all numbers are little endian:
+
+    magic (4 bytes) "MSGC"
+    version (uint8)
+    envelope length (uint32)
+    envelope (UTF-8 JSON of the response without the result rows)
+    row count (uint32)
+    column count (uint16)
+    for each column:
+        type tag (uint8), one of ColumnType
+        null bitmap (ceil(row count / 8) bytes, bit set for NULL values)
+        INTEGER: row count int64 values
+        DOUBLE: row count float64 values
+        BOOLEAN: row count uint8 values, 0 or 1
+        STRING and BYTES: row count uint32 lengths followed by the data
+        NULL: no data
+"""
+
+import json
+import struct
+import sys
+from array import array
+from enum import IntEnum
+
+MAGIC = b"MSGC"
+VERSION = 1
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+class ColumnType(IntEnum):
+    NULL = 0
+    INTEGER = 1
+    DOUBLE = 2
+    STRING = 3
+    BYTES = 4
+    BOOLEAN = 5
+
+
+class ColumnarRows(list):
+    """Rows of a result set that are to be sent in the binary columnar format
+
+    The rows hold the raw column values, i.e. bytes are not base64 encoded.
+    """
+    pass
+
+
+def get_rows(message):
+    """Returns the ColumnarRows of a response message if it has any"""
+    if not isinstance(message, dict):
+        return None
+
+    result = message.get("result")
+    if isinstance(result, dict) and isinstance(result.get("rows"), ColumnarRows):
+        return result["rows"]
+
+    return None
+
+
+def _get_column_type(values):
+    column_type = ColumnType.NULL
+    for value in values:
+        if value is None:
+            continue
+
+        # bool is a subclass of int, it is checked first to keep the values
+        # as booleans
+        if isinstance(value, bool):
+            value_type = ColumnType.BOOLEAN
+        elif isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX:
+            value_type = ColumnType.INTEGER
+        elif isinstance(value, float):
+            value_type = ColumnType.DOUBLE
+        elif isinstance(value, (bytes, bytearray)):
+            value_type = ColumnType.BYTES
+        else:
+            # Anything else is sent as its string representation, the same
+            # way as it is done when the result is sent as JSON
+            return ColumnType.STRING
+
+        if column_type == ColumnType.NULL:
+            column_type = value_type
+        elif column_type != value_type:
+            return ColumnType.STRING
+
+    return column_type
+
+
+def _to_little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_column(values):
+    count = len(values)
+    column_type = _get_column_type(values)
+
+    nulls = bytearray((count + 7) // 8)
+    for index, value in enumerate(values):
+        if value is None:
+            nulls[index >> 3] |= 1 << (index & 7)
+
+    parts = [bytes((column_type,)), bytes(nulls)]
+
+    if column_type == ColumnType.INTEGER:
+        parts.append(_to_little_endian(
+            array("q", [0 if value is None else value for value in values])))
+    elif column_type == ColumnType.DOUBLE:
+        parts.append(_to_little_endian(
+            array("d", [0.0 if value is None else value for value in values])))
+    elif column_type == ColumnType.BOOLEAN:
+        parts.append(bytes(0 if value is None else int(value)
+                           for value in values))
+    elif column_type == ColumnType.BYTES:
+        data = [b"" if value is None else bytes(value) for value in values]
+        parts.append(_to_little_endian(array("I", map(len, data))))
+        parts.extend(data)
+    elif column_type == ColumnType.STRING:
+        data = [b"" if value is None else (value if isinstance(value, str) else str(value)).encode()
+                for value in values]
+        parts.append(_to_little_endian(array("I", map(len, data))))
+        parts.extend(data)
+
+    return b"".join(parts)
+
+
+def encode(message):
+    """Encodes a response message holding ColumnarRows
+
+    Args:
+        message (dict): The response message, the rows are expected at
+            message["result"]["rows"]
+
+    Returns:
+        A tuple with the JSON envelope (the message without the rows) and
+        the binary representation of the full message
+    """
+    result = dict(message["result"])
+    rows = result.pop("rows")
+    envelope = json.dumps({**message, "result": result}, default=str)
+    encoded_envelope = envelope.encode()
+
+    column_count = len(rows[0]) if rows else 0
+    columns = list(zip(*rows)) if rows else []
+
+    parts = [MAGIC, struct.pack("<BI", VERSION, len(encoded_envelope)),
+             encoded_envelope, struct.pack("<IH", len(rows), column_count)]
+    parts.extend(_encode_column(column) for column in columns)
+
+    return envelope, b"".join(parts)
+
+
+def _decode_array(typecode, data, offset, count):
+    values = array(typecode)
+    values.frombytes(data[offset:offset + values.itemsize * count])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist(), offset + values.itemsize * count
+
+
+def decode(data):
+    """Decodes a binary result message into the equivalent response message
+
+    Args:
+        data (bytes): The binary message
+
+    Returns:
+        The response message with the rows at message["result"]["rows"]
+    """
+    data = memoryview(data)
+    if bytes(data[:4]) != MAGIC:
+        raise ValueError("Invalid binary result message")
+
+    version, envelope_length = struct.unpack_from("<BI", data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary result version: {version}")
+
+    offset = 9
+    message = json.loads(bytes(data[offset:offset + envelope_length]))
+    offset += envelope_length
+
+    row_count, column_count = struct.unpack_from("<IH", data, offset)
+    offset += 6
+
+    columns = []
+    for _ in range(column_count):
+        column_type = ColumnType(data[offset])
+        offset += 1
+
+        null_bytes = (row_count + 7) // 8
+        nulls = data[offset:offset + null_bytes]
+        offset += null_bytes
+
+        if column_type == ColumnType.NULL:
+            values = [None] * row_count
+        elif column_type == ColumnType.INTEGER:
+            values, offset = _decode_array("q", data, offset, row_count)
+        elif column_type == ColumnType.DOUBLE:
+            values, offset = _decode_array("d", data, offset, row_count)
+        elif column_type == ColumnType.BOOLEAN:
+            values = [value != 0 for value in data[offset:offset + row_count]]
+            offset += row_count
+        else:
+            lengths, offset = _decode_array("I", data, offset, row_count)
+            values = []
+            for length in lengths:
+                value = bytes(data[offset:offset + length])
+                values.append(value if column_type ==
+                              ColumnType.BYTES else value.decode())
+                offset += length
+
+        for index in range(row_count):
+            if nulls[index >> 3] & (1 << (index & 7)):
+                values[index] = None
+
+        columns.append(values)
+
+    message["result"]["rows"] = [list(row) for row in zip(*columns)] \
+        if columns else [[] for _ in range(row_count)]
+
+    return message
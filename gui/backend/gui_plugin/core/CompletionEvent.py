@@ -22,7 +22,9 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
 import threading
-from typing import List
+from typing import Callable, List
+
+import gui_plugin.core.Logger as logger
 
 
 class CompletionEvent(threading.Event):
@@ -32,6 +34,37 @@ class CompletionEvent(threading.Event):
         super().__init__()
         self._errors = []
         self._cancelled = False
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def set(self) -> None:
+        """Sets the event and calls the done callbacks."""
+        super().set()
+
+        with self._callbacks_lock:
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(
+                    e, "There was an unhandled exception in a completion callback")
+
+    def add_done_callback(self, callback: Callable[[], None]) -> None:
+        """Adds a callback called once the event is set, from the thread
+        setting it. If the event is already set it is called right away.
+
+        Args:
+            callback (Callable): The callback
+        """
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+
+        callback()
 
     def add_error(self, error: Exception) -> None:
         """Adds an error to the completion event for the current task.
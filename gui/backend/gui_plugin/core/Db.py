@@ -26,13 +26,19 @@ import gui_plugin.core.Logger as logger
 import re
 import json
 import datetime
-import uuid
 from os import path, listdir
 from pathlib import Path
 from .Protocols import Response
-from .GuiBackendDbManager import BackendSqliteDbManager
+from .BackendDbPool import BackendDbPool
 from gui_plugin.core import Error
 
+# Columns of the backend database tables storing JSON objects, the select
+# functions return their values as dicts
+JSON_COLUMNS = {
+    "options",      # db_connection.options, profile.options
+    "settings",     # db_connection.settings
+}
+
 
 class BackendDatabase():
     def __init__(self, be_session=None, log_rotation=False):
@@ -44,9 +50,7 @@ class BackendDatabase():
 
     def __enter__(self):
         if self.db is None:
-            self.db = GuiBackendDb(
-                log_rotation=self.log_rotation,
-                session_uuid=str(uuid.uuid1()))
+            self.db = GuiBackendDb(log_rotation=self.log_rotation)
 
         return self.db
 
@@ -76,23 +80,24 @@ class GuiBackendDb():
     Interface to handle CRUD operations on the Backend Database
     """
 
-    def __init__(self, log_rotation=False, session_uuid=None):
-        # Creates the database manager which will do the automatic maintenance tasks:
-        # - Database Initialization
-        # - Log Rotation: should be enabled only on specific instances of the backend database
+    def __init__(self, log_rotation=False):
+        # The database manager doing the automatic maintenance tasks is owned
+        # by the connection pool, the database initialization and upgrade are
+        # done once, when the pool is created. The pooled connections are
+        # shared by all the sessions, so they are not named after any of them.
+        # - log_rotation: should be enabled only on specific instances of the backend database
         #                 such as the one created on the start.py file or when a web session
-        #                 is established
+        #                 is established, it starts the log rotation of the pool
         # TODO(rennox): Identify logic to determine whether this should be an SqliteDbManager
         # or a MySQLDbManager
 
-        self._session_uuid = session_uuid
+        self._pool = BackendDbPool.get_instance()
 
-        backend_db_manager = BackendSqliteDbManager(
-            log_rotation=log_rotation,
-            session_uuid=self._session_uuid)
+        if log_rotation:
+            self._pool.rotate_logs()
 
-        # Opens the session to the backend database
-        self._db = backend_db_manager.open_database()
+        # Checks out a session to the backend database
+        self._db = self._pool.acquire()
 
     def execute(self, sql, params=None):
         return self._db.execute(sql, params)
@@ -110,11 +115,14 @@ class GuiBackendDb():
         self._db.rollback()
 
     def close(self):
-        self._db.close()
+        # Returns the session to the pool, only once
+        if self._db is not None:
+            db, self._db = self._db, None
+            self._pool.release(db)
 
     def commit_and_close(self):
         self._db.commit()
-        self._db.close()
+        self.close()
 
     def rollback_and_close(self):
         self.rollback()
@@ -141,38 +149,52 @@ class GuiBackendDb():
         return Response.standard(status['type'], status['msg'], {"id": last_id})
 
     def select(self, sql, params=None, close=None):
-        res = None
-        rows = []
         try:
-            resultset = None
-            if params:
-                resultset = self.execute(sql, params)
-            else:
-                resultset = self.execute(sql)
-            res = resultset.fetch_all()
-            for row in res:
-                # check if one of the fields could be JSON, and if so, convert
-                # it to a dict if possible
-                row_dict = dict(row)
-                for key, val in row_dict.items():
-                    if isinstance(val, str):
-                        if val.startswith('{') and val.endswith('}'):
-                            try:
-                                row_dict[key] = json.loads(val)
-                            except ValueError as e:  # pragma: no cover
-                                pass
-
-                rows.append(row_dict)
+            return list(self.select_iter(sql, params))
+        finally:
+            if close:
+                self.close()
+
+    def select_iter(self, sql, params=None):
+        """Executes the given query and yields the rows as dicts
 
+        The rows are fetched from the database as they are consumed, the
+        columns registered in JSON_COLUMNS are decoded into dicts.
+        """
+        try:
+            resultset = self.execute(sql, params)
+            if resultset.description is None:
+                return
+
+            # Plain tuples are enough to build the dicts
+            resultset.row_factory = None
+            names = [description[0] for description in resultset.description]
+            json_columns = [name for name in names if name in JSON_COLUMNS]
+
+            # Like sqlite3.Row, the first of the columns with the same name
+            # is the one used
+            indexes = None
+            if len(set(names)) != len(names):
+                indexes = [names.index(name) for name in dict.fromkeys(names)]
+                names = list(dict.fromkeys(names))
+
+            for row in resultset:
+                if indexes is not None:
+                    row = [row[index] for index in indexes]
+                row_dict = dict(zip(names, row))
+                for name in json_columns:
+                    val = row_dict[name]
+                    if isinstance(val, str) and val.startswith('{') and val.endswith('}'):
+                        try:
+                            row_dict[name] = json.loads(val)
+                        except ValueError as e:  # pragma: no cover
+                            pass
+
+                yield row_dict
         except Exception as e:  # pragma: no cover
             # TODO(rennox): Is this the right way to set the last error?
             self._db.set_last_error(e)
             raise
-        finally:
-            if close:
-                self.close()
-
-        return rows
 
     def get_last_status(self):
         return self._db.get_last_status()
@@ -211,15 +233,15 @@ class GuiBackendDb():
     def rows_affected(self):
         return self._db.rows_affected
 
-    def log(self, event_type, message):
+    def log(self, event_type, message, event_time=None):
         # insert this message into the log table
         self._db.execute('''INSERT INTO `gui_log`.`log`(event_time, event_type, message) VALUES(?, ?, ?)''',
-                        (datetime.datetime.now(), event_type, message))
+                        (event_time if event_time else datetime.datetime.now(), event_type, message))
 
-    def message(self, session_id, is_response, message, request_id):
+    def message(self, session_id, is_response, message, request_id, sent=None):
         self._db.execute('''INSERT INTO `gui_log`.`message`(session_id, request_id, is_response,
             message, sent) VALUES(?, ?, ?, ?, ?)''',
-                        (session_id, request_id, is_response, message, datetime.datetime.now()))
+                        (session_id, request_id, is_response, message, sent if sent else datetime.datetime.now()))
 
 
 def convert_workbench_sql_to_sqlite(sql):
@@ -27,7 +27,9 @@ import pathlib
 import re
 import sqlite3
 import stat
+import time
 from datetime import date
+from threading import Lock, Thread
 from os import chdir, getcwd, listdir, makedirs, path, remove, rename
 
 import mysqlsh
@@ -38,13 +40,23 @@ from gui_plugin.core.dbms import DbSessionFactory
 from gui_plugin.core.lib.Version import Version
 
 # Refers to the schema version supported by this version of the code
-CURRENT_DB_VERSION = Version((0, 0, 18))
+CURRENT_DB_VERSION = Version((0, 0, 20))
 # Do not change it, it was dropped in 0.0.16 and that is valid value
 DROPPED_VERSION_IN_NAME_DB_VERSION = Version((0, 0, 16))
 OLDEST_SUPPORTED_DB_VERSION = Version((0, 0, 11))
+# Number of prepared statements kept by each backend database connection
+BACKEND_DB_CACHED_STATEMENTS = 256
 DEFAULT_CONFIG = {
-    "log_rotation_period": 7
+    "log_rotation_period": 7,
+    # Number of entries moved to the backup in every transaction
+    "log_rotation_batch_size": 1000,
+    # Pause in seconds between batches, to let other writers in
+    "log_rotation_batch_delay": 0.01,
+    # Number of free pages released by every incremental VACUUM step
+    "log_rotation_vacuum_pages": 1000,
 }
+# The log tables and the timestamp column used to rotate them
+LOG_TABLES = [("log", "event_time"), ("message", "sent")]
 
 
 class BackendDbManager():
@@ -61,16 +73,17 @@ class BackendDbManager():
         self._session_uuid = session_uuid
         self._connection_options = connection_options
 
-        self._config = DEFAULT_CONFIG
+        self._config = dict(DEFAULT_CONFIG)
+
+        self._rotation_lock = Lock()
+        self._rotation_thread = None
 
         self.ensure_database_exists()
 
         # Log rotation verification should be enabled by the caller
         # only at specific locations
-        db = self.open_database()
-        if log_rotation and self.check_if_logs_need_rotation(db):
-            self.backup_logs(db)
-        db.close()
+        if log_rotation:
+            self.rotate_logs()
 
     def ensure_database_exists(self):
         if not self.current_database_exist():
@@ -78,21 +91,64 @@ class BackendDbManager():
         else:
             self.check_for_previous_version_and_upgrade()
 
-    def check_if_logs_need_rotation(self, db):
-        sql_message = "SELECT COUNT(sent) FROM `gui_log`.`message` WHERE date(sent) < date('now');"
-        sql_log = "SELECT COUNT(event_time) FROM `gui_log`.`log` WHERE date(event_time) < date('now');"
-        old_rows_count = 0
+    def rotate_logs(self, wait=False):
+        """Moves the log entries of the previous days to the daily backup
+
+        The rotation runs in a background thread, a request done while the
+        rotation is running is ignored.
+
+        Args:
+            wait (bool): If True, waits until the rotation is done
+        """
+        with self._rotation_lock:
+            if self._rotation_thread is None or not self._rotation_thread.is_alive():
+                self._rotation_thread = Thread(target=self._run_log_rotation,
+                                               name="backend-db-log-rotation",
+                                               daemon=True)
+                self._rotation_thread.start()
+            thread = self._rotation_thread
+
+        if wait:
+            thread.join()
+
+    def _run_log_rotation(self):
+        try:
+            db = self.open_database()
+        except Exception as e:  # pragma: no cover
+            logger.error(f"Cannot open the backend database to rotate the logs: {e}")
+            return
+
         try:
-            res = db.execute(sql_message).fetch_one()
-            old_rows_count += int(res[0])
+            if self.check_if_logs_need_rotation(db):
+                self.backup_logs(db)
+        except Exception as e:  # pragma: no cover
+            logger.error(f"Exception caught during log rotation: {e}")
+        finally:
+            db.close()
 
-            res = db.execute(sql_log).fetch_one()
-            old_rows_count += int(res[0])
+    def get_log_rotation_cutoff(self):
+        """Returns the timestamp before which the log entries are rotated"""
+        return date.today().isoformat()
+
+    def ensure_log_indexes(self, db):
+        for table, column in LOG_TABLES:
+            db.execute(f"""CREATE INDEX IF NOT EXISTS `gui_log`.`{table}_{column}_idx`
+                            ON `{table}` (`{column}` ASC)""")
+
+    def check_if_logs_need_rotation(self, db):
+        old_rows_found = False
+        try:
+            self.ensure_log_indexes(db)
+            for table, column in LOG_TABLES:
+                res = db.execute(f"""SELECT EXISTS (SELECT 1 FROM `gui_log`.`{table}`
+                                        WHERE `{column}` < ?)""",
+                                 (self.get_log_rotation_cutoff(),)).fetch_one()
+                old_rows_found = old_rows_found or bool(res[0])
         except Exception as e:  # pragma: no cover
             # TODO(rennox): Is this the right way to set the last error?
             db.set_last_error(e)
 
-        return old_rows_count > 0
+        return old_rows_found
 
     def open_database(self):  # pragma: no cover
         raise NotImplementedError()
@@ -131,6 +187,7 @@ class BackendSqliteDbManager(BackendDbManager):
                          connection_options=connection_options if connection_options is not None else {
                              "database_name": "main",
                              "db_file": path.join(self.db_dir, 'mysqlsh_gui_backend.sqlite3'),
+                             "cached_statements": BACKEND_DB_CACHED_STATEMENTS,
                              "attach": [
                                  {
                                      "database_name": "gui_log",
@@ -318,10 +375,6 @@ class BackendSqliteDbManager(BackendDbManager):
         new_filename = pathlib.Path(self.db_dir,
                                     f"mysqlsh_gui_backend_log_{date.today().strftime('%Y.%m.%d')}.sqlite3")
 
-        # The backup was done for today already
-        if new_filename.exists():
-            return
-
         # check files, remove oldest if count > 6
         backup_files = []
         for f in listdir(self.db_dir):
@@ -335,44 +388,81 @@ class BackendSqliteDbManager(BackendDbManager):
             remove(path.join(self.db_dir, file_to_remove))
             backup_files.remove(file_to_remove)
 
+        cutoff = self.get_log_rotation_cutoff()
         try:
+            self.ensure_log_indexes(db)
             db.execute(
                 f"ATTACH DATABASE '{new_filename}' as 'backup';")
+            try:
+                for table, column in LOG_TABLES:
+                    self._move_logs_to_backup(db, table, column, cutoff)
+            finally:
+                # detach backup db. can not detach inside a transaction.
+                db.execute(f"DETACH DATABASE 'backup';")
 
-            db.start_transaction()
-
-            # create tables and copy data
-            # from log and message to backup db
-            copy_sql = """CREATE TABLE `backup`.`log` AS
-                            SELECT *
-                            FROM `gui_log`.`log`
-                            WHERE date(`event_time`) < date('now')"""
-            db.execute(copy_sql)
-
-            copy_sql = """CREATE TABLE `backup`.`message` AS
-                            SELECT *
-                            FROM `gui_log`.`message`
-                            WHERE date(`sent`) < date('now')"""
-            db.execute(copy_sql)
-
-            # delete old logs and messages
-            delete_sql = """DELETE FROM `gui_log`.`log`
-                            WHERE date(`event_time`) < date('now')"""
-            db.execute(delete_sql)
-
-            delete_sql = """DELETE FROM `gui_log`.`message`
-                            WHERE date(`sent`) < date('now')"""
-            db.execute(delete_sql)
-            db.commit()
-
-            # detach backup db. can not detach inside a transaction.
-            db.execute(f"DETACH DATABASE 'backup';")
-
+            self._vacuum_logs(db)
         except Exception as e:  # pragma: no cover
             logger.error(f"Exception caught during log backup: {e}")
             # TODO(rennox): Is this the right way to set the last error?
             db.set_last_error(e)
-            db.rollback()
+
+    def _move_logs_to_backup(self, db, table, column, cutoff):
+        batch_size = self._config['log_rotation_batch_size']
+        # The oldest entries, the same ones are selected by the INSERT and the
+        # DELETE as nobody else can write in between
+        batch_sql = f"""SELECT id FROM `gui_log`.`{table}`
+                        WHERE `{column}` < ?
+                        ORDER BY `{column}`, id
+                        LIMIT ?"""
+
+        db.execute(f"""CREATE TABLE IF NOT EXISTS `backup`.`{table}` AS
+                        SELECT * FROM `gui_log`.`{table}` WHERE 0""")
+        total = db.execute(f"""SELECT COUNT(*) FROM `gui_log`.`{table}`
+                                WHERE `{column}` < ?""", (cutoff,)).fetch_one()[0]
+        moved = 0
+        while moved < total:
+            db.execute("BEGIN IMMEDIATE TRANSACTION;")
+            try:
+                db.execute(f"""INSERT INTO `backup`.`{table}`
+                                SELECT * FROM `gui_log`.`{table}`
+                                WHERE id IN ({batch_sql})""",
+                           (cutoff, batch_size))
+                count = db.execute(f"""DELETE FROM `gui_log`.`{table}`
+                                    WHERE id IN ({batch_sql})""",
+                                   (cutoff, batch_size)).rowcount
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            if count == 0:
+                break
+
+            moved += count
+            logger.info(
+                f"Log rotation: moved {moved} of {total} entries of the {table} table to the backup")
+            time.sleep(self._config['log_rotation_batch_delay'])
+
+    def _vacuum_logs(self, db):
+        # The auto_vacuum mode of an existing database only changes with a
+        # full VACUUM, done once. From then on, the pages freed by every
+        # rotation are released in steps.
+        if db.execute("PRAGMA `gui_log`.auto_vacuum").fetch_one()[0] != 2:
+            logger.info("Log rotation: enabling incremental vacuum on the log database")
+            db.execute("PRAGMA `gui_log`.auto_vacuum = INCREMENTAL")
+            db.execute("VACUUM `gui_log`")
+            return
+
+        pages = self._config['log_rotation_vacuum_pages']
+        free_pages = db.execute("PRAGMA `gui_log`.freelist_count").fetch_one()[0]
+        while free_pages > 0:
+            # Every step of the statement frees a page, executescript runs
+            # it to completion
+            db.conn.executescript(f"PRAGMA `gui_log`.incremental_vacuum({pages})")
+            free_pages = db.execute("PRAGMA `gui_log`.freelist_count").fetch_one()[0]
+            logger.debug(
+                f"Log rotation: {free_pages} free pages left in the log database")
+            time.sleep(self._config['log_rotation_batch_delay'])
 
     def remove_db_file(self, path):
         self.remove_wal_and_shm_files(path)
@@ -22,6 +22,7 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 import threading
 import socket
+import struct
 import base64
 from hashlib import sha1
 from http.server import SimpleHTTPRequestHandler
@@ -37,8 +38,6 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
     _ws_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
     _single_instance_token = None
 
-    mutex = threading.Lock()
-
     def on_ws_message(self, message):
         """Override this handler to process incoming websocket messages."""
         pass  # pragma: no cover
@@ -57,18 +56,48 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
                 message = self.on_ws_sending_message(
                     message)  # pylint: disable=no-member
                 if message is not None:
-                    packet = WebSocket.Packet(message)
-                    packet.send(self.request)
+                    packet = WebSocket.Packet(message, self.deflate)
+                    packet.send(self.ws_output)
                     logger.debug2(message=packet.message,
                                   sensitive=True, prefix="-> ")
             except Exception as e:
                 logger.error(f"Exception sending a message. {e}")
 
+    def send_binary_message(self, message, data):
+        """Sends the given data in a binary message.
+
+        The message is the text representation of the data, it is used to
+        process the message before sending it. If the message is replaced
+        when being processed, the replacement is sent as a text message.
+        """
+        with self.mutex:
+            try:
+                checked_message = self.on_ws_sending_message(
+                    message)  # pylint: disable=no-member
+                if checked_message is None:
+                    return
+
+                if checked_message is message:
+                    packet = WebSocket.Packet(data, self.deflate)
+                else:
+                    packet = WebSocket.Packet(checked_message, self.deflate)
+                packet.send(self.ws_output)
+                logger.debug2(message=checked_message,
+                              sensitive=True, prefix="-> ")
+            except Exception as e:
+                logger.error(f"Exception sending a message. {e}")
+
     def setup(self):
         self.protocol_version = "HTTP/1.1"
         SimpleHTTPRequestHandler.setup(self)
         self.connected = False
         self.cached_successful_auth = None
+        self.deflate = None
+        # Serializes the frames sent to this connection
+        self.mutex = threading.Lock()
+        # Where the frames are sent, replaced by the server when the
+        # connection is served by its event loop
+        self.ws_output = self.request
 
         # Disable the support for basic http auth
         self.server.perform_auth = False
@@ -111,8 +140,15 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
         if self.headers.get("Upgrade", None) == "websocket":
             self._handshake()
             # This handler is in websocket mode now.
-            # do_GET only returns after client close or socket error.
-            self._read_messages()
+            if self.is_multiplexed:
+                # The server event loop reads the messages from now on, the
+                # connection is kept open when this thread finishes
+                if self.connected:
+                    self.close_connection = True
+                    self.server.register_websocket(self)
+            else:
+                # do_GET only returns after client close or socket error.
+                self._read_messages()
         # if authentication is required and there was no auth in the header
         elif self.server.perform_auth and auth_header is None:
             self.send_auth_header()
@@ -137,8 +173,9 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
                     self._ws_close()
 
     def _read_next_message(self):
-        frame = WebSocket.FrameReceiver(self.rfile)
+        self.process_frame(WebSocket.FrameReceiver(self.rfile))
 
+    def process_frame(self, frame):
         # Process control frames even if in the middle of
         # packet fragments
         if frame.is_control_message:
@@ -162,11 +199,24 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
         self.send_header('Upgrade', 'websocket')
         self.send_header('Connection', 'Upgrade')
         self.send_header('Sec-WebSocket-Accept', str(digest))
+
+        # The compression options are None when compression is disabled
+        compression = getattr(self.server, "compression", None)
+        if compression is not None:
+            try:
+                self.deflate = WebSocket.PerMessageDeflate.negotiate(
+                    headers.get('Sec-WebSocket-Extensions'), compression)
+            except ValueError as e:
+                logger.error(f"Invalid compression options: {e}")
+
+            if self.deflate is not None:
+                self.send_header('Sec-WebSocket-Extensions',
+                                 self.deflate.response_header())
         self.end_headers()
         self.connected = True
         self.on_ws_connected()
 
-    def _ws_close(self):
+    def _ws_close(self, status=None):
         if not self.connected:
             logger.info(
                 "Closing the already closed socket connection. Ignore.")
@@ -177,7 +227,9 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
         with self.mutex:
             try:
                 WebSocket.FrameSender(
-                    WebSocket.Operation.Close, buffer=self.request)
+                    WebSocket.Operation.Close,
+                    message=b"" if status is None else struct.pack(">H", status),
+                    buffer=self.ws_output)
             except Exception as e:
                 logger.exception(e, "Exception while sending close request.")
 
@@ -190,10 +242,16 @@ class HTTPWebSocketsHandler(SimpleHTTPRequestHandler):
         elif frame.opcode == WebSocket.Operation.Ping:
             with self.mutex:
                 WebSocket.FrameSender(
-                    WebSocket.Operation.Pong, message=frame.message, buffer=self.request)
+                    WebSocket.Operation.Pong, message=frame.payload, buffer=self.ws_output)
         elif frame.opcode == WebSocket.Operation.Pong:
             pass
 
+    @property
+    def is_multiplexed(self):
+        """True if the messages are read by the server event loop instead of
+        the handler thread"""
+        return getattr(self.server, "multiplexed", False)
+
     @property
     def is_local_session(self):
         return self.server.single_instance_token != None
@@ -24,6 +24,7 @@
 from mysqlsh.plugin_manager import plugin_function  # pylint: disable=no-name-in-module
 import mysqlsh
 from gui_plugin.core.Protocols import Response
+from gui_plugin.core.RequestExecutor import RequestExecutor
 import re
 
 
@@ -44,6 +45,18 @@ def get_backend_information():
     return info
 
 
+@plugin_function('gui.core.getRequestPoolStats', shell=False, web=True)
+def get_request_pool_stats():
+    """Returns the statistics of the pool executing the web requests
+
+    Returns:
+       dict: the number of workers, the depth of the request queue and the
+           request counters
+    """
+
+    return RequestExecutor.get_instance().get_stats()
+
+
 def parse_shell_version(version):
     m = re.match(
         r"Ver (\d+\.\d+\.\d+)(-.+)? for (.+) on (.+) - for MySQL (\d+\.\d+\.\d+)(-.+)? \((.+)\)", version)
@@ -0,0 +1,336 @@
+# Copyright (c) 2022, 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+from collections import deque
+from threading import Condition, Thread
+
+import mysqlsh
+
+
+class ShellContext:
+    """
+    Shell context used by the pool workers, the shell callbacks are routed to
+    the request using it.
+
+    A context is only reused by the requests with the same key, the user and
+    web session that sent them.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.request = None
+        self._shell_ctx = mysqlsh.globals.shell.create_context({
+            "printDelegate": lambda x: self.request.on_shell_print(x),
+            "diagDelegate": lambda x: self.request.on_shell_print_diag(x),
+            "errorDelegate": lambda x: self.request.on_shell_print_error(x),
+            "promptDelegate": lambda x, y: self.request.on_shell_prompt(x, y), })
+        self.shell = self._shell_ctx.get_shell()
+
+    def is_reusable(self):
+        """A context left with a global session open is not reused"""
+        try:
+            return self.shell.get_session() is None
+        except Exception:
+            return False
+
+    def finalize(self):
+        self._shell_ctx.finalize()
+
+
+class RequestWorker(Thread):
+    """
+    Thread of the RequestExecutor pool, executes the queued requests one at a
+    time.
+
+    The shell context of a request is taken from the executor, which keeps
+    the contexts of the previous requests of the same user and web session.
+    The shell callbacks are routed to the request being executed.
+    """
+
+    def __init__(self, executor):
+        super().__init__(daemon=True)
+        self._executor = executor
+        self._request = None
+        self._context_key = None
+        self._shell_context = None
+
+    def get_context(self):
+        if self._request is None:
+            return None
+        return self._request.get_context()
+
+    @property
+    def shell(self):
+        if self._shell_context is None:
+            self._shell_context = self._executor._get_shell_context(
+                self._context_key)
+            self._shell_context.request = self._request
+
+        return self._shell_context.shell
+
+    def _release_shell(self):
+        if self._shell_context is None:
+            return
+
+        self._shell_context.request = None
+        self._executor._release_shell_context(self._shell_context)
+        self._shell_context = None
+
+    def run(self):
+        while True:
+            request = self._executor._next_request(self)
+            if request is None:
+                break
+
+            self._request, self._context_key = request
+            try:
+                self._request.execute(self.shell)
+            finally:
+                self._release_shell()
+                self._request = None
+                self._context_key = None
+                self._executor._request_done()
+
+
+class RequestExecutor:
+    """
+    Pool of threads executing the web requests that run on the Shell instance
+    of the web server.
+
+    The requests are queued per web session and the sessions are served in
+    round robin, so a burst of requests from a web session does not delay
+    the requests of the other ones. Worker threads are created on demand up
+    to max_workers and exit after being idle for idle_timeout seconds. Once
+    max_queue_size requests are waiting, new requests are rejected.
+
+    A worker waiting for the reply of a prompt does not count against
+    max_workers, so another one serves the queued requests meanwhile. Up to
+    max_idle_shell_contexts idle shell contexts are kept to be reused by the
+    following requests of the same user and web session.
+    """
+    __instance = None
+
+    max_workers = 16
+    max_queue_size = 1000
+    idle_timeout = 60
+    reuse_shell_context = True
+    max_idle_shell_contexts = 16
+
+    @staticmethod
+    def get_instance() -> 'RequestExecutor':
+        if RequestExecutor.__instance is None:
+            RequestExecutor()
+        return RequestExecutor.__instance
+
+    def __init__(self):
+        if RequestExecutor.__instance is not None:
+            raise Exception(
+                "This class is a singleton, use get_instance function to get an instance.")
+
+        RequestExecutor.__instance = self
+        self._condition = Condition()
+        self._workers = set()
+        self._idle_workers = 0
+        self._blocked_workers = 0
+        self._active_requests = 0
+        self._idle_shell_contexts = deque()
+        # Pending requests per web session and the round robin order of the
+        # web sessions with pending requests
+        self._session_queues = {}
+        self._ready_sessions = deque()
+        self._queued_requests = 0
+        self._stats = {
+            "submitted_requests": 0,
+            "completed_requests": 0,
+            "rejected_requests": 0,
+            "max_queue_depth": 0,
+            "max_active_requests": 0,
+            "created_workers": 0,
+            "created_shell_contexts": 0,
+            "reused_shell_contexts": 0,
+        }
+
+    @staticmethod
+    def configure(max_workers=None, max_queue_size=None, idle_timeout=None,
+                  reuse_shell_context=None):
+        """Configures the request pool
+
+        Args:
+            max_workers (int): The maximum number of requests executed at the
+                same time
+            max_queue_size (int): The maximum number of requests waiting to
+                be executed
+            idle_timeout (float): The time in seconds an idle worker thread
+                waits for a new request before exiting
+            reuse_shell_context (bool): If True, the shell context of a
+                request is reused by the following requests of the same user
+                and web session
+        """
+        if max_workers is not None:
+            RequestExecutor.max_workers = max(1, int(max_workers))
+        if max_queue_size is not None:
+            RequestExecutor.max_queue_size = max(1, int(max_queue_size))
+        if idle_timeout is not None:
+            RequestExecutor.idle_timeout = max(0, float(idle_timeout))
+        if reuse_shell_context is not None:
+            RequestExecutor.reuse_shell_context = bool(reuse_shell_context)
+
+        # Workers above the new limit exit once they become idle
+        if RequestExecutor.__instance is not None:
+            with RequestExecutor.__instance._condition:
+                RequestExecutor.__instance._condition.notify_all()
+
+    def submit(self, request, session_key=None, context_key=None):
+        """Queues a request to be executed by the pool
+
+        Args:
+            request (object): The request, it must provide an execute(shell)
+                function and the shell callbacks
+            session_key (object): The key of the web session that sent the
+                request, used to share the workers fairly among the sessions
+            context_key (object): The key of the requests that can share a
+                shell context, defaults to the session_key
+        """
+        with self._condition:
+            if self._queued_requests >= RequestExecutor.max_queue_size:
+                self._stats["rejected_requests"] += 1
+                raise Exception("The server is busy, too many requests are "
+                                "waiting to be executed.")
+
+            queue = self._session_queues.get(session_key)
+            if queue is None:
+                queue = deque()
+                self._session_queues[session_key] = queue
+                self._ready_sessions.append(session_key)
+            queue.append((request, session_key if context_key is None
+                          else context_key))
+
+            self._queued_requests += 1
+            self._stats["submitted_requests"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._queued_requests)
+
+            if not self._start_worker():
+                self._condition.notify()
+
+    def begin_wait(self):
+        """Called by a request before waiting for the user, e.g. on a prompt,
+        the worker executing it is not counted as busy until end_wait()"""
+        with self._condition:
+            self._blocked_workers += 1
+            self._start_worker()
+
+    def end_wait(self):
+        with self._condition:
+            self._blocked_workers -= 1
+
+    def _start_worker(self):
+        # Must be called holding the condition
+        if self._queued_requests > self._idle_workers and \
+                len(self._workers) - self._blocked_workers < RequestExecutor.max_workers:
+            worker = RequestWorker(self)
+            self._workers.add(worker)
+            self._stats["created_workers"] += 1
+            worker.start()
+            return True
+
+        return False
+
+    def _next_request(self, worker):
+        with self._condition:
+            while not self._ready_sessions:
+                if len(self._workers) - self._blocked_workers > RequestExecutor.max_workers:
+                    self._workers.discard(worker)
+                    return None
+
+                self._idle_workers += 1
+                signaled = self._condition.wait(RequestExecutor.idle_timeout)
+                self._idle_workers -= 1
+
+                if not signaled and not self._ready_sessions:
+                    self._workers.discard(worker)
+                    return None
+
+            session_key = self._ready_sessions.popleft()
+            queue = self._session_queues[session_key]
+            request = queue.popleft()
+            if queue:
+                # The web session goes to the end of the line
+                self._ready_sessions.append(session_key)
+            else:
+                del self._session_queues[session_key]
+
+            self._queued_requests -= 1
+            self._active_requests += 1
+            self._stats["max_active_requests"] = max(
+                self._stats["max_active_requests"], self._active_requests)
+
+            return request
+
+    def _request_done(self):
+        with self._condition:
+            self._active_requests -= 1
+            self._stats["completed_requests"] += 1
+
+    def _get_shell_context(self, key):
+        with self._condition:
+            # The most recently used context of the key is taken
+            for index in range(len(self._idle_shell_contexts) - 1, -1, -1):
+                shell_context = self._idle_shell_contexts[index]
+                if shell_context.key == key:
+                    del self._idle_shell_contexts[index]
+                    self._stats["reused_shell_contexts"] += 1
+                    return shell_context
+
+            self._stats["created_shell_contexts"] += 1
+
+        return ShellContext(key)
+
+    def _release_shell_context(self, shell_context):
+        evicted = [shell_context]
+        if RequestExecutor.reuse_shell_context and shell_context.is_reusable():
+            with self._condition:
+                self._idle_shell_contexts.append(shell_context)
+                evicted = []
+                while len(self._idle_shell_contexts) > \
+                        RequestExecutor.max_idle_shell_contexts:
+                    evicted.append(self._idle_shell_contexts.popleft())
+
+        for shell_context in evicted:
+            shell_context.finalize()
+
+    def get_stats(self):
+        """Returns the size of the pool and the depth of the queue"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats["workers"] = len(self._workers)
+            stats["idle_workers"] = self._idle_workers
+            stats["blocked_workers"] = self._blocked_workers
+            stats["idle_shell_contexts"] = len(self._idle_shell_contexts)
+            stats["active_requests"] = self._active_requests
+            stats["queue_depth"] = self._queued_requests
+            stats["queued_sessions"] = len(self._session_queues)
+
+        stats["max_workers"] = RequestExecutor.max_workers
+        stats["max_queue_size"] = RequestExecutor.max_queue_size
+        return stats
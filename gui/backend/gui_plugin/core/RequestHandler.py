@@ -22,14 +22,13 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
 import threading
-from threading import Event, Thread
-
-import mysqlsh
+from threading import Event
 
 from gui_plugin.core.Protocols import Response
+from gui_plugin.core.RequestExecutor import RequestExecutor
 
 
-class RequestHandler(Thread):
+class RequestHandler:
     """
     This class will handle web requests to execute a specific API on the shell
     out of the context of either:
@@ -45,10 +44,13 @@ class RequestHandler(Thread):
     - Supports prompts
     - Causes information printed by the API being executed to be sent as PENDING
       responses to the caller.
+
+    The request is executed by a worker of the RequestExecutor pool. When the
+    API queues a task on a DB session, the worker is released and the request
+    is completed by the session thread once the task is done.
     """
 
     def __init__(self, request_id, func, kwargs, web_handler, lock_session=False):
-        super().__init__()
         self._request_id = request_id
         self._func = func
         self._kwargs = kwargs
@@ -110,7 +112,13 @@ class RequestHandler(Thread):
         self.web_handler.send_prompt_response(
             self.request_id, options, self)
 
-        self._prompt_event.wait()
+        # Other requests are served while waiting for the user
+        executor = RequestExecutor.get_instance()
+        executor.begin_wait()
+        try:
+            self._prompt_event.wait()
+        finally:
+            executor.end_wait()
         self._prompt_event.clear()
 
         return [self._prompt_replied, self._prompt_reply]
@@ -133,30 +141,36 @@ class RequestHandler(Thread):
         self._prompt_reply = reply['reply']
         self._prompt_event.set()
 
-    def run(self):
+    def start(self):
+        """
+        Queues the request to be executed by the request pool, the requests
+        of each web session are served in turns.
+        """
+        # The shell contexts are only shared by the requests of the same
+        # user and web session
+        RequestExecutor.get_instance().submit(
+            self, self._web_handler,
+            context_key=(self._web_handler.session_user_id,
+                         self._web_handler.session_uuid))
+
+    def execute(self, shell):
         """
-        Thread function to setup the shell callbacks for print and prompt
-        functions.
+        Called by the pool worker to execute the request, the shell callbacks
+        for print and prompt functions of the worker shell context are routed
+        to this request.
         """
         self._thread_context = threading.local()
         self._thread_context.request_id = self._request_id
         self._thread_context.web_handler = self._web_handler
         self._prompt_event = Event()
 
-        shell = mysqlsh.globals.shell
-
-        self._shell_ctx = shell.create_context({"printDelegate": lambda x: self.on_shell_print(x),
-                                                "diagDelegate": lambda x: self.on_shell_print_diag(x),
-                                                "errorDelegate": lambda x: self.on_shell_print_error(x),
-                                                "promptDelegate": lambda x, y: self.on_shell_prompt(x, y), })
-        self._shell = self._shell_ctx.get_shell()
+        self._shell = shell
 
         self._do_execute()
 
-        self._shell_ctx.finalize()
-
     def _do_execute(self):
         result = None
+        completion_event = None
         try:
             if self._lock_session:
                 # The session will be used by an external (non GUI) plugin,
@@ -166,8 +180,11 @@ class RequestHandler(Thread):
                 self._kwargs["session"].notify_task_execution_state(
                     None, "started")
             result = self._func(**self._kwargs)
-            if hasattr(self._thread_context, "completion_event"):
-                self._thread_context.completion_event.wait()
+            completion_event = getattr(
+                self._thread_context, "completion_event", None)
+            if completion_event is not None and self._lock_session:
+                # The session lock is owned by this thread
+                completion_event.wait()
         except Exception as e:
             # dump stack trace to raw stderr
             import traceback
@@ -180,26 +197,40 @@ class RequestHandler(Thread):
                     None, "finished")
                 self._kwargs["session"].release()
 
+        if completion_event is not None and not self._lock_session:
+            # The task runs on the session thread, the pool worker is
+            # released and the request is completed once the task is done
+            completion_event.add_done_callback(
+                lambda: self._complete(result, completion_event))
+        else:
+            self._complete(result, completion_event)
+
+    def _complete(self, result, completion_event):
+        # Called from the session thread when the request waits for a task,
+        # so the thread context of the worker is not available
+        request_id = self._request_id
+        web_handler = self._web_handler
+
         if result is not None:
             if isinstance(result, dict) and "request_state" in result:
                 self._confirm_complete = result["request_state"]["type"] != "ERROR"
-                self.web_handler.send_command_response(self.request_id, result)
+                web_handler.send_command_response(request_id, result)
             else:
-                self.web_handler.send_command_response(
-                    self.request_id, Response.pending(msg="", args={"result": result}))
-        elif hasattr(self._thread_context, "completion_event"):
-            if self._thread_context.completion_event.has_errors:
+                web_handler.send_command_response(
+                    request_id, Response.pending(msg="", args={"result": result}))
+        elif completion_event is not None:
+            if completion_event.has_errors:
                 self._confirm_complete = False
-                for error in self._thread_context.completion_event.get_errors():
-                    self.web_handler.send_command_response(
-                        self.request_id, Response.exception(error))
-            elif self._thread_context.completion_event.is_cancelled:
+                for error in completion_event.get_errors():
+                    web_handler.send_command_response(
+                        request_id, Response.exception(error))
+            elif completion_event.is_cancelled:
                 self._confirm_complete = False
-                self.web_handler.send_command_response(
-                    self.request_id, Response.cancelled(""))
+                web_handler.send_command_response(
+                    request_id, Response.cancelled(""))
 
         # This is the case of any plugin function that does not fail but
         # does not return anything, we should return an OK response anyway
         # to confirm it completed
         if self._confirm_complete:
-            self.web_handler.send_command_done(self.request_id)
+            web_handler.send_command_done(request_id)
@@ -36,6 +36,7 @@ from queue import Empty, Queue
 import mysqlsh
 
 import gui_plugin as gui
+import gui_plugin.core.ColumnarResult as ColumnarResult
 import gui_plugin.core.Logger as logger
 import gui_plugin.core.WebSocketCommon as WebSocket
 from gui_plugin.core.BackendDbLogger import BackendDbLogger
@@ -52,6 +53,14 @@ from gui_plugin.users.backend import get_id_personal_user_group
 
 
 class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
+    # Maximum number of PENDING responses of a single request that can be
+    # waiting to be sent, once reached, the thread producing them is paused
+    # until the client catches up
+    max_pending_responses_per_request = 16
+
+    # Functions resolved for the commands, shared by all the handlers
+    _resolved_commands = {}
+    _resolved_commands_lock = threading.Lock()
 
     def _is_shell_object(self, object):
         return type(object).__name__ in ['Dict', 'List']
@@ -78,6 +87,64 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
         self._response_queue = Queue()
         self._response_thread = threading.Thread(target=self.process_responses)
 
+        # Flow control of the responses, keeps the number of queued PENDING
+        # responses per request
+        self._pending_responses = {}
+        self._pending_responses_condition = threading.Condition()
+        self._max_response_queue_depth = 0
+        self._throttled_responses = 0
+
+    @property
+    def response_queue_stats(self):
+        with self._pending_responses_condition:
+            return {
+                "queue_depth": self._response_queue.qsize(),
+                "max_queue_depth": self._max_response_queue_depth,
+                "throttled_responses": self._throttled_responses,
+                "pending_responses": dict(self._pending_responses),
+            }
+
+    def _wait_for_response_capacity(self, request_id, wait=True):
+        with self._pending_responses_condition:
+            if self._pending_responses.get(request_id, 0) >= self.max_pending_responses_per_request:
+                self._throttled_responses += 1
+                logger.debug3(
+                    f"Throttling responses for request {request_id}")
+
+            while wait and self.connected and self._pending_responses.get(request_id, 0) >= \
+                    self.max_pending_responses_per_request:
+                self._pending_responses_condition.wait(timeout=1)
+
+            self._pending_responses[request_id] = self._pending_responses.get(
+                request_id, 0) + 1
+
+    def _is_flow_controlled(self, json_message):
+        return isinstance(json_message, dict) and bool(json_message.get("request_id")) and \
+            json_message.get("request_state", {}).get("type") == "PENDING"
+
+    def _response_sent(self, json_message):
+        if not self._is_flow_controlled(json_message):
+            return
+
+        request_id = json_message["request_id"]
+        with self._pending_responses_condition:
+            if request_id in self._pending_responses:
+                self._pending_responses[request_id] -= 1
+                if self._pending_responses[request_id] <= 0:
+                    del self._pending_responses[request_id]
+                self._pending_responses_condition.notify_all()
+
+    def _send_response(self, json_message):
+        # Result rows requested in the binary columnar format are sent as
+        # binary messages
+        if ColumnarResult.get_rows(json_message) is not None:
+            self.send_binary_message(
+                *ColumnarResult.encode(json_message))
+        else:
+            self.send_message(json.dumps(json_message, default=str))
+
+        self._response_sent(json_message)
+
     def process_responses(self):
         while self.connected:
             try:
@@ -85,7 +152,31 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
             except Empty as e:
                 continue
 
-            self.send_message(json.dumps(json_message, default=str))
+            self._send_response(json_message)
+
+        # Release any thread waiting for the responses to be sent
+        with self._pending_responses_condition:
+            self._pending_responses_condition.notify_all()
+
+    def process_pending_responses(self, max_count):
+        """Sends up to max_count of the queued responses.
+
+        Used by the server event loop when the connection is multiplexed.
+
+        Returns:
+            True if there are still responses in the queue
+        """
+        for _ in range(max_count):
+            if not self.connected:
+                return False
+            try:
+                json_message = self._response_queue.get_nowait()
+            except Empty:
+                return False
+
+            self._send_response(json_message)
+
+        return not self._response_queue.empty()
 
     def process_message(self, json_message):
         request = json_message.get('request')
@@ -127,13 +218,20 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
 
     def on_ws_message(self, frame: WebSocket.Frame):
         if frame.is_initial_fragment:
-            self.packets[self.session_uuid] = WebSocket.Packet()
+            self.packets[self.session_uuid] = WebSocket.Packet(
+                deflate=self.deflate)
 
         self.packets[self.session_uuid].append(frame)
 
         if self.packets[self.session_uuid].done():
-            message = self.packets[self.session_uuid].message
-            del self.packets[self.session_uuid]
+            packet = self.packets.pop(self.session_uuid)
+            try:
+                message = packet.message
+            except WebSocket.MessageError as e:
+                # The connection can not continue after an invalid message
+                logger.error(f"Invalid web socket message: {str(e)}")
+                self._ws_close(e.status)
+                return
 
             logger.debug2(message=message, sensitive=True, prefix="<- ")
             try:
@@ -224,8 +322,7 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
                                 "local_user_mode": self.is_local_session,
                                 "active_profile": default_profile})
 
-                            # Starts the response processor...
-                            self._response_thread.start()
+                            self._start_response_processor()
 
                             return
 
@@ -267,8 +364,13 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
                                    values={"session_uuid": self.session_uuid,
                                            "local_user_mode": self.is_local_session})
 
-        # Starts the response processor...
-        self._response_thread.start()
+        self._start_response_processor()
+
+    def _start_response_processor(self):
+        # On multiplexed connections the responses are sent by the server
+        # event loop
+        if not self.is_multiplexed:
+            self._response_thread.start()
 
     def on_ws_closed(self):
         # if the database connection for this thread was opened, close it
@@ -286,6 +388,10 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
         if self._response_thread.is_alive():
             self._response_thread.join()
 
+        # Release any thread waiting for the responses to be sent
+        with self._pending_responses_condition:
+            self._pending_responses_condition.notify_all()
+
         logger.info("Websocket closed")
 
     def on_ws_sending_message(self, message):
@@ -341,8 +447,23 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
         if self._is_shell_object(json_message):
             json_message = json.loads(str(json_message).replace("\n", "\\n"))
 
+        # PENDING responses are subject to flow control, so a request
+        # producing them faster than they are sent is paused
+        if self._is_flow_controlled(json_message):
+            # The server threads sending the responses must never be paused
+            self._wait_for_response_capacity(
+                json_message["request_id"],
+                wait=not (self.is_multiplexed and self.server.is_server_thread()))
+
         self._response_queue.put(json_message)
 
+        depth = self._response_queue.qsize()
+        if depth > self._max_response_queue_depth:
+            self._max_response_queue_depth = depth
+
+        if self.is_multiplexed:
+            self.server.notify_responses(self)
+
     def send_response_message(self, msg_type, msg, request_id=None,
                               values=None, api=False):
         # get message text which is either a Dict that is converted to JSON or
@@ -441,8 +562,7 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
         # if the db object has not yet been initialized for this thread
         if not self._db:
             # open the database connection for this thread
-            self._db = GuiBackendDb(
-                log_rotation=True, session_uuid=self.session_uuid)
+            self._db = GuiBackendDb(log_rotation=True)
         return self._db
 
     @contextmanager
@@ -545,29 +665,16 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
                 raise Exception(
                     'No command given. Please provide the command.')
 
-            # Check if user is allowed to execute this command
-            allowed = False
-            res = self.db.execute(
-                '''SELECT p.name, p.access_pattern
-                FROM privilege p
-                    INNER JOIN role_has_privilege r_p
-                        ON p.id = r_p.privilege_id
-                    INNER JOIN user_has_role u_r
-                        ON r_p.role_id = u_r.role_id
-                WHERE u_r.user_id = ? AND p.privilege_type_id = 1''',
-                (self.session_user_id,)).fetch_all()
-            for row in res:
-                p = re.compile(row[1])
-                m = p.match(cmd)
-                if not m:
-                    raise Exception(f'This user account has no privileges to '
-                                    f'execute the command {cmd}')
-                allowed = True
-                break
-
-            if not allowed:
+            # Check if user is allowed to execute this command, only the
+            # first access pattern of the user is evaluated
+            patterns = user_handler.get_command_patterns(
+                self.db, self.session_user_id)
+            if not patterns:
                 raise Exception(f'This user does not have the necessary '
                                 f'privileges to execute the command {cmd}.')
+            if not patterns[0].match(cmd):
+                raise Exception(f'This user account has no privileges to '
+                                f'execute the command {cmd}')
 
             # Argument need to be passed in a dict using the argument names as
             # the keys
@@ -580,65 +687,7 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
             # named user_id, profile_id, web_session, request_id,
             # module_session, async_web_session or session.
             # If so, replace them with session variables
-            f_args = []
-
-            # Loop over all chained objects/functions of the given cmd and find
-            # the function to call
-            matches = re.findall(r'(\w+)\.', cmd + '.')
-            parent_obj = None
-            func = None
-
-            if len(matches) < 2:
-                raise Exception(
-                    f"The command '{cmd}' is using wrong format. "
-                    "Use <global>[.<object>]*.<function>")
-
-            # Last entry is a function name
-            function_name = matches[-1]
-
-            # Rest is a chain of objects
-            objects = matches[:-1]
-
-            found_objects = []
-
-            # Selects the parent object
-            if objects[0] == 'gui':
-                parent_obj = gui
-                objects = objects[1:]
-                found_objects.append('gui')
-            else:
-                parent_obj = mysqlsh.globals
-
-            # Searches the object hierarchy
-            for object in objects:
-                try:
-                    # Convert from camelCase to snake_case
-                    object = re.sub(r'(?<!^)(?=[A-Z])', '_', object).lower()
-
-                    child = getattr(parent_obj, object)
-
-                    # Set the parent_obj for the next object evaluation
-                    parent_obj = child
-                    found_objects.append(object)
-                except:
-                    if len(found_objects) == 0:
-                        raise Exception(
-                            f"The '{object}' global object does not exist")
-                    else:
-                        raise Exception(
-                            f"Object '{'.'.join(found_objects)}' has no member named '{object}'")
-
-            # Searches the target function
-            try:
-                func = getattr(parent_obj, function_name)
-            except:
-                raise Exception(
-                    f"Object '{'.'.join(found_objects)}' has no member function named '{function_name}'")
-
-            f_args = {}
-            if func:
-                f_args = self.get_function_arguments(
-                    func=func, mod=parent_obj, mod_cmd=function_name)
+            func, found_objects, f_args = self.resolve_command(cmd)
 
             lock_session = False
 
@@ -700,7 +749,7 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
                         f'The function {cmd} needs a module_session_id '
                         'argument set to a DbModuleSession.')
 
-                user_session_functions = ["gui.sql_editor.execute",
+                user_session_functions = ["gui.sql_editor.execute", "gui.sql_editor.fetch_more",
                                           "gui.sql_editor.default_user_schema", "gui.sql_editor.get_current_schema",
                                           "gui.sql_editor.set_current_schema", "gui.sql_editor.get_auto_commit",
                                           "gui.sql_editor.set_auto_commit"]
@@ -752,6 +801,88 @@ class ShellGuiWebSocketHandler(HTTPWebSocketsHandler):
         if result is not None:
             self.send_command_response(request_id, result)
 
+    def resolve_command(self, cmd):
+        """Resolves the function to be called for the given command
+
+        Successful resolutions are cached on the class, as the global objects
+        and their functions do not change during the life of the server.
+
+        Args:
+            cmd (str): The command, e.g. gui.sqlEditor.execute
+
+        Returns:
+            A tuple with the function, the list of objects found while
+            resolving it and the function arguments
+        """
+        with ShellGuiWebSocketHandler._resolved_commands_lock:
+            resolved = ShellGuiWebSocketHandler._resolved_commands.get(cmd)
+        if resolved is not None:
+            return resolved
+
+        # Loop over all chained objects/functions of the given cmd and find
+        # the function to call
+        matches = re.findall(r'(\w+)\.', cmd + '.')
+        parent_obj = None
+        func = None
+
+        if len(matches) < 2:
+            raise Exception(
+                f"The command '{cmd}' is using wrong format. "
+                "Use <global>[.<object>]*.<function>")
+
+        # Last entry is a function name
+        function_name = matches[-1]
+
+        # Rest is a chain of objects
+        objects = matches[:-1]
+
+        found_objects = []
+
+        # Selects the parent object
+        if objects[0] == 'gui':
+            parent_obj = gui
+            objects = objects[1:]
+            found_objects.append('gui')
+        else:
+            parent_obj = mysqlsh.globals
+
+        # Searches the object hierarchy
+        for object in objects:
+            try:
+                # Convert from camelCase to snake_case
+                object = re.sub(r'(?<!^)(?=[A-Z])', '_', object).lower()
+
+                child = getattr(parent_obj, object)
+
+                # Set the parent_obj for the next object evaluation
+                parent_obj = child
+                found_objects.append(object)
+            except:
+                if len(found_objects) == 0:
+                    raise Exception(
+                        f"The '{object}' global object does not exist")
+                else:
+                    raise Exception(
+                        f"Object '{'.'.join(found_objects)}' has no member named '{object}'")
+
+        # Searches the target function
+        try:
+            func = getattr(parent_obj, function_name)
+        except:
+            raise Exception(
+                f"Object '{'.'.join(found_objects)}' has no member function named '{function_name}'")
+
+        f_args = {}
+        if func:
+            f_args = self.get_function_arguments(
+                func=func, mod=parent_obj, mod_cmd=function_name)
+
+        resolved = (func, found_objects, f_args)
+        with ShellGuiWebSocketHandler._resolved_commands_lock:
+            ShellGuiWebSocketHandler._resolved_commands[cmd] = resolved
+
+        return resolved
+
     def get_function_arguments(self, func, mod, mod_cmd):
         try:
             # try to use the regular inspection function to get the function
@@ -23,19 +23,242 @@
 from enum import IntEnum
 import ctypes
 import struct
+import zlib
 import gui_plugin.core.Logger as logger
 
 WEBSOCKET_CLOSED_BY_CLIENT = 963
 
 
+# Size of the fragments used when sending a message in several frames
+FRAGMENT_SIZE = 5000
+
+# Trailing bytes of a deflate block flushed with Z_SYNC_FLUSH, these are
+# removed from compressed messages as defined in RFC 7692
+DEFLATE_TAIL = b"\x00\x00\xff\xff"
+
+
 class Error(Exception):
     pass
 
 
+class CloseStatus(IntEnum):
+    NormalClosure = 1000
+    ProtocolError = 1002
+    InvalidData = 1007
+    MessageTooBig = 1009
+
+
+class MessageError(Error):
+    """A received message that can not be processed, the connection must be
+    failed with the given close status"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def unmask(payload, mask_key):
+    """Applies the 4 byte masking key to the given payload
+
+    The payload is XORed as a single big integer against the masking key
+    repeated to the payload length, which keeps the work in C instead of
+    iterating over every byte in Python.
+
+    Args:
+        payload (bytes): The masked (or unmasked) payload
+        mask_key (bytes): The 4 byte masking key
+
+    Returns:
+        The unmasked (or masked) payload as bytes
+    """
+    length = len(payload)
+    if length == 0:
+        return b""
+
+    mask = (mask_key * (length // 4 + 1))[:length]
+
+    return (int.from_bytes(payload, "little") ^
+            int.from_bytes(mask, "little")).to_bytes(length, "little")
+
+
+class PerMessageDeflate:
+    """Implements the permessage-deflate WebSocket extension (RFC 7692)
+
+    An instance holds the negotiated parameters and the compression contexts
+    of a single WebSocket connection. Messages smaller than the configured
+    threshold are sent uncompressed, received messages decompressing to more
+    than max_message_size bytes are rejected.
+
+    zlib does not support a window of 8 bits for raw deflate streams, so the
+    offers limiting the server window to 8 bits are declined.
+    """
+    EXTENSION_NAME = "permessage-deflate"
+    DEFAULT_THRESHOLD = 1024
+    DEFAULT_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, server_no_context_takeover=False,
+                 client_no_context_takeover=False,
+                 server_max_window_bits=15,
+                 client_max_window_bits=None,
+                 threshold=DEFAULT_THRESHOLD,
+                 level=zlib.Z_DEFAULT_COMPRESSION,
+                 max_message_size=DEFAULT_MAX_MESSAGE_SIZE):
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self.server_max_window_bits = server_max_window_bits
+        self.client_max_window_bits = client_max_window_bits
+        self.threshold = threshold
+        self.level = level
+        self.max_message_size = max_message_size
+
+        self._compressor = None
+        self._decompressor = None
+
+    @staticmethod
+    def _parse_offers(header):
+        offers = []
+        for offer in header.split(","):
+            params = [param.strip() for param in offer.split(";")]
+            if params[0] != PerMessageDeflate.EXTENSION_NAME:
+                continue
+
+            values = {}
+            for param in params[1:]:
+                if not param:
+                    continue
+                name, _, value = param.partition("=")
+                values[name.strip()] = value.strip().strip('"') or None
+            offers.append(values)
+
+        return offers
+
+    @staticmethod
+    def _validate_window_bits(value, min_bits=8):
+        window_bits = int(value)
+        if window_bits < min_bits or window_bits > 15:
+            raise ValueError(f"Invalid window bits value: {value}")
+        return window_bits
+
+    @staticmethod
+    def negotiate(header, options=None):
+        """Accepts the first supported permessage-deflate offer
+
+        Args:
+            header (str): The value of the Sec-WebSocket-Extensions header
+                sent by the client
+            options (dict): The compression options configured on the server
+
+        Returns:
+            A PerMessageDeflate instance with the negotiated parameters or
+            None if no offer was acceptable
+        """
+        if not header:
+            return None
+
+        options = options if options else {}
+        server_window = PerMessageDeflate._validate_window_bits(
+            options.get("server_max_window_bits", 15), min_bits=9)
+        client_window = options.get("client_max_window_bits")
+        if client_window is not None:
+            client_window = PerMessageDeflate._validate_window_bits(
+                client_window)
+
+        for offer in PerMessageDeflate._parse_offers(header):
+            try:
+                unknown = set(offer.keys()) - {
+                    "server_no_context_takeover", "client_no_context_takeover",
+                    "server_max_window_bits", "client_max_window_bits"}
+                if unknown:
+                    continue
+
+                window_bits = server_window
+                if "server_max_window_bits" in offer:
+                    window_bits = min(window_bits, PerMessageDeflate._validate_window_bits(
+                        offer["server_max_window_bits"], min_bits=9))
+
+                # The client window can only be limited if the client
+                # announced support for it
+                negotiated_client_window = None
+                if "client_max_window_bits" in offer and client_window is not None:
+                    negotiated_client_window = client_window
+                    if offer["client_max_window_bits"] is not None:
+                        negotiated_client_window = min(client_window, PerMessageDeflate._validate_window_bits(
+                            offer["client_max_window_bits"]))
+            except ValueError:
+                continue
+
+            return PerMessageDeflate(
+                server_no_context_takeover="server_no_context_takeover" in offer or bool(
+                    options.get("server_no_context_takeover", False)),
+                client_no_context_takeover="client_no_context_takeover" in offer or bool(
+                    options.get("client_no_context_takeover", False)),
+                server_max_window_bits=window_bits,
+                client_max_window_bits=negotiated_client_window,
+                threshold=int(options.get(
+                    "threshold", PerMessageDeflate.DEFAULT_THRESHOLD)),
+                level=int(options.get("level", zlib.Z_DEFAULT_COMPRESSION)),
+                max_message_size=int(options.get(
+                    "max_message_size", PerMessageDeflate.DEFAULT_MAX_MESSAGE_SIZE)))
+
+        return None
+
+    def response_header(self):
+        """Returns the value for the Sec-WebSocket-Extensions response header"""
+        params = [PerMessageDeflate.EXTENSION_NAME]
+        if self.server_no_context_takeover:
+            params.append("server_no_context_takeover")
+        if self.client_no_context_takeover:
+            params.append("client_no_context_takeover")
+        if self.server_max_window_bits < 15:
+            params.append(
+                f"server_max_window_bits={self.server_max_window_bits}")
+        if self.client_max_window_bits is not None:
+            params.append(
+                f"client_max_window_bits={self.client_max_window_bits}")
+
+        return "; ".join(params)
+
+    def should_compress(self, length):
+        return length >= self.threshold
+
+    def compress(self, data):
+        if self._compressor is None or self.server_no_context_takeover:
+            self._compressor = zlib.compressobj(
+                self.level, zlib.DEFLATED, -self.server_max_window_bits)
+
+        compressed = self._compressor.compress(data) + \
+            self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        if compressed.endswith(DEFLATE_TAIL):
+            compressed = compressed[:-len(DEFLATE_TAIL)]
+
+        return compressed
+
+    def decompress(self, data):
+        if self._decompressor is None or self.client_no_context_takeover:
+            self._decompressor = zlib.decompressobj(-15)
+
+        try:
+            message = self._decompressor.decompress(
+                bytes(data) + DEFLATE_TAIL, self.max_message_size)
+        except zlib.error as e:
+            raise MessageError(f"Failed to decompress the message: {e}",
+                               CloseStatus.InvalidData)
+
+        # The input left means the output was cut at the size limit
+        if self._decompressor.unconsumed_tail:
+            raise MessageError(
+                f"The message exceeds the maximum size of {self.max_message_size} bytes",
+                CloseStatus.MessageTooBig)
+
+        return message
+
+
 class Word0Bits(ctypes.BigEndianStructure):
     _fields_ = [
         ("final_fragment", ctypes.c_uint16, 1),
-        ("reserved", ctypes.c_uint16, 3),
+        ("compressed", ctypes.c_uint16, 1),
+        ("reserved", ctypes.c_uint16, 2),
         ("opcode", ctypes.c_uint16, 4),
         ("masked", ctypes.c_uint16, 1),
         ("payload", ctypes.c_uint16, 7)
@@ -61,6 +284,7 @@ class Frame:
         self.word0 = Word0()
         self.mask_key = ""
         self.message = ""
+        self.payload = b""
         self.length = 0
 
     @property
@@ -79,6 +303,10 @@ class Frame:
     def is_control_message(self):
         return self.opcode in (Operation.Close, Operation.Ping, Operation.Pong)
 
+    @property
+    def is_compressed(self):
+        return bool(self.word0.bits.compressed)
+
     def __str__(self):
         return f"<WebSocket.Frame>\n\tOpcode: {Operation(self.opcode)}\n\tFinal: {self.is_final_fragment}\n\tlength: {self.length}\n\tmessage: {self.message}"
 
@@ -89,6 +317,38 @@ class FrameReceiver(Frame):
         if buffer:
             self.receive(buffer)
 
+    @staticmethod
+    def frame_size(data):
+        """Returns the size in bytes of the frame at the beginning of data
+
+        Args:
+            data (bytes): The data received so far
+
+        Returns:
+            The size of the frame or None if the data does not contain the
+            complete frame header yet
+        """
+        if len(data) < 2:
+            return None
+
+        length = data[1] & 0x7F
+        header_size = 2
+        if length == 126:
+            header_size = 4
+            if len(data) < header_size:
+                return None
+            length = struct.unpack_from(">H", data, 2)[0]
+        elif length == 127:
+            header_size = 10
+            if len(data) < header_size:
+                return None
+            length = struct.unpack_from(">q", data, 2)[0]
+            if length < 0:
+                raise Error("Invalid payload length")
+
+        # incomming frames must always be masked, the mask key is always read
+        return header_size + 4 + length
+
     def receive(self, buffer):
         try:
             self.word0.bytes = struct.unpack("<H", buffer.read(2))[0]
@@ -116,33 +376,32 @@ class FrameReceiver(Frame):
                 raise Error("Invalid payload for control frame")
             if not self.word0.bits.final_fragment:
                 raise Error("Control frames must have the final bit set")
+            if self.is_compressed:
+                raise Error("Control frames can not be compressed")
 
         if self.length < 0:
             raise Error("Invalid payload length")
 
         # decode the message using the masking key
+        self.payload = unmask(self.encoded_message, self.mask_key)
         self.message = ""
 
         if self.is_control_message:
-            for index in range(self.length):
-                self.message += chr(self.encoded_message[index]
-                                    ^ self.mask_key[index % 4])
-        else:
-            # Unmasks the received buffer
-            unmasked = bytearray(b'')
-            for index in range(self.length):
-                unmasked.append(
-                    self.encoded_message[index] ^ self.mask_key[index % 4])
-
-            self.message = unmasked.decode("utf-8")
-
-        if self.word0.bits.opcode == Operation.Close:
-            if len(self.message) > 0:
-                self.error = struct.unpack(">H", self.message.encode()[:2])[0]
-                self.message = self.message[2:]
-                if self.error != WEBSOCKET_CLOSED_BY_CLIENT:
-                    logger.error(
-                        f"WebSocket closed by peer: Error[{self.error}]: {self.message}")
+            self.message = self.payload.decode("latin-1")
+
+            if self.word0.bits.opcode == Operation.Close:
+                if len(self.payload) > 0:
+                    self.error = struct.unpack(">H", self.payload[:2])[0]
+                    self.message = self.payload[2:].decode(
+                        "utf-8", errors="replace")
+                    if self.error != WEBSOCKET_CLOSED_BY_CLIENT:
+                        logger.error(
+                            f"WebSocket closed by peer: Error[{self.error}]: {self.message}")
+        elif self.is_initial_fragment and self.is_final_fragment and not self.is_compressed:
+            # Unfragmented messages are decoded right away, fragments are
+            # decoded once all of them have been assembled in the Packet, as
+            # a UTF-8 sequence may be split between two fragments
+            self.message = self.payload.decode("utf-8")
 
 
 class FrameSender(Frame):
@@ -151,8 +410,11 @@ class FrameSender(Frame):
         self.word0.bits.final_fragment = final
         self.word0.bits.opcode = opcode
         self.message = message
+        self.payload = message.encode() if isinstance(
+            message, str) else bytes(message)
 
-        length = len(self.message)
+        length = len(self.payload)
+        self.length = length
         if length <= 125:
             self.word0.bits.payload = length
         elif length >= 126 and length <= 65535:
@@ -167,20 +429,16 @@ class FrameSender(Frame):
         # put everything in a buffer, so that we can debug it.
         # if we keep sending small pieces, the frontend will perceive it
         # as protocol errors.
-        frame_data = bytes()
-        frame_data += struct.pack("<H", self.word0.bytes)
-        length = len(self.message)
+        header = struct.pack("<H", self.word0.bytes)
+        length = len(self.payload)
 
         try:
             if self.word0.bits.payload == 126:
-                frame_data += struct.pack(">H", length)
+                header += struct.pack(">H", length)
             elif self.word0.bits.payload == 127:
-                frame_data += struct.pack(">Q", length)
+                header += struct.pack(">Q", length)
 
-            if length > 0:
-                frame_data += self.message.encode()
-
-            buffer.send(frame_data)
+            buffer.send(header + self.payload if length > 0 else header)
         except Exception as err:  # pragma: no cover
             if self.opcode == Operation.Close:
                 return
@@ -189,20 +447,41 @@ class FrameSender(Frame):
 
 
 class Packet:
-    def __init__(self, message=""):
+    def __init__(self, message="", deflate=None):
         self.frames = []
+        self._length = 0
+        self._message = None
+        self._deflate = deflate
+
+        # Binary messages are given as bytes, text messages as str
+        binary = isinstance(message, (bytes, bytearray, memoryview))
+        self._opcode = Operation.BinaryFrame if binary else Operation.TextFrame
+
+        if deflate is not None and len(message) > 0:
+            encoded = message if binary else message.encode()
+            if deflate.should_compress(len(encoded)):
+                self.append_compressed_message(deflate.compress(encoded))
+                if not binary:
+                    self._message = message
+                return
+
+        if binary:
+            message = memoryview(message)
 
         # We can split the message
         # in several frames to optimize the communication.
-        while len(message) > 0:
-            fragment = message[:5000]
-            message = message[5000:]
-            self.append_text_message(fragment)
+        for offset in range(0, len(message), FRAGMENT_SIZE):
+            self.append_text_message(message[offset:offset + FRAGMENT_SIZE])
 
     def append(self, frame):
         # Validate type using the opcode
         self._validate_frame(frame)
+        self._add_frame(frame)
+
+    def _add_frame(self, frame):
         self.frames.append(frame)
+        self._length += len(frame.payload)
+        self._message = None
 
     def _validate_frame(self, frame):
         if len(self.frames) == 0:
@@ -214,18 +493,59 @@ class Packet:
 
     def append_text_message(self, message):
         if len(self.frames) == 0:
-            self.frames.append(FrameSender(Operation.TextFrame, message))
+            self._add_frame(FrameSender(self._opcode, message))
         else:
             self.frames[len(self.frames) - 1].word0.bits.final_fragment = False
-            self.frames.append(FrameSender(
+            self._add_frame(FrameSender(
                 Operation.ContinuationFrame, message))
 
+    def append_compressed_message(self, payload):
+        # The compressed flag is only set on the first frame of the message
+        view = memoryview(payload)
+        for offset in range(0, len(payload), FRAGMENT_SIZE):
+            self.append_text_message(bytes(view[offset:offset + FRAGMENT_SIZE]))
+        self.frames[0].word0.bits.compressed = True
+
     @property
-    def message(self):
-        result = ""
+    def is_compressed(self):
+        return len(self.frames) > 0 and self.frames[0].is_compressed
+
+    @property
+    def is_binary(self):
+        return len(self.frames) > 0 and self.frames[0].opcode == Operation.BinaryFrame
+
+    @property
+    def payload(self):
+        """The payload of all the frames assembled in a single buffer"""
+        if len(self.frames) == 1:
+            return self.frames[0].payload
+
+        buffer = bytearray(self._length)
+        view = memoryview(buffer)
+        offset = 0
         for frame in self.frames:
-            result += frame.message
-        return result
+            size = len(frame.payload)
+            view[offset:offset + size] = frame.payload
+            offset += size
+
+        return buffer
+
+    @property
+    def message(self):
+        if self._message is None:
+            payload = self.payload
+            if self.is_compressed:
+                if self._deflate is None:
+                    raise MessageError(
+                        "Received a compressed message but compression was not negotiated",
+                        CloseStatus.ProtocolError)
+                payload = self._deflate.decompress(payload)
+            try:
+                self._message = payload.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise MessageError(f"Invalid UTF-8 message: {e}",
+                                   CloseStatus.InvalidData)
+        return self._message
 
     def done(self):
         return self.frames[len(self.frames) - 1].is_final_fragment
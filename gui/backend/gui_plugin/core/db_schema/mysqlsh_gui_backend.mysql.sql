@@ -90,6 +90,40 @@ CREATE TABLE IF NOT EXISTS `db_connection_has_tag` (
 ENGINE = InnoDB;
 
 
+-- -----------------------------------------------------
+-- Table `db_notebook_history`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `db_notebook_history` ;
+
+CREATE TABLE IF NOT EXISTS `db_notebook_history` (
+  `id` INT NOT NULL,
+  `db_connection_id` INT NOT NULL,
+  `profile_id` INT NOT NULL,
+  `user_group_id` INT NULL,
+  `language_id` VARCHAR(45) NULL,
+  `code` TEXT NULL,
+  `timestamp` DATETIME NULL,
+  PRIMARY KEY (`id`),
+  INDEX `db_notebook_history_profile_idx` (`db_connection_id` ASC, `profile_id` ASC, `timestamp` ASC) VISIBLE,
+  INDEX `db_notebook_history_user_group_idx` (`db_connection_id` ASC, `user_group_id` ASC, `timestamp` ASC) VISIBLE,
+  CONSTRAINT `fk_db_notebook_history_db_connection1`
+    FOREIGN KEY (`db_connection_id`)
+    REFERENCES `db_connection` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_profile1`
+    FOREIGN KEY (`profile_id`)
+    REFERENCES `profile` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_user_group1`
+    FOREIGN KEY (`user_group_id`)
+    REFERENCES `user_group` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION)
+ENGINE = InnoDB;
+
+
 -- -----------------------------------------------------
 -- Table `data`
 -- -----------------------------------------------------
@@ -144,8 +178,11 @@ CREATE TABLE IF NOT EXISTS `data_folder` (
   `id` INT NOT NULL,
   `caption` VARCHAR(80) NULL,
   `parent_folder_id` INT NULL,
+  `root_folder_id` INT NULL,
+  `path` VARCHAR(1024) NULL,
   PRIMARY KEY (`id`),
   INDEX `fk_module_data_folder_module_data_folder1_idx` (`parent_folder_id` ASC) VISIBLE,
+  INDEX `data_folder_root_folder_path_idx` (`root_folder_id` ASC, `path` ASC) VISIBLE,
   CONSTRAINT `fk_module_data_folder_module_data_folder1`
     FOREIGN KEY (`parent_folder_id`)
     REFERENCES `data_folder` (`id`)
@@ -526,6 +563,8 @@ CREATE TABLE IF NOT EXISTS `logs`.`log` (
     ON UPDATE NO ACTION)
 ENGINE = InnoDB;
 
+CREATE INDEX `log_event_time_idx` ON `logs`.`log` (`event_time` ASC) VISIBLE;
+
 
 -- -----------------------------------------------------
 -- Table `message`
@@ -547,12 +586,14 @@ CREATE TABLE IF NOT EXISTS `logs`.`message` (
     ON UPDATE NO ACTION)
 ENGINE = InnoDB;
 
+CREATE INDEX `message_sent_idx` ON `logs`.`message` (`sent` ASC) VISIBLE;
+
 
 -- -----------------------------------------------------
 -- View `schema_version`
 -- -----------------------------------------------------
 DROP VIEW IF EXISTS `schema_version` ;
-CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 18;
+CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 20;
 
 -- -----------------------------------------------------
 -- Data for table `data_category`
@@ -566,7 +607,6 @@ INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (5, 2, '
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (6, 2, 'JavaScript Script');
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (7, 2, 'TypeScript Script');
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (8, 2, 'SQLite Script');
-INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (9, 1, 'DB Notebook Code History');
 
 COMMIT;
 
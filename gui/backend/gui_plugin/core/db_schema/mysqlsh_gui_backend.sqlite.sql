@@ -92,6 +92,41 @@ CREATE INDEX `fk_db_connection_has_tag_db_connection_idx` ON `db_connection_has_
 
 
 
+-- -----------------------------------------------------
+-- Table `db_notebook_history`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `db_notebook_history` ;
+
+CREATE TABLE IF NOT EXISTS `db_notebook_history` (
+  `id` INTEGER NOT NULL,
+  `db_connection_id` INTEGER NOT NULL,
+  `profile_id` INTEGER NOT NULL,
+  `user_group_id` INTEGER NULL,
+  `language_id` VARCHAR(45) NULL,
+  `code` TEXT NULL,
+  `timestamp` DATETIME NULL,
+  PRIMARY KEY (`id`),
+  CONSTRAINT `fk_db_notebook_history_db_connection1`
+    FOREIGN KEY (`db_connection_id`)
+    REFERENCES `db_connection` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_profile1`
+    FOREIGN KEY (`profile_id`)
+    REFERENCES `profile` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_user_group1`
+    FOREIGN KEY (`user_group_id`)
+    REFERENCES `user_group` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION);
+
+CREATE INDEX `db_notebook_history_profile_idx` ON `db_notebook_history` (`db_connection_id` ASC, `profile_id` ASC, `timestamp` ASC);
+
+CREATE INDEX `db_notebook_history_user_group_idx` ON `db_notebook_history` (`db_connection_id` ASC, `user_group_id` ASC, `timestamp` ASC);
+
+
 -- -----------------------------------------------------
 -- Table `data`
 -- -----------------------------------------------------
@@ -148,6 +183,8 @@ CREATE TABLE IF NOT EXISTS `data_folder` (
   `id` INTEGER NOT NULL,
   `caption` VARCHAR(80) NULL,
   `parent_folder_id` INTEGER NULL,
+  `root_folder_id` INTEGER NULL,
+  `path` VARCHAR(1024) NULL,
   PRIMARY KEY (`id`),
   CONSTRAINT `fk_module_data_folder_module_data_folder1`
     FOREIGN KEY (`parent_folder_id`)
@@ -157,6 +194,8 @@ CREATE TABLE IF NOT EXISTS `data_folder` (
 
 CREATE INDEX `fk_module_data_folder_module_data_folder1_idx` ON `data_folder` (`parent_folder_id` ASC);
 
+CREATE INDEX `data_folder_root_folder_path_idx` ON `data_folder` (`root_folder_id` ASC, `path` ASC);
+
 
 
 
@@ -577,6 +616,8 @@ CREATE TABLE IF NOT EXISTS `logs`.`log` (
     ON DELETE NO ACTION
     ON UPDATE NO ACTION);
 
+CREATE INDEX `logs`.`log_event_time_idx` ON `log` (`event_time` ASC);
+
 
 -- -----------------------------------------------------
 -- Table `message`
@@ -597,12 +638,14 @@ CREATE TABLE IF NOT EXISTS `logs`.`message` (
     ON DELETE NO ACTION
     ON UPDATE NO ACTION);
 
+CREATE INDEX `logs`.`message_sent_idx` ON `message` (`sent` ASC);
+
 
 -- -----------------------------------------------------
 -- View `schema_version`
 -- -----------------------------------------------------
 DROP VIEW IF EXISTS `schema_version` ;
-CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 18;
+CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 20;
 
 -- -----------------------------------------------------
 -- Data for table `data_category`
@@ -616,7 +659,6 @@ INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (5, 2, '
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (6, 2, 'JavaScript Script');
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (7, 2, 'TypeScript Script');
 INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (8, 2, 'SQLite Script');
-INSERT INTO `data_category` (`id`, `parent_category_id`, `name`) VALUES (9, 1, 'DB Notebook Code History');
 
 COMMIT;
 
@@ -0,0 +1,123 @@
+/*
+ * Copyright (c) 2024, Oracle and/or its affiliates.
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License, version 2.0,
+ * as published by the Free Software Foundation.
+ *
+ * This program is designed to work with certain software (including
+ * but not limited to OpenSSL) that is licensed under separate terms, as
+ * designated in a particular file or component or in included license
+ * documentation.  The authors of MySQL hereby grant you an additional
+ * permission to link the program and your derivative works with the
+ * separately licensed software that they have either included with
+ * the program or referenced in the documentation.
+ *
+ * This program is distributed in the hope that it will be useful,  but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+ * the GNU General Public License, version 2.0, for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software Foundation, Inc.,
+ * 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+ */
+
+
+PRAGMA foreign_keys = OFF;
+
+-- -----------------------------------------------------
+-- Table `db_notebook_history`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `db_notebook_history` (
+  `id` INTEGER NOT NULL,
+  `db_connection_id` INTEGER NOT NULL,
+  `profile_id` INTEGER NOT NULL,
+  `user_group_id` INTEGER NULL,
+  `language_id` VARCHAR(45) NULL,
+  `code` TEXT NULL,
+  `timestamp` DATETIME NULL,
+  PRIMARY KEY (`id`),
+  CONSTRAINT `fk_db_notebook_history_db_connection1`
+    FOREIGN KEY (`db_connection_id`)
+    REFERENCES `db_connection` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_profile1`
+    FOREIGN KEY (`profile_id`)
+    REFERENCES `profile` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_db_notebook_history_user_group1`
+    FOREIGN KEY (`user_group_id`)
+    REFERENCES `user_group` (`id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION);
+
+CREATE INDEX `db_notebook_history_profile_idx` ON `db_notebook_history` (`db_connection_id` ASC, `profile_id` ASC, `timestamp` ASC);
+
+CREATE INDEX `db_notebook_history_user_group_idx` ON `db_notebook_history` (`db_connection_id` ASC, `user_group_id` ASC, `timestamp` ASC);
+
+-- Move the history entries that were stored as module data into the new table.
+-- Every entry was linked to a folder of the profile tree and to a folder of
+-- the personal user group tree, both named db_notebook_code_history_<id>.
+INSERT INTO `db_notebook_history` (`db_connection_id`, `profile_id`,
+    `user_group_id`, `language_id`, `code`, `timestamp`)
+  SELECT CAST(SUBSTR(pf.caption, 26) AS INTEGER), pt.profile_id,
+      (SELECT gt.user_group_id
+        FROM data_folder_has_data gfd
+          JOIN data_folder gf ON gf.id = gfd.data_folder_id
+          JOIN data_user_group_tree gt ON gt.root_folder_id = gf.parent_folder_id
+            AND gt.tree_identifier = 'DBNotebookCodeHistoryTree'
+        WHERE gfd.data_id = d.id
+        LIMIT 1),
+      d.caption, d.content, d.last_update
+    FROM data d
+      JOIN data_category c ON c.id = d.data_category_id
+        AND c.name = 'DB Notebook Code History'
+      JOIN data_folder_has_data pfd ON pfd.data_id = d.id
+      JOIN data_folder pf ON pf.id = pfd.data_folder_id
+        AND pf.caption LIKE 'db_notebook_code_history_%'
+      JOIN data_profile_tree pt ON pt.root_folder_id = pf.parent_folder_id
+        AND pt.tree_identifier = 'DBNotebookCodeHistoryTree'
+    ORDER BY d.last_update, d.id;
+
+DELETE FROM `data_folder_has_data` WHERE `data_id` IN (
+  SELECT d.id FROM data d
+    JOIN data_category c ON c.id = d.data_category_id
+  WHERE c.name = 'DB Notebook Code History');
+
+DELETE FROM `data` WHERE `data_category_id` IN (
+  SELECT id FROM data_category WHERE name = 'DB Notebook Code History');
+
+-- Remove the history folders, the root folders and the trees they were in
+DELETE FROM `data_folder` WHERE `parent_folder_id` IN (
+  SELECT root_folder_id FROM data_profile_tree
+    WHERE tree_identifier = 'DBNotebookCodeHistoryTree'
+  UNION
+  SELECT root_folder_id FROM data_user_group_tree
+    WHERE tree_identifier = 'DBNotebookCodeHistoryTree');
+
+DELETE FROM `data_folder` WHERE `id` IN (
+  SELECT root_folder_id FROM data_profile_tree
+    WHERE tree_identifier = 'DBNotebookCodeHistoryTree'
+  UNION
+  SELECT root_folder_id FROM data_user_group_tree
+    WHERE tree_identifier = 'DBNotebookCodeHistoryTree');
+
+DELETE FROM `data_profile_tree`
+  WHERE `tree_identifier` = 'DBNotebookCodeHistoryTree';
+
+DELETE FROM `data_user_group_tree`
+  WHERE `tree_identifier` = 'DBNotebookCodeHistoryTree';
+
+DELETE FROM `data_category` WHERE `name` = 'DB Notebook Code History';
+
+-- -----------------------------------------------------
+-- View `schema_version`
+-- -----------------------------------------------------
+DROP VIEW IF EXISTS `schema_version` ;
+CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 19;
+
+
+PRAGMA foreign_keys = ON;
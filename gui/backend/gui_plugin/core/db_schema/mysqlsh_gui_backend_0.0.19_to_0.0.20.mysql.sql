@@ -0,0 +1,63 @@
+/*
+ * Copyright (c) 2024, Oracle and/or its affiliates.
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License, version 2.0,
+ * as published by the Free Software Foundation.
+ *
+ * This program is designed to work with certain software (including
+ * but not limited to OpenSSL) that is licensed under separate terms, as
+ * designated in a particular file or component or in included license
+ * documentation.  The authors of MySQL hereby grant you an additional
+ * permission to link the program and your derivative works with the
+ * separately licensed software that they have either included with
+ * the program or referenced in the documentation.
+ *
+ * This program is distributed in the hope that it will be useful,  but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+ * the GNU General Public License, version 2.0, for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software Foundation, Inc.,
+ * 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+ */
+
+SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0;
+SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0;
+SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+
+-- -----------------------------------------------------
+-- Table `data_folder`
+-- -----------------------------------------------------
+ALTER TABLE `data_folder`
+ADD COLUMN `root_folder_id` INT NULL,
+ADD COLUMN `path` VARCHAR(1024) NULL;
+
+-- Store the root folder and the path of every existing folder
+UPDATE `data_folder` df
+  JOIN (
+    WITH RECURSIVE
+      tree(id, root_folder_id, path) AS (
+        SELECT id, id, CAST('' AS CHAR(1024)) FROM data_folder
+          WHERE parent_folder_id IS NULL
+        UNION ALL
+        SELECT f.id, t.root_folder_id,
+            IF(t.path = '', f.caption, CONCAT(t.path, '/', f.caption))
+          FROM tree t
+          JOIN data_folder f ON f.parent_folder_id = t.id
+      )
+    SELECT id, root_folder_id, path FROM tree) fp ON fp.id = df.id
+SET df.root_folder_id = fp.root_folder_id, df.path = fp.path;
+
+CREATE INDEX `data_folder_root_folder_path_idx` ON `data_folder` (`root_folder_id` ASC, `path` ASC) VISIBLE;
+
+-- -----------------------------------------------------
+-- View `schema_version`
+-- -----------------------------------------------------
+DROP VIEW IF EXISTS `schema_version` ;
+CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 20;
+
+SET SQL_MODE=@OLD_SQL_MODE;
+SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
+SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
@@ -0,0 +1,70 @@
+/*
+ * Copyright (c) 2024, Oracle and/or its affiliates.
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License, version 2.0,
+ * as published by the Free Software Foundation.
+ *
+ * This program is designed to work with certain software (including
+ * but not limited to OpenSSL) that is licensed under separate terms, as
+ * designated in a particular file or component or in included license
+ * documentation.  The authors of MySQL hereby grant you an additional
+ * permission to link the program and your derivative works with the
+ * separately licensed software that they have either included with
+ * the program or referenced in the documentation.
+ *
+ * This program is distributed in the hope that it will be useful,  but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+ * the GNU General Public License, version 2.0, for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software Foundation, Inc.,
+ * 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+ */
+
+
+PRAGMA foreign_keys = OFF;
+
+-- -----------------------------------------------------
+-- Table `data_folder`
+-- -----------------------------------------------------
+ALTER TABLE `data_folder`
+ADD COLUMN `root_folder_id` INTEGER NULL;
+
+ALTER TABLE `data_folder`
+ADD COLUMN `path` VARCHAR(1024) NULL;
+
+-- Store the root folder and the path of every existing folder
+CREATE TEMP TABLE `folder_path` AS
+  WITH RECURSIVE
+    tree(id, root_folder_id, path) AS (
+      SELECT id, id, '' FROM data_folder
+        WHERE parent_folder_id IS NULL
+      UNION ALL
+      SELECT df.id, t.root_folder_id,
+          CASE WHEN t.path = '' THEN df.caption
+            ELSE t.path || '/' || df.caption END
+        FROM tree t
+        JOIN data_folder df ON df.parent_folder_id = t.id
+    )
+  SELECT id, root_folder_id, path FROM tree;
+
+UPDATE `data_folder` SET
+  `root_folder_id` = (SELECT fp.root_folder_id FROM temp.folder_path fp
+    WHERE fp.id = data_folder.id),
+  `path` = (SELECT fp.path FROM temp.folder_path fp
+    WHERE fp.id = data_folder.id);
+
+DROP TABLE temp.folder_path;
+
+CREATE INDEX `data_folder_root_folder_path_idx` ON `data_folder` (`root_folder_id` ASC, `path` ASC);
+
+-- -----------------------------------------------------
+-- View `schema_version`
+-- -----------------------------------------------------
+DROP VIEW IF EXISTS `schema_version` ;
+CREATE VIEW schema_version (major, minor, patch) AS SELECT 0, 0, 20;
+
+
+PRAGMA foreign_keys = ON;
@@ -0,0 +1,137 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import re
+import threading
+import time
+
+# Statements that change the objects listed in the DB object tree
+_DDL_PATTERN = re.compile(
+    r"^\s*(CREATE|ALTER|DROP|RENAME|TRUNCATE|IMPORT\s+TABLE)\b", re.IGNORECASE)
+
+# Leading comments are skipped when looking for the statement keyword
+_LEADING_COMMENTS_PATTERN = re.compile(
+    r"^(\s*(/\*.*?\*/|--[^\n]*(\n|$)|#[^\n]*(\n|$)))*", re.DOTALL)
+
+
+def is_ddl(sql):
+    """Returns True if the given SQL statement is a DDL statement"""
+    if not isinstance(sql, str):
+        return False
+    sql = _LEADING_COMMENTS_PATTERN.sub("", sql, count=1)
+    return _DDL_PATTERN.match(sql) is not None
+
+
+class MetadataRecorder:
+    """Records the results dispatched by a metadata task to store them in the
+    cache once the task completes"""
+
+    def __init__(self, cache, key, generation):
+        self._cache = cache
+        self._key = key
+        self._generation = generation
+        self._results = []
+        self._failed = False
+
+    def add(self, state, message, data):
+        if state in ["ERROR", "CANCELLED"]:
+            self._failed = True
+        else:
+            self._results.append((state, message, data))
+
+    def finish(self, cancelled=False):
+        if not self._failed and not cancelled:
+            self._cache._store(self._key, self._generation, self._results)
+
+
+class DbMetadataCache:
+    """
+    Cache of the results of the metadata tasks of a connection.
+
+    The entries are keyed by the metadata function and its arguments, i.e.
+    the schema, object type and filter, and expire after ttl seconds. The
+    whole cache is invalidated when a DDL statement is executed on any of the
+    sessions using it.
+    """
+    ttl = 60
+
+    def __init__(self, ttl=None):
+        self._ttl = DbMetadataCache.ttl if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def replay(self, key, task):
+        """Dispatches the cached results of the given key through the task
+
+        Returns:
+            True if the results were cached, False otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return False
+
+            self._stats["hits"] += 1
+
+        for state, message, data in entry[1]:
+            task.dispatch_result(state, message=message, data=data)
+
+        if task.completion_event is not None:
+            task.completion_event.set()
+
+        return True
+
+    def record(self, key, task):
+        """Makes the task record its results to be stored on completion"""
+        with self._lock:
+            task.result_recorder = MetadataRecorder(
+                self, key, self._generation)
+
+    def _store(self, key, generation, results):
+        with self._lock:
+            # Results of tasks started before an invalidation are discarded
+            if generation == self._generation:
+                self._entries[key] = (time.time() + self._ttl, results)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
@@ -449,7 +449,7 @@ class DbMysqlSession(DbSession):
         if self.threaded:
             context = get_context()
             task_id = context.request_id if context else None
-            self.add_task(MySQLOneFieldListTask(
+            self.add_metadata_task(MySQLOneFieldListTask(
                 self, task_id=task_id, sql=sql, params=params))
         else:
             return self.execute(sql, params)
@@ -494,10 +494,11 @@ class DbMysqlSession(DbSession):
         if self.threaded:
             context = get_context()
             task_id = context.request_id if context else None
-            self.add_task(MySQLOneFieldListTask(self,
-                                                task_id=task_id,
-                                                sql=sql,
-                                                params=params))
+            self.add_metadata_task(MySQLOneFieldListTask(self,
+                                                         task_id=task_id,
+                                                         sql=sql,
+                                                         params=params),
+                                   cache_key=("schema_object_names", type, schema_name, filter, routine_type))
         else:
             return self.execute(sql, params)
 
@@ -545,10 +546,11 @@ class DbMysqlSession(DbSession):
         if self.threaded:
             context = get_context()
             task_id = context.request_id if context else None
-            self.add_task(MySQLOneFieldListTask(self,
-                                                task_id=task_id,
-                                                sql=sql,
-                                                params=params))
+            self.add_metadata_task(MySQLOneFieldListTask(self,
+                                                         task_id=task_id,
+                                                         sql=sql,
+                                                         params=params),
+                                   cache_key=("table_object_names", type, schema_name, table_name, filter))
         else:
             return self.execute(sql, params)
 
@@ -583,12 +585,12 @@ class DbMysqlSession(DbSession):
         if self.threaded:
             context = get_context()
             task_id = context.request_id if context else None
-            self.add_task(MySQLBaseObjectTask(self,
-                                              task_id=task_id,
-                                              sql=sql,
-                                              type=type,
-                                              name=name,
-                                              params=params))
+            self.add_metadata_task(MySQLBaseObjectTask(self,
+                                                       task_id=task_id,
+                                                       sql=sql,
+                                                       type=type,
+                                                       name=name,
+                                                       params=params))
         else:
             result = self.execute(sql, params).fetch_one()
             return {"name": result[0]} if result else {}
@@ -610,11 +612,12 @@ class DbMysqlSession(DbSession):
             if self.threaded:
                 context = get_context()
                 task_id = context.request_id if context else None
-                self.add_task(MySQLTableObjectTask(self,
-                                                   task_id=task_id,
-                                                   sql=sql,
-                                                   name=f"{schema_name}.{name}",
-                                                   params=params))
+                self.add_metadata_task(MySQLTableObjectTask(self,
+                                                            task_id=task_id,
+                                                            sql=sql,
+                                                            name=f"{schema_name}.{name}",
+                                                            params=params),
+                                       cache_key=("schema_object", type, schema_name, name))
             else:
                 result = {}
                 resultset = self.execute(sql[0], params).fetch_one()
@@ -642,12 +645,13 @@ class DbMysqlSession(DbSession):
             if self.threaded:
                 context = get_context()
                 task_id = context.request_id if context else None
-                self.add_task(MySQLBaseObjectTask(self,
-                                                  task_id=task_id,
-                                                  sql=sql,
-                                                  type=type,
-                                                  name=f"{schema_name}.{name}",
-                                                  params=params))
+                self.add_metadata_task(MySQLBaseObjectTask(self,
+                                                           task_id=task_id,
+                                                           sql=sql,
+                                                           type=type,
+                                                           name=f"{schema_name}.{name}",
+                                                           params=params),
+                                       cache_key=("schema_object", type, schema_name, name))
             else:
                 result = self.execute(sql, params).fetch_one()
                 if not result:
@@ -698,17 +702,19 @@ class DbMysqlSession(DbSession):
             context = get_context()
             task_id = context.request_id if context else None
             if type == "Column":
-                self.add_task(MySQLColumnObjectTask(self,
-                                                    task_id=task_id,
-                                                    sql=sql,
-                                                    type=type, name=f"{table_name}.{name}",
-                                                    params=params))
+                self.add_metadata_task(MySQLColumnObjectTask(self,
+                                                             task_id=task_id,
+                                                             sql=sql,
+                                                             type=type, name=f"{table_name}.{name}",
+                                                             params=params),
+                                       cache_key=("table_object", type, schema_name, table_name, name))
             else:
-                self.add_task(MySQLBaseObjectTask(self,
-                                                  task_id=task_id,
-                                                  sql=sql,
-                                                  type=type, name=f"{table_name}.{name}",
-                                                  params=params))
+                self.add_metadata_task(MySQLBaseObjectTask(self,
+                                                           task_id=task_id,
+                                                           sql=sql,
+                                                           type=type, name=f"{table_name}.{name}",
+                                                           params=params),
+                                       cache_key=("table_object", type, schema_name, table_name, name))
         else:
             result = self.execute(sql, params).fetch_one()
             if not result:
@@ -737,7 +743,7 @@ class DbMysqlSession(DbSession):
         if self.threaded:
             context = get_context()
             task_id = context.request_id if context else None
-            self.add_task(MySQLColumnsMetadataTask(
+            self.add_metadata_task(MySQLColumnsMetadataTask(
                 self, task_id=task_id, sql=sql, params=params))
         else:
             result = self.execute(sql, params).fetch_all()
@@ -22,7 +22,8 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
 import gui_plugin.core.Error as Error
-from gui_plugin.core.dbms.DbSessionTasks import BaseObjectTask, DbQueryTask
+from gui_plugin.core.dbms.DbSessionTasks import (BaseObjectTask, DbQueryTask,
+                                                 RowPacketSizer)
 from gui_plugin.core.Error import MSGException
 
 
@@ -73,7 +74,7 @@ class MySQLTableObjectTask(BaseObjectTask):
                 self.dispatch_result("ERROR", message=_err_msg)
         else:
             # Process result set
-            buffer_size = self.options.get("row_packet_size", 25)
+            packet_sizer = RowPacketSizer.from_options(self.options)
 
             values = {"columns": []}
 
@@ -84,14 +85,15 @@ class MySQLTableObjectTask(BaseObjectTask):
                         raise MSGException(
                             Error.DB_QUERY_KILLED, "Query killed")
 
-                    # Return chunks of buffer_size a time, if buffer_size is 0
-                    # or -1, do not return chunks but only the full result set
-                    if buffer_size > 0 and len(values["columns"]) >= buffer_size:
+                    # Return chunks of rows as decided by the packet sizer
+                    if packet_sizer.is_full(len(values["columns"])):
                         # Call the callback
                         self.dispatch_result("PENDING", data=values)
                         values = {"columns": []}
+                        packet_sizer.reset()
 
                     values['columns'].append(row[0])
+                    packet_sizer.add((row[0],))
                     self._row_count += 1
             except Exception as e:
                 self.dispatch_result("ERROR", message=str(e))
@@ -171,20 +173,21 @@ class MySQLColumnsMetadataTask(DbQueryTask):
         return result
 
     def process_result(self):
-        buffer_size = self.options.get("row_packet_size", 25)
+        packet_sizer = RowPacketSizer.from_options(self.options)
         columns_details = []
         send_empty = True
         if self.resultset.has_data():
             row = self.resultset.fetch_one()
             while row:
                 columns_details.append(self.format(row))
+                packet_sizer.add(columns_details[-1].values())
                 row = self.resultset.fetch_one()
 
-                # Return chunks of buffer_size a time, if buffer_size is 0
-                # or -1, do not return chunks but only the full result set
-                if not row or (buffer_size > 0 and len(columns_details) >= buffer_size):
+                # Return chunks of rows as decided by the packet sizer
+                if not row or packet_sizer.is_full(len(columns_details)):
                     self.dispatch_result("PENDING", data=columns_details)
                     columns_details = []
+                    packet_sizer.reset()
                     send_empty = False
 
         if send_empty or len(columns_details) > 0:
@@ -192,20 +195,21 @@ class MySQLColumnsMetadataTask(DbQueryTask):
 
 class MySQLOneFieldListTask(DbQueryTask):
     def process_result(self):
-        buffer_size = self.options.get("row_packet_size", 25)
+        packet_sizer = RowPacketSizer.from_options(self.options)
         name_list = []
         send_empty = True
         if self.resultset.has_data():
             row = self.resultset.fetch_one()
             while row:
                 name_list.append(row[0])
+                packet_sizer.add((row[0],))
                 row = self.resultset.fetch_one()
 
-                # Return chunks of buffer_size a time, if buffer_size is 0
-                # or -1, do not return chunks but only the full result set
-                if not row or (buffer_size > 0 and len(name_list) >= buffer_size):
+                # Return chunks of rows as decided by the packet sizer
+                if not row or packet_sizer.is_full(len(name_list)):
                     self.dispatch_result("PENDING", data=name_list)
                     name_list = []
+                    packet_sizer.reset()
                     send_empty = False
 
         if send_empty or len(name_list) > 0:
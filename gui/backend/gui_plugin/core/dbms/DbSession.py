@@ -26,12 +26,13 @@ import enum
 import threading
 import time
 from contextlib import contextmanager
-from queue import Queue
+from queue import Empty, Queue
 
 import gui_plugin.core.Error as Error
 import gui_plugin.core.Logger as logger
 from gui_plugin.core.Context import get_context
-from gui_plugin.core.dbms.DbSessionTasks import DBCloseTask, DbSqlTask
+from gui_plugin.core.dbms.DbSessionTasks import (DBCloseTask, DbFetchMoreTask,
+                                                 DbScriptTask, DbSqlTask)
 from gui_plugin.core.Error import MSGException
 
 
@@ -86,7 +87,9 @@ def lock_usage(lock_mutex, timeout=-1):
 
 
 class DbSession(threading.Thread):
-    _cancel_requests = []
+    # Time in seconds a cancellation is kept for a task that is not yet
+    # executed
+    CANCEL_REQUEST_TTL = 60
 
     def __init__(self, id, threaded, connection_options, data={}, auto_reconnect=ReconnectionMode.NONE, task_state_cb=None):
         super().__init__()
@@ -118,6 +121,20 @@ class DbSession(threading.Thread):
         self._data = {} if data is None else data
         self._task_state_cb = task_state_cb
         self._current_task_id = None
+        self._current_task = None
+
+        # Cancellations of the queued tasks, request_id -> expiration time
+        self._cancel_requests = {}
+        self._cancel_mutex = threading.Lock()
+        self._cancel_requests_purge_time = time.time()
+
+        # Result kept open to fetch its rows page by page, as a
+        # (request_id, DbResultCursor) tuple
+        self._open_result = None
+
+        # Pool of sessions where the metadata tasks are dispatched, if any
+        self.metadata_pool = None
+        self.metadata_cache = None
 
         # Callbacks to keep track of task execution states
         # syntax: callback(task, state)
@@ -290,6 +307,11 @@ class DbSession(threading.Thread):
     def row_to_container(self, row, columns):  # pragma: no cover
         raise NotImplementedError()
 
+    def row_to_values(self, row, columns):
+        # Returns the raw column values, used when the result is sent in the
+        # binary columnar format
+        return tuple(row[index] for index in range(len(columns)))
+
     def info(self):  # pragma: no cover
         raise NotImplementedError()
 
@@ -315,6 +337,9 @@ class DbSession(threading.Thread):
         if new_connection_options is not None:
             self._connection_options = new_connection_options.copy()
 
+        # The result kept open is lost with the connection
+        self._open_result = None
+
         try:
             self._reconnect(False)
         finally:
@@ -323,6 +348,21 @@ class DbSession(threading.Thread):
     def add_task(self, task):
         self._request_queue.put(task)
 
+    def add_metadata_task(self, task, cache_key=None):
+        """Adds a task that only reads metadata, it is executed by the
+        metadata pool if available so it does not wait for the tasks queued
+        on this session.
+
+        If a cache_key is given and the metadata cache holds the results for
+        it, they are sent without executing the task."""
+        if cache_key is not None and self.metadata_cache is not None:
+            if self.metadata_cache.replay(cache_key, task):
+                return
+            self.metadata_cache.record(cache_key, task)
+
+        if self.metadata_pool is None or not self.metadata_pool.submit(task):
+            self.add_task(task)
+
     def execute(self, sql, params=None, result_queue=None, request_id=None,
                 callback=None, options=None):
 
@@ -331,8 +371,10 @@ class DbSession(threading.Thread):
             if request_id is None:
                 request_id = context.request_id if context else None
             self._killed = False
-            self.add_task(DbSqlTask(self, task_id=request_id, sql=sql, params=params,
-                                    result_queue=result_queue, result_callback=callback, options=options))
+            task_class = DbScriptTask if options and options.get(
+                "script_mode") else DbSqlTask
+            self.add_task(task_class(self, task_id=request_id, sql=sql, params=params,
+                                     result_queue=result_queue, result_callback=callback, options=options))
         else:
             return self.execute_thread(sql, params)
 
@@ -428,20 +470,23 @@ class DbSession(threading.Thread):
         self._init_complete.wait()
 
         while self.thread_error is None:
-            task = self._request_queue.get()
+            task = self._get_next_task()
             self._task_mutex.acquire(True)
             self._current_task_id = task.task_id
 
             if isinstance(task, DBCloseTask):
                 break
 
-            if task.task_id in DbSession._cancel_requests:
-                task.cancel()
-                DbSession._cancel_requests.remove(task.task_id)
+            # Executing anything else in the session invalidates the result
+            # kept open
+            if not isinstance(task, DbFetchMoreTask):
+                self.close_open_result()
 
             # Resets the killed flag for the next task
             self._killed = False
 
+            self._set_current_task(task)
+
             with lock_usage(self._mutex, 5):
                 self.notify_task_execution_state(task, "started")
                 task.execute()
@@ -453,10 +498,89 @@ class DbSession(threading.Thread):
                 self._last_insert_id = task.last_insert_id
                 self._rows_affected = task.rows_affected
 
+            self._set_current_task(None)
             self._current_task_id = None
             self._task_mutex.release()
 
         self.terminate_thread()
 
+    def _get_next_task(self):
+        # While a result is kept open, it is closed if no task comes before
+        # its idle timeout
+        while True:
+            open_result = self._open_result
+            if open_result is None:
+                return self._request_queue.get()
+
+            request_id, cursor = open_result
+            try:
+                return self._request_queue.get(
+                    timeout=max(0, cursor.last_access + cursor.idle_timeout - time.time()))
+            except Empty:
+                if cursor.expired:
+                    logger.debug3(
+                        f"Closing the idle result of request {request_id}")
+                    self.close_open_result()
+
+    def set_open_result(self, request_id, cursor):
+        self._open_result = (request_id, cursor)
+
+    def get_open_result(self, request_id):
+        if self._open_result is None or self._open_result[0] != request_id:
+            return None
+
+        return self._open_result[1]
+
+    def close_open_result(self):
+        if self._open_result is not None:
+            self._open_result = None
+            self.close_result()
+
+    def close_result(self):
+        # Releases the result of the last executed statement
+        self.cursor = None
+
+    def fetch_more(self, result_request_id, result_queue=None, callback=None, options=None):
+        context = get_context()
+        self.add_task(DbFetchMoreTask(self, task_id=context.request_id if context else None,
+                                      result_request_id=result_request_id, result_queue=result_queue,
+                                      result_callback=callback, options=options))
+
     def cancel_request(self, request_id):
-        DbSession._cancel_requests.append(request_id)
+        """Cancels the task of the given request.
+
+        If the task is running it is flagged as cancelled, so it stops at the
+        next check, i.e. between packets of result rows. Otherwise the
+        cancellation is kept for the task to be cancelled once it is taken
+        from the queue, for CANCEL_REQUEST_TTL seconds at most.
+        """
+        now = time.time()
+
+        with self._cancel_mutex:
+            task = self._current_task
+            if task is not None and task.task_id == request_id:
+                task.cancel()
+                return
+
+            self._cancel_requests[request_id] = now + DbSession.CANCEL_REQUEST_TTL
+
+            # The cancellations of requests that never came, or that were
+            # already executed, are purged regularly
+            if now - self._cancel_requests_purge_time >= DbSession.CANCEL_REQUEST_TTL:
+                self._cancel_requests_purge_time = now
+                self._cancel_requests = {
+                    id: expiration for id, expiration in self._cancel_requests.items() if expiration > now}
+
+    def _set_current_task(self, task):
+        # The current task is set along with the lookup of its cancellation,
+        # so a cancellation arriving meanwhile is either found here or applied
+        # to the running task
+        with self._cancel_mutex:
+            self._current_task = task
+            if task is None:
+                return
+
+            expiration = self._cancel_requests.pop(task.task_id, None)
+
+        if expiration is not None and expiration > time.time():
+            task.cancel()
@@ -0,0 +1,385 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import json
+import threading
+import time
+
+import gui_plugin.core.Logger as logger
+from gui_plugin.core.dbms.DbMetadataCache import DbMetadataCache
+from gui_plugin.core.dbms.DbSession import DbSessionFactory, ReconnectionMode
+from gui_plugin.core.dbms.DbSessionTasks import DbExecuteTask
+
+
+class PooledSession:
+    """A session of the pool with its usage information"""
+
+    def __init__(self, session):
+        self.session = session
+        self.pending_tasks = 0
+        self.last_used = time.time()
+        self.last_checked = time.time()
+        self.healthy = True
+
+
+class DbSessionPool:
+    """
+    Pool of read only sessions used to execute the metadata tasks of a
+    connection profile.
+
+    The metadata tasks of all the module sessions opened with the same
+    connection profile are dispatched to the pool, so they are executed in
+    parallel instead of waiting for the tasks queued on the service session.
+
+    The pool keeps at least min_size sessions and creates new ones on demand
+    up to max_size. Sessions idle for more than idle_timeout seconds are
+    closed. Every health_check_interval seconds the idle sessions are checked,
+    a lost connection is restored with the session reconnection logic and a
+    session failing the check is removed from the pool.
+
+    Sessions are opened by a background thread, one at a time, so a task is
+    never delayed by a connection being opened: while no session is available
+    submit() returns False and the task is executed by the service session.
+    After a failed connection no session is opened for connect_retry_delay
+    seconds, doubling on each consecutive failure up to
+    max_connect_retry_delay.
+    """
+    __pools = {}
+    __pools_lock = threading.Lock()
+
+    min_size = 0
+    max_size = 3
+    idle_timeout = 300
+    health_check_interval = 60
+    connect_timeout = 30
+    connect_retry_delay = 1
+    max_connect_retry_delay = 60
+
+    @staticmethod
+    def get_key(user_id, db_type, connection_options):
+        return json.dumps([user_id, db_type, connection_options],
+                          sort_keys=True, default=str)
+
+    @staticmethod
+    def acquire(key, db_type, connection_options):
+        """Returns the pool for the given key, creating it if needed
+
+        Every call must be paired with a call to release().
+        """
+        with DbSessionPool.__pools_lock:
+            pool = DbSessionPool.__pools.get(key)
+            if pool is None:
+                pool = DbSessionPool(db_type, connection_options)
+                DbSessionPool.__pools[key] = pool
+            pool._references += 1
+
+        return pool
+
+    @staticmethod
+    def release(key):
+        """Releases a pool returned by acquire(), the pool is closed once it
+        is no longer used"""
+        with DbSessionPool.__pools_lock:
+            pool = DbSessionPool.__pools.get(key)
+            if pool is None:
+                return
+            pool._references -= 1
+            if pool._references > 0:
+                return
+            del DbSessionPool.__pools[key]
+
+        pool.close()
+
+    @staticmethod
+    def configure(min_size=None, max_size=None, idle_timeout=None,
+                  health_check_interval=None):
+        """Configures the pools created from now on
+
+        Args:
+            min_size (int): The number of sessions kept open
+            max_size (int): The maximum number of sessions
+            idle_timeout (float): The time in seconds an idle session is kept
+                open
+            health_check_interval (float): The time in seconds between
+                checks of an idle session
+        """
+        if max_size is not None:
+            DbSessionPool.max_size = max(1, int(max_size))
+        if min_size is not None:
+            DbSessionPool.min_size = max(0, int(min_size))
+        DbSessionPool.min_size = min(DbSessionPool.min_size,
+                                     DbSessionPool.max_size)
+        if idle_timeout is not None:
+            DbSessionPool.idle_timeout = max(0, float(idle_timeout))
+        if health_check_interval is not None:
+            DbSessionPool.health_check_interval = max(
+                0.1, float(health_check_interval))
+
+    def __init__(self, db_type, connection_options):
+        self._db_type = db_type
+        self._connection_options = connection_options.copy()
+        self._min_size = DbSessionPool.min_size
+        self._max_size = DbSessionPool.max_size
+        self._idle_timeout = DbSessionPool.idle_timeout
+        self._health_check_interval = DbSessionPool.health_check_interval
+        self._references = 0
+        self._sessions = []
+        self._session_count = 0
+        self._closed = False
+        self._opening = False
+        self._connect_failures = 0
+        self._next_connect_time = 0
+        self._condition = threading.Condition()
+        # The metadata of the connection cached for all the sessions
+        self.metadata_cache = DbMetadataCache()
+        self._stats = {
+            "submitted_tasks": 0,
+            "created_sessions": 0,
+            "closed_sessions": 0,
+            "failed_sessions": 0,
+            "health_checks": 0,
+        }
+
+        if self._min_size > 0:
+            with self._condition:
+                self._request_session()
+
+        self._maintenance_thread = threading.Thread(
+            target=self._run_maintenance, daemon=True)
+        self._maintenance_thread.start()
+
+    def _create_session(self):
+        self._session_count += 1
+        return DbSessionFactory.create(
+            self._db_type, f"MetadataSession-{self._session_count}", True,
+            self._connection_options, {}, ReconnectionMode.EXTENDED, None,
+            None, None,
+            # Pooled sessions can't prompt the user
+            lambda text, options: (False, ""),
+            lambda *args: None)
+
+    def _request_session(self):
+        """Starts opening sessions in the background, unless they are already
+        being opened, the pool is full or the delay after a failed connection
+        has not elapsed. Must be called holding the condition."""
+        if self._opening or self._closed or len(self._sessions) >= self._max_size or \
+                time.time() < self._next_connect_time:
+            return
+
+        self._opening = True
+        threading.Thread(target=self._open_sessions, daemon=True).start()
+
+    def _open_sessions(self):
+        # Opens one session, or as many as needed to reach min_size
+        while True:
+            pooled = self._add_session()
+
+            with self._condition:
+                if self._closed:
+                    self._opening = False
+                    return
+
+                if pooled is None:
+                    self._connect_failures += 1
+                    self._next_connect_time = time.time() + min(
+                        self.max_connect_retry_delay,
+                        self.connect_retry_delay * 2 ** (self._connect_failures - 1))
+                    self._opening = False
+                    return
+
+                self._connect_failures = 0
+                self._next_connect_time = 0
+                if len(self._sessions) >= min(self._min_size, self._max_size):
+                    self._opening = False
+                    return
+
+    def _add_session(self):
+        """Opens a new session, returns None if the connection fails"""
+        try:
+            session = self._create_session()
+        except Exception as e:
+            logger.error(f"Failed to open a metadata session: {e}")
+            with self._condition:
+                self._stats["failed_sessions"] += 1
+            return None
+
+        # Wait for the connection so the tasks are not lost if it fails
+        session._init_complete.wait(self.connect_timeout)
+        if session.thread_error is not None or not session._init_complete.is_set():
+            logger.error(
+                f"Failed to open a metadata session: {session.thread_error}")
+            with self._condition:
+                self._stats["failed_sessions"] += 1
+            return None
+
+        pooled = PooledSession(session)
+        session.add_task_execution_callback(
+            lambda task, state: self._on_task_state(pooled, task, state))
+
+        with self._condition:
+            closed = self._closed
+            if not closed:
+                self._sessions.append(pooled)
+                self._stats["created_sessions"] += 1
+
+        if closed:
+            session.close()
+            return None
+
+        self._check_session(pooled)
+
+        return pooled
+
+    def _on_task_state(self, pooled, task, state):
+        if state == "finished":
+            with self._condition:
+                pooled.pending_tasks -= 1
+                pooled.last_used = time.time()
+
+    def _check_session(self, pooled):
+        """Queues the health check of the session, it also makes sure the
+        session is read only after a reconnection"""
+        def on_result(state, message, task_id, data):
+            if state == "ERROR":
+                logger.error(f"Metadata session check failed: {message}")
+                pooled.healthy = False
+
+        with self._condition:
+            pooled.pending_tasks += 1
+            pooled.last_checked = time.time()
+            self._stats["health_checks"] += 1
+
+        # The check is not part of any request, so it must not take over the
+        # completion event of the request being processed by this thread
+        pooled.session.add_task(DbExecuteTask(
+            pooled.session, sql="SET SESSION TRANSACTION READ ONLY",
+            result_callback=on_result, skip_completion=True))
+
+    def submit(self, task):
+        """Dispatches the task to a session of the pool
+
+        Returns:
+            False if the task could not be dispatched
+        """
+        with self._condition:
+            if self._closed:
+                return False
+
+            available = [pooled for pooled in self._sessions
+                         if pooled.healthy and pooled.session.is_alive()]
+            selected = min(available, key=lambda pooled: pooled.pending_tasks,
+                           default=None)
+
+            # All the sessions are busy, another one is opened for the next
+            # tasks
+            if selected is None or selected.pending_tasks > 0:
+                self._request_session()
+
+            if selected is None:
+                return False
+
+            self._assign(selected, task)
+
+        return True
+
+    def _assign(self, pooled, task):
+        pooled.pending_tasks += 1
+        pooled.last_used = time.time()
+        self._stats["submitted_tasks"] += 1
+
+        # The task keeps the callback of the session that created it
+        task.session = pooled.session
+        pooled.session.add_task(task)
+
+    def cancel_request(self, request_id):
+        """Cancels the task of the given request on the sessions of the pool"""
+        with self._condition:
+            sessions = [pooled.session for pooled in self._sessions]
+
+        for session in sessions:
+            session.cancel_request(request_id)
+
+    def _run_maintenance(self):
+        while True:
+            with self._condition:
+                self._condition.wait(self._health_check_interval)
+                if self._closed:
+                    return
+
+                now = time.time()
+                to_close = []
+                to_check = []
+                for pooled in self._sessions:
+                    if not pooled.healthy or not pooled.session.is_alive():
+                        to_close.append(pooled)
+                    elif pooled.pending_tasks == 0:
+                        if now - pooled.last_used > self._idle_timeout and \
+                                len(self._sessions) - len(to_close) > self._min_size:
+                            to_close.append(pooled)
+                        elif now - pooled.last_checked > self._health_check_interval:
+                            to_check.append(pooled)
+
+                for pooled in to_close:
+                    self._sessions.remove(pooled)
+
+            for pooled in to_close:
+                self._close_session(pooled)
+
+            for pooled in to_check:
+                self._check_session(pooled)
+
+            with self._condition:
+                if len(self._sessions) < self._min_size:
+                    self._request_session()
+
+    def _close_session(self, pooled):
+        try:
+            pooled.session.close(
+                after_fail=not pooled.session.is_alive())
+        except Exception as e:
+            logger.error(f"Failed to close a metadata session: {e}")
+
+        with self._condition:
+            self._stats["closed_sessions"] += 1
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            sessions = self._sessions
+            self._sessions = []
+            self._condition.notify_all()
+
+        for pooled in sessions:
+            self._close_session(pooled)
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            sessions = self._sessions
+            stats["sessions"] = len(sessions)
+            stats["busy_sessions"] = len(
+                [pooled for pooled in sessions if pooled.pending_tasks > 0])
+            stats["pending_tasks"] = sum(
+                pooled.pending_tasks for pooled in sessions)
+
+        return stats
@@ -28,6 +28,8 @@ import mysqlsh
 import gui_plugin.core.Error as Error
 import gui_plugin.core.Logger as logger
 from gui_plugin.core.BaseTask import BaseTask
+from gui_plugin.core.ColumnarResult import ColumnarRows
+from gui_plugin.core.dbms.DbMetadataCache import is_ddl
 from gui_plugin.core.Error import MSGException
 from gui_plugin.core.Protocols import Response
 
@@ -54,6 +56,64 @@ def check_supported_type(func):
     return wrapper
 
 
+class RowPacketSizer:
+    """
+    Decides when a packet of result rows is to be sent.
+
+    If a fixed number of rows per packet is given, packets are sent when
+    reaching it. Otherwise packets are sent when their estimated serialized
+    size or the time spent collecting their rows reach the given targets, so
+    small rows are batched in bigger packets while slow results are still
+    streamed regularly.
+    """
+    DEFAULT_TARGET_SIZE = 65536
+    DEFAULT_TARGET_TIME = 50
+
+    def __init__(self, row_limit=None, target_size=DEFAULT_TARGET_SIZE, target_time=DEFAULT_TARGET_TIME):
+        self.row_limit = row_limit
+        self.target_size = target_size
+        self.target_time = target_time / 1000
+        self.reset()
+
+    @staticmethod
+    def from_options(options):
+        return RowPacketSizer(options.get("row_packet_size"),
+                              options.get("packet_target_size",
+                                          RowPacketSizer.DEFAULT_TARGET_SIZE),
+                              options.get("packet_target_time", RowPacketSizer.DEFAULT_TARGET_TIME))
+
+    @property
+    def is_adaptive(self):
+        return self.row_limit is None
+
+    def reset(self):
+        self._size = 0
+        self._start_time = time.time()
+
+    def add(self, row):
+        if not self.is_adaptive:
+            return
+
+        # Rough estimation of the serialized size of the row, counting the
+        # separators and quotes of each value
+        size = 2
+        for value in row:
+            if isinstance(value, (str, bytes, bytearray)):
+                size += len(value) + 3
+            else:
+                size += 8
+        self._size += size
+
+    def is_full(self, row_count):
+        if not self.is_adaptive:
+            # If row_limit is 0 or -1, do not return chunks but only the
+            # full result set
+            return self.row_limit > 0 and row_count >= self.row_limit
+
+        return row_count > 0 and (self._size >= self.target_size or
+                                  time.time() - self._start_time >= self.target_time)
+
+
 class DBCloseTask(BaseTask):
     def __init__(self, task_id=None, result_queue=None, params=None, result_callback=None, options=None):
         super().__init__(task_id=task_id, result_queue=result_queue,
@@ -67,9 +127,11 @@ class DbTask(BaseTask):
     - Tasks where multiple queries are executed
     """
 
-    def __init__(self, session, task_id=None, result_queue=None, params=None, result_callback=None, options=None):
+    def __init__(self, session, task_id=None, result_queue=None, params=None, result_callback=None, options=None,
+                 skip_completion=False):
         super().__init__(task_id, result_queue=result_queue,
-                         result_callback=result_callback if result_callback is not None else session.task_state_cb, options=options)
+                         result_callback=result_callback if result_callback is not None else session.task_state_cb, options=options,
+                         skip_completion=skip_completion)
         self.session = session
         self.params = params
 
@@ -79,6 +141,9 @@ class DbTask(BaseTask):
         self._rows_affected = 0
         self._last_insert_id = None
 
+        # Set by the metadata cache to keep the results of this task
+        self.result_recorder = None
+
         self.dispatch_result("PENDING", message="Execution started...")
 
     def dispatch_result(self, state, message=None, data=None):
@@ -86,8 +151,18 @@ class DbTask(BaseTask):
             self._error = message
             self.session.set_last_error(self._error)
 
+        if self.result_recorder is not None:
+            self.result_recorder.add(state, message, data)
+
         super().dispatch_result(state, message=message, data=data)
 
+    def execute(self):
+        try:
+            super().execute()
+        finally:
+            if self.result_recorder is not None:
+                self.result_recorder.finish(self.cancelled)
+
     @property
     def start_time(self):
         return self._start_time
@@ -119,9 +194,10 @@ class DbQueryTask(DbTask):
     - The processing of the result is specific for each child class
     """
 
-    def __init__(self, session, task_id=None, sql="", params=None, result_queue=None, result_callback=None, options=None):
+    def __init__(self, session, task_id=None, sql="", params=None, result_queue=None, result_callback=None, options=None,
+                 skip_completion=False):
         super().__init__(session, task_id, params=params, result_queue=result_queue,
-                         result_callback=result_callback, options=options)
+                         result_callback=result_callback, options=options, skip_completion=skip_completion)
         if isinstance(sql, str):
             self.sql = [sql]
         else:
@@ -141,6 +217,10 @@ class DbQueryTask(DbTask):
             if self._break:
                 break
 
+            if self.cancelled:
+                self.dispatch_result("CANCELLED")
+                break
+
             while True:
                 try:
                     self._start_time = time.time()
@@ -198,6 +278,17 @@ class DbSqlTask(DbQueryTask):
     this class implements the result handling.
     """
 
+    def do_execute(self):
+        try:
+            super().do_execute()
+        finally:
+            # DDL statements make the cached metadata of the connection stale,
+            # this is done once they are executed so metadata read while they
+            # run is not kept
+            if self.session.metadata_cache is not None and \
+                    any(is_ddl(sql) for sql in self.sql):
+                self.session.metadata_cache.invalidate()
+
     def final_dispatch_result(self, data=None):
         self.session.update_stats(self._execution_time, True)
         self._rows_affected = self.session.rows_affected
@@ -218,60 +309,409 @@ class DbSqlTask(DbQueryTask):
 
     def process_result(self):
         # Process result set
-        buffer_size = self.options.get("row_packet_size", 25)
+        packet_sizer = RowPacketSizer.from_options(self.options)
+
+        # The rows are sent as JSON unless the binary columnar format is
+        # requested
+        result_format = self.options.get("result_format", "json")
+        if result_format not in ["json", "binary"]:
+            self.dispatch_result(
+                "ERROR", message=f"Unsupported result format: {result_format}")
+            return
 
-        columns = None
-        values = {"rows": []}
+        cursor = DbResultCursor(self.session, result_format,
+                                self.options.get("page_size"),
+                                self.options.get("result_idle_timeout",
+                                                 DbResultCursor.DEFAULT_IDLE_TIMEOUT))
 
         try:
-            has_result = True
+            values = cursor.fetch(self, packet_sizer)
+            self._row_count = cursor.row_count
 
-            while has_result:
-                self._row_count = 0
-                columns = None
-                values = {"rows": []}
+            if cursor.cancelled:
+                self._break = True
+                self.session.close_result()
+                self.dispatch_result("CANCELLED")
+                return
 
-                # Loop over all rows
-                for row in self.session.row_generator():
-                    if self.session.is_killed():
-                        raise MSGException(
-                            Error.DB_QUERY_KILLED, "Query killed")
+            # The rest of the result is read on demand by DbFetchMoreTask
+            if cursor.has_more:
+                self.session.set_open_result(self.task_id, cursor)
+                values["has_more"] = True
+
+            # Call the callback
+            self.final_dispatch_result(values)
+        except Exception as e:
+            logger.exception(e)
+            self.dispatch_result("ERROR", message=str(e))
+            return
 
-                    # If this is the first response, add column names
-                    if self._row_count == 0:
-                        columns = self.session.get_column_info(row)
 
-                        values["columns"] = columns
+class DbResultCursor:
+    """
+    Reads the rows of the results of the last statement executed in a session
+    and sends them through the given tasks.
 
-                    # Return chunks of buffer_size a time, if buffer_size is 0
-                    # or -1, do not return chunks but only the full result set
-                    if buffer_size > 0 and len(values["rows"]) >= buffer_size:
-                        # Call the callback
-                        self.dispatch_result("PENDING", data=values)
-                        values = {"rows": []}
+    If a page size is given, only that number of rows are read on each fetch
+    and the result is kept open on the session for the next pages to be
+    fetched on demand.
+    """
+    DEFAULT_IDLE_TIMEOUT = 300
 
-                    # Convert the current row to the proper container type
-                    row_to_append = self.session.row_to_container(
-                        row, columns)
+    def __init__(self, session, result_format="json", page_size=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.session = session
+        self.page_size = page_size if page_size is not None and page_size > 0 else None
+        self.idle_timeout = idle_timeout
 
-                    values['rows'].append(row_to_append)
-                    self._row_count += 1
+        if result_format == "binary":
+            self._rows_container = ColumnarRows
+            self._row_converter = session.row_to_values
+        else:
+            self._rows_container = list
+            self._row_converter = session.row_to_container
 
-                has_result = self.session.next_result()
+        self.columns = None
+        self.row_count = 0
+        self.has_more = True
+        self.cancelled = False
+        self.last_access = time.time()
 
-                if has_result:
-                    # This is end of first result in multiple resultset
-                    # we need to update some partial statistics for result
-                    values["total_row_count"] = self._row_count
-                    values["execution_time"] = self._execution_time
-                    self.dispatch_result("PENDING", data=values)
+        self._rows = session.row_generator()
+        self._next_row = None
+        self._has_next_result = False
 
-            # Call the callback
-            self.final_dispatch_result(values)
+    @property
+    def expired(self):
+        return time.time() - self.last_access >= self.idle_timeout
+
+    def _read_row(self):
+        if self._next_row is not None:
+            row, self._next_row = self._next_row, None
+            return row
+
+        return next(self._rows, None)
+
+    def fetch(self, task, packet_sizer, page_size=None):
+        """Sends the next page of rows through the given task, the last packet
+        is not sent but returned to be completed by the task"""
+        page_size = page_size if page_size is not None and page_size > 0 else self.page_size
+        fetched = 0
+        values = {"rows": self._rows_container()}
+        packet_sizer.reset()
+
+        while True:
+            row = self._read_row()
+            if row is None:
+                has_next_result = self._has_next_result or self.session.next_result()
+                self._has_next_result = False
+                if not has_next_result:
+                    self.has_more = False
+                    break
+
+                # This is end of first result in multiple resultset
+                # we need to update some partial statistics for result
+                values["total_row_count"] = self.row_count
+                values["execution_time"] = task.execution_time
+                task.dispatch_result("PENDING", data=values)
+
+                self.row_count = 0
+                self.columns = None
+                values = {"rows": self._rows_container()}
+                packet_sizer.reset()
+                self._rows = self.session.row_generator()
+                continue
+
+            if self.session.is_killed():
+                raise MSGException(
+                    Error.DB_QUERY_KILLED, "Query killed")
+
+            # If this is the first response, add column names
+            if self.row_count == 0:
+                self.columns = self.session.get_column_info(row)
+
+                values["columns"] = self.columns
+
+            # Return chunks of rows as decided by the packet sizer
+            if packet_sizer.is_full(len(values["rows"])):
+                # Call the callback
+                task.dispatch_result("PENDING", data=values)
+                values = {"rows": self._rows_container()}
+                packet_sizer.reset()
+
+                # A cancelled task stops between packets, the rows not sent
+                # yet are discarded
+                if task.cancelled:
+                    self.cancelled = True
+                    self.has_more = False
+                    break
+
+            # Convert the current row to the proper container type
+            row_to_append = self._row_converter(row, self.columns)
+
+            values['rows'].append(row_to_append)
+            packet_sizer.add(row_to_append)
+            self.row_count += 1
+            fetched += 1
+
+            if page_size is not None and fetched >= page_size:
+                # The page is complete, a row is read ahead to know whether
+                # there are more rows to be fetched
+                self._next_row = next(self._rows, None)
+                if self._next_row is None:
+                    self._has_next_result = self.session.next_result()
+                    self.has_more = self._has_next_result
+                break
+
+        self.last_access = time.time()
+
+        return values
+
+
+class DbFetchMoreTask(DbTask):
+    """
+    Task class to send the next page of a result kept open on the session.
+    """
+
+    def __init__(self, session, task_id=None, result_request_id=None, result_queue=None, result_callback=None, options=None):
+        super().__init__(session, task_id, result_queue=result_queue,
+                         result_callback=result_callback, options=options)
+        self.result_request_id = result_request_id
+
+    def do_execute(self):
+        cursor = self.session.get_open_result(self.result_request_id)
+        if cursor is None:
+            self.dispatch_result(
+                "ERROR", message=f"There is no open result for the request {self.result_request_id}.")
+            return
+
+        self._execution_time = 0
+        self._start_time = time.time()
+
+        try:
+            values = cursor.fetch(self, RowPacketSizer.from_options(self.options),
+                                  self.options.get("page_size"))
         except Exception as e:
             logger.exception(e)
+            self.session.close_open_result()
             self.dispatch_result("ERROR", message=str(e))
             return
+        finally:
+            self._execution_time = time.time() - self._start_time
+
+        if cursor.cancelled:
+            self.session.close_open_result()
+            self.dispatch_result("CANCELLED")
+            return
+
+        if cursor.has_more:
+            values["has_more"] = True
+        else:
+            self.session.close_open_result()
+
+        values["total_row_count"] = cursor.row_count
+        values["execution_time"] = self._execution_time
+
+        self.dispatch_result("PENDING", data=values)
+
+
+def split_sql_script(script, delimiter=";"):
+    """
+    Splits a SQL script into its statements.
+
+    The delimiter is ignored inside quoted strings, identifiers and comments,
+    and it can be changed with DELIMITER lines, like in the MySQL client.
+    Empty statements are skipped.
+    """
+    statements = []
+    start = 0
+    index = 0
+    length = len(script)
+
+    def add_statement(end):
+        statement = script[start:end].strip()
+        if statement:
+            statements.append(statement)
+
+    while index < length:
+        char = script[index]
+
+        if char in "'\"`":
+            # Skip until the closing quote, quotes can be escaped by doubling
+            # them or, except for identifiers, with a backslash
+            index += 1
+            while index < length:
+                if script[index] == "\\" and char != "`":
+                    index += 2
+                    continue
+                if script[index] == char:
+                    if script[index + 1:index + 2] == char:
+                        index += 2
+                        continue
+                    break
+                index += 1
+            index += 1
+        elif script.startswith("/*", index):
+            end = script.find("*/", index + 2)
+            index = length if end == -1 else end + 2
+        elif char == "#" or (script.startswith("--", index) and
+                             script[index + 2:index + 3] in ("", " ", "\t", "\n", "\r")):
+            end = script.find("\n", index)
+            index = length if end == -1 else end + 1
+        elif script.startswith(delimiter, index):
+            add_statement(index)
+            index += len(delimiter)
+            start = index
+        elif (index == 0 or script[index - 1] == "\n") and \
+                script[index:index + 10].upper() == "DELIMITER ":
+            end = script.find("\n", index)
+            end = length if end == -1 else end
+            new_delimiter = script[index + 10:end].strip()
+            if new_delimiter:
+                add_statement(index)
+                delimiter = new_delimiter
+                start = end
+            index = end
+        else:
+            index += 1
+
+    add_statement(length)
+
+    return statements
+
+
+class DbScriptTask(DbQueryTask):
+    """
+    Task class for SQL scripts, the statements are executed one after the
+    other within the task without sending their individual results.
+
+    Instead, a summary of the executed statements is sent periodically while
+    the script runs and once it is finished. Result sets are consumed and only
+    their row count is reported.
+    """
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_PROGRESS_INTERVAL = 1000
+    MAX_REPORTED_ERRORS = 100
+
+    def __init__(self, session, task_id=None, sql="", params=None, result_queue=None, result_callback=None, options=None):
+        if isinstance(sql, str):
+            sql = split_sql_script(sql)
+
+        super().__init__(session, task_id, sql=sql, params=params, result_queue=result_queue,
+                         result_callback=result_callback, options=options)
+
+        self.batch_size = max(1, self.options.get(
+            "script_batch_size", DbScriptTask.DEFAULT_BATCH_SIZE))
+        self.progress_interval = self.options.get(
+            "progress_interval", DbScriptTask.DEFAULT_PROGRESS_INTERVAL) / 1000
+        self.stop_on_error = self.options.get("stop_on_error", True)
+
+        self._summary = {
+            "statement_count": len(self.sql),
+            "executed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "rows_affected": 0,
+            "rows_returned": 0,
+            "errors": [],
+        }
+
+    @property
+    def summary(self):
+        return self._summary
+
+    def do_execute(self):
+        self.session.clear_stats()
+        self._execution_time = 0
+        self._start_time = time.time()
+        last_progress = self._start_time
+
+        try:
+            for batch_start in range(0, len(self.sql), self.batch_size):
+                stopped = not self.execute_batch(
+                    self.sql[batch_start:batch_start + self.batch_size], batch_start)
+
+                if stopped:
+                    break
+
+                # Progress is reported after complete batches only, so the
+                # time is not checked for every statement
+                now = time.time()
+                if now - last_progress >= self.progress_interval and \
+                        self._summary["executed"] < len(self.sql):
+                    last_progress = now
+                    self.dispatch_summary(
+                        f"Executed {self._summary['executed']} of {len(self.sql)} statements")
+            else:
+                self.dispatch_summary("Script executed")
+        finally:
+            self._execution_time = time.time() - self._start_time
+            self._rows_affected = self._summary["rows_affected"]
+            self._last_insert_id = self.session.last_insert_id
+
+            # Same as for DbSqlTask, the cached metadata is stale if the
+            # script contained DDL statements
+            if self.session.metadata_cache is not None and \
+                    any(is_ddl(sql) for sql in self.sql[:self._summary["executed"]]):
+                self.session.metadata_cache.invalidate()
+
+    def execute_batch(self, statements, first_index):
+        """Executes the given statements, returns False if the script is to
+        be stopped."""
+        summary = self._summary
+
+        for index, sql in enumerate(statements, first_index):
+            if self.cancelled:
+                self.dispatch_summary("Script execution cancelled")
+                self.dispatch_result("CANCELLED")
+                return False
+
+            if self.session.is_killed():
+                self.dispatch_summary("Script execution stopped")
+                self.dispatch_result("ERROR", message="Query killed")
+                return False
+
+            summary["executed"] += 1
+            try:
+                self.session.execute_thread(sql, self.params)
+                summary["rows_returned"] += self.consume_results()
+                summary["rows_affected"] += max(0,
+                                                self.session.rows_affected or 0)
+                summary["succeeded"] += 1
+            except Exception as e:
+                logger.exception(e)
+                summary["failed"] += 1
+                if len(summary["errors"]) < DbScriptTask.MAX_REPORTED_ERRORS:
+                    summary["errors"].append(
+                        {"index": index, "message": str(e)})
+
+                if self.stop_on_error:
+                    self.dispatch_summary(
+                        f"Script stopped at statement {index + 1}")
+                    self.dispatch_result("ERROR", message=str(e),
+                                         data=Response.exception(e))
+                    return False
+
+        return True
+
+    def consume_results(self):
+        row_count = 0
+        has_result = True
+
+        while has_result:
+            for _ in self.session.row_generator():
+                row_count += 1
+
+            has_result = self.session.next_result()
+
+        return row_count
+
+    def dispatch_summary(self, message):
+        data = dict(self._summary)
+        data["errors"] = list(self._summary["errors"])
+        data["execution_time"] = time.time() - self._start_time
+
+        self.dispatch_result("PENDING", message=message,
+                             data={"script_summary": data})
 
 
 class BaseObjectTask(DbQueryTask):
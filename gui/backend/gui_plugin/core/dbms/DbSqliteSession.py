@@ -23,7 +23,6 @@
 
 import os.path
 import sqlite3
-import time
 import os
 import stat
 
@@ -51,10 +50,7 @@ def find_schema_name(config):
 
 class SqliteConnection(sqlite3.Connection):
     def cursor(self):
-        self.row_factory = sqlite3.Row
-        c = super(SqliteConnection, self).cursor(DbCursor)
-        self.row_factory = None
-        return c
+        return super(SqliteConnection, self).cursor(DbCursor)
 
     def commit(self):
         super(SqliteConnection, self).commit()
@@ -67,7 +63,12 @@ class SqliteConnection(sqlite3.Connection):
 
 class DbCursor(sqlite3.Cursor):
     _last_error = None
-    last_execution_time = None
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        # Set on the cursor, the connection and its other cursors are not
+        # affected
+        self.row_factory = sqlite3.Row
 
     def set_last_error(self, error):
         self._last_error = error
@@ -77,20 +78,14 @@ class DbCursor(sqlite3.Cursor):
         return self._last_error
 
     def execute(self, sql, params=None):
-        # reset last error and execution time
+        # reset last error
         self.set_last_error(None)
-        self.last_execution_time = None
 
-        start_time = time.time()
-        # call execute of parent class
+        # The execution time is measured by the session running the statement
         if params:
-            res = super(DbCursor, self).execute(sql, params)
-        else:
-            res = super(DbCursor, self).execute(sql)
-        end_time = time.time()
-        # set executing time
-        self.last_execution_time = end_time - start_time
-        return res
+            return super(DbCursor, self).execute(sql, params)
+
+        return super(DbCursor, self).execute(sql)
 
     def fetch_one(self):
         return self.fetchone()
@@ -98,9 +93,6 @@ class DbCursor(sqlite3.Cursor):
     def fetch_all(self):
         return self.fetchall()
 
-    def get_last_execution_time(self):
-        return self.last_execution_time
-
     def get_last_row_id(self):
         # cspell:ignore lastrowid
         return self.lastrowid
@@ -163,7 +155,8 @@ class DbSqliteSession(DbSession):
 
             # open the database connection
             self.conn = sqlite3.connect(self._databases[self._current_schema], timeout=5, factory=SqliteConnection,
-                                        isolation_level=None, check_same_thread=False)
+                                        isolation_level=None, check_same_thread=False,
+                                        cached_statements=self._connection_options.get("cached_statements", 128))
 
             # restrict permissions to the database file
             os.chmod(self._databases[self._current_schema],
@@ -229,6 +222,11 @@ class DbSqliteSession(DbSession):
     def next_result(self):
         return False
 
+    def close_result(self):
+        if self.cursor is not None:
+            self.cursor.close()
+        super().close_result()
+
     def row_generator(self):
         row = self.cursor.fetchone()
 
@@ -26,24 +26,25 @@ import sqlite3
 import gui_plugin.core.Error as Error
 import gui_plugin.core.Logger as logger
 from gui_plugin.core.dbms.DbSessionTasks import (BaseObjectTask, DbQueryTask,
-                                                 DbTask)
+                                                 DbTask, RowPacketSizer)
 from gui_plugin.core.Error import MSGException
 from gui_plugin.core.Protocols import Response
 
 
 class SqliteOneFieldListTask(DbQueryTask):
     def process_result(self):
-        buffer_size = self.options.get("row_packet_size", 25)
+        packet_sizer = RowPacketSizer.from_options(self.options)
         name_list = []
         send_empty = True
         for row in self.resultset:
             name_list.append(row[0])
+            packet_sizer.add((row[0],))
 
-            # Return chunks of buffer_size a time, if buffer_size is 0
-            # or -1, do not return chunks but only the full result set
-            if buffer_size > 0 and len(name_list) >= buffer_size:
+            # Return chunks of rows as decided by the packet sizer
+            if packet_sizer.is_full(len(name_list)):
                 self.dispatch_result("PENDING", data=name_list)
                 name_list = []
+                packet_sizer.reset()
                 send_empty = False
 
         if send_empty or len(name_list) > 0:
@@ -77,7 +78,7 @@ class SqliteTableObjectTask(BaseObjectTask):
                 self.dispatch_result("PENDING", data=self.format(row))
         else:
             # Process result set
-            buffer_size = self.options.get("row_packet_size", 25)
+            packet_sizer = RowPacketSizer.from_options(self.options)
 
             values = {"columns": []}
 
@@ -88,14 +89,15 @@ class SqliteTableObjectTask(BaseObjectTask):
                         raise MSGException(
                             Error.DB_QUERY_KILLED, "Query killed")
 
-                    # Return chunks of buffer_size a time, if buffer_size is 0
-                    # or -1, do not return chunks but only the full result set
-                    if buffer_size > 0 and len(values["columns"]) >= buffer_size:
+                    # Return chunks of rows as decided by the packet sizer
+                    if packet_sizer.is_full(len(values["columns"])):
                         # Call the callback
                         self.dispatch_result("PENDING", data=values)
                         values = {"columns": []}
+                        packet_sizer.reset()
 
                     values['columns'].append(row[0])
+                    packet_sizer.add((row[0],))
                     self._row_count += 1
             except Exception as e:
                 logger.exception(e)
@@ -168,17 +170,18 @@ class SqliteColumnObjectTask(BaseObjectTask):
 
 class SqliteColumnsMetadataTask(DbQueryTask):
     def process_result(self):
-        buffer_size = self.options.get("row_packet_size", 25)
+        packet_sizer = RowPacketSizer.from_options(self.options)
         columns_details = []
         send_empty = True
         for row in self.resultset:
             columns_details.append(self.format(row))
+            packet_sizer.add(columns_details[-1].values())
 
-            # Return chunks of buffer_size a time, if buffer_size is 0
-            # or -1, do not return chunks but only the full result set
-            if buffer_size > 0 and len(columns_details) >= buffer_size:
+            # Return chunks of rows as decided by the packet sizer
+            if packet_sizer.is_full(len(columns_details)):
                 self.dispatch_result("PENDING", data=columns_details)
                 columns_details = []
+                packet_sizer.reset()
                 send_empty = False
 
         if send_empty or len(columns_details) > 0:
@@ -32,6 +32,7 @@ import gui_plugin.core.Logger as logger
 from gui_plugin.core.Context import get_context
 from gui_plugin.core.dbms import DbSessionFactory
 from gui_plugin.core.dbms.DbSession import ReconnectionMode
+from gui_plugin.core.dbms.DbSessionPool import DbSessionPool
 from gui_plugin.core.dbms.DbSqliteSession import find_schema_name
 from gui_plugin.core.Error import MSGException
 from gui_plugin.core.modules.ModuleSession import ModuleSession
@@ -55,6 +56,7 @@ class DbModuleSession(ModuleSession):
         self._db_service_session = None
         self._bastion_options = None
         self._reconnection_mode = reconnection_mode
+        self._metadata_pool_key = None
         self.completion_event = None
 
     def __del__(self):
@@ -76,6 +78,10 @@ class DbModuleSession(ModuleSession):
             self._db_service_session.release()
             self._db_service_session = None
 
+        if self._metadata_pool_key is not None:
+            DbSessionPool.release(self._metadata_pool_key)
+            self._metadata_pool_key = None
+
     def reconnect(self):
         context = get_context()
         self._current_request_id = context.request_id if context else None
@@ -237,7 +243,22 @@ class DbModuleSession(ModuleSession):
 
         return self._prompt_replied, self._prompt_reply
 
+    def _attach_metadata_pool(self, db_session):
+        # The metadata tasks of MySQL sessions are executed by a pool of
+        # sessions shared by the module sessions using the same connection
+        if self._db_type != "MySQL" or self._metadata_pool_key is not None:
+            return
+
+        user_id = self._web_session.session_user_id if self._web_session else None
+        self._metadata_pool_key = DbSessionPool.get_key(
+            user_id, self._db_type, self._connection_options)
+        db_session.metadata_pool = DbSessionPool.acquire(
+            self._metadata_pool_key, self._db_type, self._connection_options)
+        db_session.metadata_cache = db_session.metadata_pool.metadata_cache
+
     def on_connected(self, db_session):
+        self._attach_metadata_pool(db_session)
+
         data = Response.pending("Connection was successfully opened.", {"result": {
             "module_session_id": self._module_session_id,
             "info": db_session.info(),
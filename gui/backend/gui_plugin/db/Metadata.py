@@ -191,6 +191,27 @@ def get_columns_metadata(session, names):
     return session.get_columns_metadata(names)
 
 
+@plugin_function('gui.db.refreshMetadata', shell=True, web=True)
+def refresh_metadata(session):
+    """Flushes the cached metadata of the connection so the database objects
+        are read again from the server.
+
+    Args:
+        session (object): The session used to execute the operation
+
+    Returns:
+        dict: The metadata cache statistics
+    """
+    session = backend.get_db_session(session)
+
+    if session.metadata_cache is None:
+        return {}
+
+    session.metadata_cache.invalidate()
+
+    return session.metadata_cache.get_stats()
+
+
 @plugin_function('gui.db.startSession', shell=False, web=True)
 def start_session(connection, password=None):
     """Starts a DB Session
@@ -196,6 +196,10 @@ def remove_db_connection(profile_id, connection_id, be_session=None):
             db.execute('''DELETE FROM profile_has_db_connection WHERE
                 profile_id=? AND db_connection_id=?''', (profile_id, connection_id))
 
+            # Remove the execution history of the connection for this profile
+            db.execute('''DELETE FROM db_notebook_history WHERE
+                profile_id=? AND db_connection_id=?''', (profile_id, connection_id))
+
             # Check if some other profile is still using the connection
             result = db.select('''SELECT COUNT(*) as cnt FROM profile_has_db_connection
                 WHERE db_connection_id=?''', (connection_id, ))
@@ -25,16 +25,28 @@ from gui_plugin.core.Error import MSGException
 import gui_plugin.core.Error as Error
 
 
-FOLDERS_TREE_SQL = """WITH RECURSIVE
-                      folders(id, caption, parent_folder_id) AS (
-                        SELECT id, caption, parent_folder_id FROM data_folder
-                            WHERE id=?
-                        UNION ALL
-                        SELECT df.id, df.caption, df.parent_folder_id
-                            FROM folders f
-                            JOIN data_folder df ON f.id=df.parent_folder_id
-                      )
-                      SELECT DISTINCT id, caption, parent_folder_id FROM folders"""
+# Every folder stores the id of the root folder of its tree and its path
+# relative to that root folder, e.g. "scripts/server1". The root folder
+# itself has an empty path. The path of a folder is longer than the one of
+# its parent, so the tree is listed parent first.
+FOLDERS_TREE_SQL = """SELECT id, caption, parent_folder_id FROM data_folder
+                      WHERE root_folder_id=?
+                      ORDER BY LENGTH(path), id"""
+
+
+def normalize_folder_path(folder_path):
+    """Returns the folder path in the form stored in data_folder.path
+
+    Args:
+        folder_path (str): The folder path f.e. "/scripts/server1"
+
+    Returns:
+        The path without leading and trailing slashes, f.e. "scripts/server1"
+    """
+    if folder_path is None:
+        return ""
+
+    return folder_path.strip().strip("/")
 
 
 def create_folder(db, caption, parent_folder_id=None):
@@ -52,11 +64,22 @@ def create_folder(db, caption, parent_folder_id=None):
     folder_id = None
     # We have to determine if this is caption or path
     if not caption.startswith("/"):
-        db.execute("""INSERT INTO data_folder (caption, parent_folder_id)
-                    VALUES(?, ?)""", (caption, parent_folder_id,))
+        path = ""
+        if parent_folder_id is not None:
+            parent = db.execute("""SELECT root_folder_id, path FROM data_folder
+                                WHERE id=?""", (parent_folder_id,)).fetch_one()
+            root_folder_id = parent['root_folder_id']
+            path = f"{parent['path']}/{caption}" if parent['path'] else caption
+
+        db.execute("""INSERT INTO data_folder (caption, parent_folder_id,
+                        root_folder_id, path)
+                    VALUES(?, ?, ?, ?)""",
+                   (caption, parent_folder_id, root_folder_id, path))
         folder_id = db.get_last_row_id()
         if root_folder_id is None:
             root_folder_id = folder_id
+            db.execute("""UPDATE data_folder SET root_folder_id=?
+                        WHERE id=?""", (root_folder_id, folder_id))
     else:
         parent_id = parent_folder_id
         for folder in caption.split("/")[1:]:
@@ -99,56 +122,32 @@ def get_user_privileges_for_data(db, data_id, user_id):
 
     privilege_list = []
 
-    ROOT_FOLDERS_SQL = """WITH RECURSIVE
-                            path(id, parent_folder_id) AS (
-                                SELECT id, parent_folder_id FROM data_folder
-                                    WHERE id=?
-                                UNION ALL
-                                SELECT df.id, df.parent_folder_id
-                                    FROM path p
-                                    JOIN data_folder df ON df.id=p.parent_folder_id
-                            )
-                        SELECT DISTINCT id, ?
-                        FROM path
-                            WHERE parent_folder_id is NULL;"""
-
-    db.execute(
-        """CREATE TEMP TABLE root_folders(folder_id INTEGER, read_only TINYINT)""", ())
-    res = db.execute("""SELECT data_folder_id, read_only
-                        FROM data_folder_has_data
-                            WHERE data_id=?;""",
-                     (data_id,)).fetch_all()
-
-    for r in res:
-        sql = f"""INSERT INTO temp.root_folders {ROOT_FOLDERS_SQL}"""
-        db.execute(sql, (r['data_folder_id'], r['read_only']))
-
-    res = db.execute("""SELECT p.id, rf.read_only
-                        FROM profile p
-                        JOIN data_profile_tree dpf ON dpf.profile_id = p.id
-                        JOIN root_folders rf ON rf.folder_id = dpf.root_folder_id
-                            WHERE p.user_id = ?;""",
-                     (user_id,)).fetch_all()
+    res = db.execute("""SELECT p.id, dfhd.read_only
+                        FROM data_folder_has_data dfhd
+                        JOIN data_folder df ON df.id = dfhd.data_folder_id
+                        JOIN data_profile_tree dpf ON dpf.root_folder_id = df.root_folder_id
+                        JOIN profile p ON p.id = dpf.profile_id
+                            WHERE dfhd.data_id = ? AND p.user_id = ?;""",
+                     (data_id, user_id)).fetch_all()
 
     for row in res:
         privilege_list.append({"type": "PROFILE",
                                "id": row['id'],
                                "read_only": row['read_only']})
 
-    res = db.execute("""SELECT ug.id, rf.read_only
-                        FROM user_group_has_user ughu
-                        JOIN user_group ug ON ughu.user_group_id = ug.id
-                        JOIN data_user_group_tree dugt ON dugt.user_group_id = ug.id
-                        JOIN root_folders rf ON rf.folder_id = dugt.root_folder_id
-                            WHERE ughu.user_id = ?;""",
-                     (user_id,)).fetch_all()
+    res = db.execute("""SELECT ug.id, dfhd.read_only
+                        FROM data_folder_has_data dfhd
+                        JOIN data_folder df ON df.id = dfhd.data_folder_id
+                        JOIN data_user_group_tree dugt ON dugt.root_folder_id = df.root_folder_id
+                        JOIN user_group ug ON ug.id = dugt.user_group_id
+                        JOIN user_group_has_user ughu ON ughu.user_group_id = ug.id
+                            WHERE dfhd.data_id = ? AND ughu.user_id = ?;""",
+                     (data_id, user_id)).fetch_all()
     for row in res:
         privilege_list.append({"type": "GROUP",
                                "id": row['id'],
                                "read_only": row['read_only']})
 
-    db.execute("""DROP TABLE temp.root_folders""", ())
-
     if not privilege_list:
         raise MSGException(Error.MODULES_NO_PRIVILEGES_FOUND_FOR_MODULE_DATA,
                            f"User have no privileges for data id '{data_id}'.")
@@ -316,30 +315,11 @@ def get_folder_id(db, root_folder_id, folder_path):
         The id of the leaf folder in folder path
     """
 
-    folder_id = None
-    sql = f"""{FOLDERS_TREE_SQL} WHERE caption=?"""
-    rows = db.execute(
-        sql, (root_folder_id, folder_path.split("/")[-1])).fetch_all()
-    if rows:
-        for row in rows:
-            res = db.execute("""WITH RECURSIVE
-                                path(id, parent_folder_id, caption) AS (
-                                    SELECT id, parent_folder_id, caption FROM data_folder
-                                        WHERE id=?
-                                    UNION ALL
-                                    SELECT df.id, df.parent_folder_id, df.caption
-                                        FROM path p
-                                        JOIN data_folder df ON df.id=p.parent_folder_id
-                                    )
-                                SELECT DISTINCT caption FROM path;""",
-                             (row['id'],)).fetch_all()
-            if res:
-                path = [r['caption'] for r in res][::-1][1:]
-                if path == folder_path.split("/"):
-                    folder_id = row['id']
-                    break
+    res = db.execute("""SELECT id FROM data_folder
+                        WHERE root_folder_id=? AND path=?""",
+                     (root_folder_id, normalize_folder_path(folder_path))).fetch_one()
 
-    return folder_id
+    return res['id'] if res else None
 
 
 def delete_data(db, id, folder_id):
@@ -366,7 +346,7 @@ def delete_data(db, id, folder_id):
                         WHERE data_id=?
                         LIMIT 1;""",
                      (id,)).fetch_all()
-    if res is None:
+    if not res:
         db.execute("""DELETE FROM data
                         WHERE id=?""",
                    (id,))
@@ -23,10 +23,8 @@
 
 import json
 import os
-import os.path
 import signal
 import subprocess
-import sys
 import threading
 from queue import Queue
 
@@ -42,6 +40,8 @@ from gui_plugin.core.Context import get_context
 from gui_plugin.core.dbms.DbMySQLSession import DbMysqlSession
 from gui_plugin.core.Error import MSGException
 from gui_plugin.core.modules import ModuleSession
+from gui_plugin.shell.ShellProcess import (ShellOutputReader, ShellProcessPool,
+                                           start_shell_process)
 
 
 def remove_dict_useless_items(data):
@@ -62,6 +62,10 @@ def remove_dict_useless_items(data):
     return result
 
 
+# Maximum number of consecutive text outputs sent in a single response
+MAX_BATCHED_VALUES = 1000
+
+
 class ShellCommandTask(CommandTask):
     def __init__(self, task_id, command, params=None, result_queue=None, result_callback=None, options=None, skip_completion=False):
         super().__init__(task_id, command, params=params,  result_queue=result_queue,
@@ -114,34 +118,6 @@ class ShellModuleSession(ModuleSession):
         request_id = context.request_id if context else None
         super().__init__()
 
-        EXTENSION_SHELL_USER_CONFIG_FOLDER_BASENAME = "mysqlsh-gui"
-
-        # Symlinks the plugins on the master shell as we want them available
-        # on the Shell Console
-        self._subprocess_home = mysqlsh.plugin_manager.general.get_shell_user_dir(  # pylint: disable=no-member
-            'plugin_data', 'gui_plugin', 'shell_instance_home')
-        if not os.path.exists(self._subprocess_home):
-            os.makedirs(self._subprocess_home)
-
-        subprocess_plugins = os.path.join(self._subprocess_home, 'plugins')
-
-        # Get the actual plugin path that this gui_plugin is in
-        module_file_path = os.path.dirname(__file__)
-        plugins_path = os.path.dirname(os.path.dirname(module_file_path))
-
-        # If this is a development setup using the global shell user config dir,
-        # setup a symlink if it does not exist yet
-        if (not mysqlsh.plugin_manager.general.get_shell_user_dir().endswith(
-            EXTENSION_SHELL_USER_CONFIG_FOLDER_BASENAME)
-                and not os.path.exists(subprocess_plugins)):
-            if os.name == 'nt':
-                p = subprocess.run(
-                    f'mklink /J "{subprocess_plugins}" "{plugins_path}"',
-                    shell=True)
-                p.check_returncode()
-            else:
-                os.symlink(plugins_path, subprocess_plugins)
-
         # Check if MDS options have been specified
         connection_args = []
 
@@ -196,97 +172,30 @@ class ShellModuleSession(ModuleSession):
             '\\system', '\\!'
         ]
 
-        env = os.environ.copy()
-
-        # TODO: Workaround for Bug #33164726
-        env['MYSQLSH_USER_CONFIG_HOME'] = self._subprocess_home + "/"
-        env["MYSQLSH_JSON_SHELL"] = "1"
-
-        if "MYSQLSH_PROMPT_THEME" in env:
-            del env["MYSQLSH_PROMPT_THEME"]
-        if 'ATTACH_DEBUGGER' in env:
-            del env['ATTACH_DEBUGGER']
-        if not 'TERM' in env:
-            env['TERM'] = 'xterm-256color'
-
-        with open(os.path.join(self._subprocess_home, 'options.json'), 'w') as options_file:
-            json.dump({
-                "history.autoSave": "true"
-            }, options_file)
-
-        with open(os.path.join(self._subprocess_home, 'prompt.json'), 'w') as prompt_file:
-            json.dump({
-                "variables": {
-                    "is_production": {
-                        "match": {
-                            "pattern": "*;host;*[*?*]",
-                            "value": ";%env:PRODUCTION_SERVERS;[%host%]"
-                        },
-                        "if_true": "true",
-                        "if_false": "false"
-                    },
-                    "is_ssl": {
-                        "match": {
-                            "pattern": "%ssl%",
-                            "value": "SSL"
-                        },
-                        "if_true": "true",
-                        "if_false": "false"
-                    }
-                },
-                "prompt": {
-                    "text": "\n",
-                    "cont_text": "-> "
-                },
-                "segments": [
-                    {
-                        "text": "{ \"prompt_descriptor\": { "
-                    },
-                    {
-                        "text": "\"user\": \"%user%\", "
-                    },
-                    {
-                        "text": "\"host\": \"%host%\", \"port\": \"%port%\", \"socket\": \"%socket%\", "
-                    },
-                    {
-                        "text": "\"schema\": \"%schema%\", \"mode\": \"%Mode%\", \"session\": \"%session%\","
-                    },
-                    {
-                        "text": "\"ssl\": %is_ssl%, \"is_production\": %is_production%"
-                    },
-                    {
-                        "text": " } }"
-                    }
-                ]
-            },
-                prompt_file,
-                indent=4)
-
-        executable = sys.executable
-        if 'executable' in dir(mysqlsh):
-            executable = mysqlsh.executable
-
-        exec_name = executable if executable.endswith(
-            "mysqlsh") or executable.endswith("mysqlsh.exe") else "mysqlsh"
-
-        # Temporarily passing --no-defaults until it is a configurable option in FE and is received as parameter in the BE
-        popen_args = ["--no-defaults", "--interactive=full", "--passwords-from-stdin",
-                      "--py", "--json=raw", "--quiet-start=2", "--column-type-info"]
-
-        # Adds the connection data to the call arguments
-        if len(connection_args) > 0:
-            popen_args = popen_args + connection_args
-
-        # Adds the shell command args to the call arguments
-        if shell_args is not None:
-            popen_args = popen_args + shell_args
-
-        popen_args.insert(0, exec_name)
-
-        self._shell = subprocess.Popen(popen_args,
-                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                       encoding='utf-8', env=env, text=True,
-                                       creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0)
+        # Interactive sessions use a shell process started in advance by the
+        # pool if available, SSH tunnels can only be set on the command line
+        pooled = None
+        if shell_args is None and '--ssh' not in connection_args:
+            pooled = ShellProcessPool.get_instance().claim()
+
+        if pooled is None:
+            self._shell = start_shell_process(connection_args, shell_args)
+            self._reader = ShellOutputReader(self._shell.stdout)
+        else:
+            self._shell = pooled.process
+            self._reader = pooled.reader
+
+            if len(connection_args) > 0:
+                # The initialization completes once the shell is connected
+                self._pending_request.command = {
+                    "execute": f"\\connect {connection_args[-1]}"}
+                self._shell.stdin.write(json.dumps(
+                    self._pending_request.command) + "\n")
+                self._shell.stdin.flush()
+            else:
+                prompt = remove_dict_useless_items(pooled.prompt)
+                self._complete_initialization(prompt)
+                self._last_prompt = prompt
 
         self._request_queue: "Queue[ShellCommandTask]" = Queue()
 
@@ -348,113 +257,132 @@ class ShellModuleSession(ModuleSession):
             task_id, command, result_callback=callback, options=options))
 
     def handle_shell_output(self):
-        # Read characters from the shell stdout and build responses
+        # Read the shell stdout in chunks and build responses
         # to deliver to the handle_frontend_command method
-        reply_line = ""
         error_buffer = ""
+        # Consecutive text outputs are sent to the frontend in one response
+        value_buffer = []
         while not self._shell_exited:
-            reply_json = None
-            char = self._shell.stdout.read(1)
+            lines = self._reader.read_lines()
 
-            if len(char) == 0:
+            if lines is None:
                 break
 
-            if not char == '\n':
-                reply_line += char
-                continue
-            # when running on windows, remove the \r (from \r\n sequence)
-            if reply_line.endswith('\r'):
-                reply_line = reply_line[:-1]
-
-            if reply_line.startswith("["):
-                reply_line = f"{{ \"rows\": {reply_line} }}"
-
-            if reply_line.startswith("{"):
-                reply_json = json.loads(reply_line)
-
-                # While in python mode, the python engine produces errors by
-                # calling the print callback lots of times, to avoid sending a
-                # lot of replies to the frontend we will cache consecutive errors
-                # and send them in one call to the frontend as soon as a non
-                # error response is received from the shell
-                if 'error' in reply_json and isinstance(reply_json['error'], str):
-                    error_buffer += reply_json["error"]
-                else:
-                    if len(error_buffer) > 0:
-                        self._pending_request.send_output(
-                            {"error": error_buffer})
-                        error_buffer = ""
-
-                    if 'prompt_descriptor' in reply_json:
-                        # remove empty strings
-                        reply_json = remove_dict_useless_items(reply_json)
-
-                        # command complete
-                        if not self._initialize_complete.is_set():
-                            data = {"last_prompt": self._last_prompt,
-                                    "module_session_id": self.module_session_id}
-                            if self._last_prompt != reply_json:
-                                data.update(reply_json)
-                            self._pending_request.complete(message="New Shell Interactive session created successfully.",
-                                                           data=data)
-                            self._initialize_complete.set()
-                        else:
-                            self._pending_request.complete(
-                                data=None if self._last_prompt == reply_json else reply_json)
-                            self._command_complete.set()
-                        self._last_prompt = reply_json
-                    elif 'prompt' in reply_json:
-                        # request for a client prompt
-                        prompt_event = threading.Event()
-
-                        if 'type' in reply_json and reply_json['type'] == 'password':
-                            logger.add_filter({
-                                "type": "key",
-                                "key": "reply",
-                                "expire": Filtering.FilterExpire.OnUse
-                            })
-
-                        reply_json.update(
-                            {"module_session_id": self.module_session_id})
-                        self.send_prompt_response(
-                            self._pending_request.task_id, reply_json, lambda: prompt_event.set())
-
-                        # Locks until the prompt is handled
-                        prompt_event.wait()
-
-                        if self._prompt_replied:
-                            self._shell.stdin.write(self._prompt_reply + "\n")
-                            self._shell.stdin.flush()
-                        else:
-                            self.kill_command()
-
-                    elif 'value' in reply_json:
-                        # generic response to send to the client
-                        send_response = True
-                        if isinstance(reply_json['value'], str) and reply_json['value'].endswith('\r'):
-                            reply_json['value'] = reply_json['value'][:-1]
-                            if len(reply_json['value']) == 0:
-                                send_response = False
-
-                        if send_response:
-                            self._pending_request.send_output(reply_json)
+            for reply_line in lines:
+                if self._shell_exited:
+                    break
+
+                reply_json = None
+                # when running on windows, remove the \r (from \r\n sequence)
+                if reply_line.endswith('\r'):
+                    reply_line = reply_line[:-1]
+
+                if reply_line.startswith("["):
+                    reply_line = f"{{ \"rows\": {reply_line} }}"
+
+                if reply_line.startswith("{"):
+                    reply_json = json.loads(reply_line)
+
+                    # Text printed by the shell is batched, a big output is
+                    # printed as a lot of consecutive values
+                    if len(reply_json) == 1 and isinstance(reply_json.get('value'), str):
+                        if len(error_buffer) > 0:
+                            self._pending_request.send_output(
+                                {"error": error_buffer})
+                            error_buffer = ""
+
+                        value = reply_json['value']
+                        if value.endswith('\r'):
+                            value = value[:-1]
+
+                        if len(value) > 0:
+                            value_buffer.append(value)
+                            if len(value_buffer) >= MAX_BATCHED_VALUES:
+                                self._send_values(value_buffer)
+                        continue
+
+                # Any other output is sent after the batched text
+                self._send_values(value_buffer)
+
+                if reply_json is not None:
+                    # While in python mode, the python engine produces errors by
+                    # calling the print callback lots of times, to avoid sending a
+                    # lot of replies to the frontend we will cache consecutive errors
+                    # and send them in one call to the frontend as soon as a non
+                    # error response is received from the shell
+                    if 'error' in reply_json and isinstance(reply_json['error'], str):
+                        error_buffer += reply_json["error"]
                     else:
-                        # Shell commands are stored as JSON and sent to the Shell
-                        # Then the shell will print them as JSON because of interactive=full
-                        # We do not need to reply back the original command to the frontend
-                        if self._pending_request.command != reply_json:
-                            if 'complete' in self._pending_request.command:
-                                self._pending_request.send_output(
-                                    reply_json['info'])
+                        if len(error_buffer) > 0:
+                            self._pending_request.send_output(
+                                {"error": error_buffer})
+                            error_buffer = ""
+
+                        if 'prompt_descriptor' in reply_json:
+                            # remove empty strings
+                            reply_json = remove_dict_useless_items(reply_json)
+
+                            # command complete
+                            if not self._initialize_complete.is_set():
+                                self._complete_initialization(reply_json)
+                            else:
+                                self._pending_request.complete(
+                                    data=None if self._last_prompt == reply_json else reply_json)
+                                self._command_complete.set()
+                            self._last_prompt = reply_json
+                        elif 'prompt' in reply_json:
+                            # request for a client prompt
+                            prompt_event = threading.Event()
+
+                            if 'type' in reply_json and reply_json['type'] == 'password':
+                                logger.add_filter({
+                                    "type": "key",
+                                    "key": "reply",
+                                    "expire": Filtering.FilterExpire.OnUse
+                                })
+
+                            reply_json.update(
+                                {"module_session_id": self.module_session_id})
+                            self.send_prompt_response(
+                                self._pending_request.task_id, reply_json, lambda: prompt_event.set())
+
+                            # Locks until the prompt is handled
+                            prompt_event.wait()
+
+                            if self._prompt_replied:
+                                self._shell.stdin.write(self._prompt_reply + "\n")
+                                self._shell.stdin.flush()
                             else:
+                                self.kill_command()
+
+                        elif 'value' in reply_json:
+                            # generic response to send to the client
+                            send_response = True
+                            if isinstance(reply_json['value'], str) and reply_json['value'].endswith('\r'):
+                                reply_json['value'] = reply_json['value'][:-1]
+                                if len(reply_json['value']) == 0:
+                                    send_response = False
+
+                            if send_response:
                                 self._pending_request.send_output(reply_json)
-            elif reply_line == "Bye!":
-                self._shell_exited = True
-            else:
-                # Some shell errors are not reported as JSON, i.e. initialization errors
-                error_buffer += reply_line
+                        else:
+                            # Shell commands are stored as JSON and sent to the Shell
+                            # Then the shell will print them as JSON because of interactive=full
+                            # We do not need to reply back the original command to the frontend
+                            if self._pending_request.command != reply_json:
+                                if 'complete' in self._pending_request.command:
+                                    self._pending_request.send_output(
+                                        reply_json['info'])
+                                else:
+                                    self._pending_request.send_output(reply_json)
+                elif reply_line == "Bye!":
+                    self._shell_exited = True
+                else:
+                    # Some shell errors are not reported as JSON, i.e. initialization errors
+                    error_buffer += reply_line
 
-            reply_line = ''
+            # The batched text is sent once the data read is processed
+            self._send_values(value_buffer)
 
         # A pending request is expected to be present in 3 cases:
         # - When the initialization of the session failed
@@ -489,6 +417,21 @@ class ShellModuleSession(ModuleSession):
         if not self._initialize_complete.is_set():
             self._initialize_complete.set()
 
+    def _complete_initialization(self, prompt):
+        data = {"last_prompt": self._last_prompt,
+                "module_session_id": self.module_session_id}
+        if self._last_prompt != prompt:
+            data.update(prompt)
+        self._pending_request.complete(message="New Shell Interactive session created successfully.",
+                                       data=data)
+        self._initialize_complete.set()
+
+    def _send_values(self, value_buffer):
+        if len(value_buffer) > 0:
+            self._pending_request.send_output(
+                {"value": "".join(value_buffer)})
+            value_buffer.clear()
+
     def handle_frontend_command(self):
         self._initialize_complete.wait()
         # Make the actual communication with the interactive shell
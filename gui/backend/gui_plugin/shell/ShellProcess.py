@@ -0,0 +1,407 @@
+# Copyright (c) 2022, 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import codecs
+import json
+import os
+import os.path
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+import mysqlsh
+
+import gui_plugin.core.Logger as logger
+
+
+def start_shell_process(connection_args=None, shell_args=None):
+    """Starts a Shell process in JSON interactive mode
+
+    Args:
+        connection_args (list): The arguments to connect the shell
+        shell_args (list): The arguments of an operation to be executed as a
+            CLI call
+
+    Returns:
+        subprocess.Popen: The shell process
+    """
+    EXTENSION_SHELL_USER_CONFIG_FOLDER_BASENAME = "mysqlsh-gui"
+
+    # Symlinks the plugins on the master shell as we want them available
+    # on the Shell Console
+    subprocess_home = mysqlsh.plugin_manager.general.get_shell_user_dir(  # pylint: disable=no-member
+        'plugin_data', 'gui_plugin', 'shell_instance_home')
+    if not os.path.exists(subprocess_home):
+        os.makedirs(subprocess_home)
+
+    subprocess_plugins = os.path.join(subprocess_home, 'plugins')
+
+    # Get the actual plugin path that this gui_plugin is in
+    module_file_path = os.path.dirname(__file__)
+    plugins_path = os.path.dirname(os.path.dirname(module_file_path))
+
+    # If this is a development setup using the global shell user config dir,
+    # setup a symlink if it does not exist yet
+    if (not mysqlsh.plugin_manager.general.get_shell_user_dir().endswith(
+        EXTENSION_SHELL_USER_CONFIG_FOLDER_BASENAME)
+            and not os.path.exists(subprocess_plugins)):
+        if os.name == 'nt':
+            p = subprocess.run(
+                f'mklink /J "{subprocess_plugins}" "{plugins_path}"',
+                shell=True)
+            p.check_returncode()
+        else:
+            os.symlink(plugins_path, subprocess_plugins)
+
+    env = os.environ.copy()
+
+    # TODO: Workaround for Bug #33164726
+    env['MYSQLSH_USER_CONFIG_HOME'] = subprocess_home + "/"
+    env["MYSQLSH_JSON_SHELL"] = "1"
+
+    if "MYSQLSH_PROMPT_THEME" in env:
+        del env["MYSQLSH_PROMPT_THEME"]
+    if 'ATTACH_DEBUGGER' in env:
+        del env['ATTACH_DEBUGGER']
+    if not 'TERM' in env:
+        env['TERM'] = 'xterm-256color'
+
+    with open(os.path.join(subprocess_home, 'options.json'), 'w') as options_file:
+        json.dump({
+            "history.autoSave": "true"
+        }, options_file)
+
+    with open(os.path.join(subprocess_home, 'prompt.json'), 'w') as prompt_file:
+        json.dump({
+            "variables": {
+                "is_production": {
+                    "match": {
+                        "pattern": "*;host;*[*?*]",
+                        "value": ";%env:PRODUCTION_SERVERS;[%host%]"
+                    },
+                    "if_true": "true",
+                    "if_false": "false"
+                },
+                "is_ssl": {
+                    "match": {
+                        "pattern": "%ssl%",
+                        "value": "SSL"
+                    },
+                    "if_true": "true",
+                    "if_false": "false"
+                }
+            },
+            "prompt": {
+                "text": "\n",
+                "cont_text": "-> "
+            },
+            "segments": [
+                {
+                    "text": "{ \"prompt_descriptor\": { "
+                },
+                {
+                    "text": "\"user\": \"%user%\", "
+                },
+                {
+                    "text": "\"host\": \"%host%\", \"port\": \"%port%\", \"socket\": \"%socket%\", "
+                },
+                {
+                    "text": "\"schema\": \"%schema%\", \"mode\": \"%Mode%\", \"session\": \"%session%\","
+                },
+                {
+                    "text": "\"ssl\": %is_ssl%, \"is_production\": %is_production%"
+                },
+                {
+                    "text": " } }"
+                }
+            ]
+        },
+            prompt_file,
+            indent=4)
+
+    executable = sys.executable
+    if 'executable' in dir(mysqlsh):
+        executable = mysqlsh.executable
+
+    exec_name = executable if executable.endswith(
+        "mysqlsh") or executable.endswith("mysqlsh.exe") else "mysqlsh"
+
+    # Temporarily passing --no-defaults until it is a configurable option in FE and is received as parameter in the BE
+    popen_args = ["--no-defaults", "--interactive=full", "--passwords-from-stdin",
+                  "--py", "--json=raw", "--quiet-start=2", "--column-type-info"]
+
+    # Adds the connection data to the call arguments
+    if connection_args is not None:
+        popen_args = popen_args + connection_args
+
+    # Adds the shell command args to the call arguments
+    if shell_args is not None:
+        popen_args = popen_args + shell_args
+
+    popen_args.insert(0, exec_name)
+
+    return subprocess.Popen(popen_args,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            encoding='utf-8', env=env, text=True,
+                            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0)
+
+
+class ShellOutputReader:
+    """
+    Reads the output of the shell process in large chunks and splits it in
+    lines.
+
+    The pipe is read at the OS level, every read returns the data available
+    at the time (up to chunk_size bytes) without waiting for more to arrive,
+    a line split between two reads is kept until it is completed.
+    """
+
+    def __init__(self, stream, chunk_size=65536):
+        self._fd = stream.fileno()
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+        self._pending_lines = []
+
+    def unread(self, lines):
+        """Makes the given lines be returned by the next read_lines() call"""
+        self._pending_lines = lines + self._pending_lines
+
+    def read_lines(self):
+        """Returns the complete lines read, or None once the output is closed
+
+        The returned lines do not include the line terminator.
+        """
+        if len(self._pending_lines) > 0:
+            lines, self._pending_lines = self._pending_lines, []
+            return lines
+
+        while True:
+            data = os.read(self._fd, self._chunk_size)
+            if len(data) == 0:
+                return None
+
+            lines = (self._partial_line + self._decoder.decode(data)).split('\n')
+            self._partial_line = lines.pop()
+
+            if len(lines) > 0:
+                return lines
+
+
+
+
+class PooledShell:
+    """A shell process started by the pool, waiting for its first command"""
+
+    def __init__(self, process, reader, prompt):
+        self.process = process
+        self.reader = reader
+        # The prompt descriptor printed by the shell once started
+        self.prompt = prompt
+        self.ready_time = time.time()
+
+
+class ShellProcessPool:
+    """
+    Pool of Shell processes started in advance, not connected to any server.
+
+    Starting a shell process takes a while as the shell initializes its
+    python engine and loads the plugins. The pool keeps size processes
+    started and waiting for input, a Shell console session claims one of them
+    and only needs to connect it.
+
+    The state of a Shell console (variables, history, global session) can
+    not be reset, so a process is handed out to a single session and the
+    pool starts a new one to replace it. Idle processes that exit, fail to
+    start within startup_timeout seconds or are idle for more than
+    max_idle_time seconds are discarded and replaced as well.
+    """
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    size = 1
+    max_idle_time = 3600
+    startup_timeout = 60
+
+    @staticmethod
+    def get_instance() -> 'ShellProcessPool':
+        with ShellProcessPool.__instance_lock:
+            if ShellProcessPool.__instance is None:
+                ShellProcessPool.__instance = ShellProcessPool()
+            return ShellProcessPool.__instance
+
+    @staticmethod
+    def configure(size=None, max_idle_time=None, startup_timeout=None):
+        """Configures the pool of shell processes
+
+        Args:
+            size (int): The number of processes kept started, 0 disables the
+                pool
+            max_idle_time (float): The time in seconds a process waits to be
+                claimed before being restarted
+            startup_timeout (float): The time in seconds a process has to
+                start before it is discarded
+        """
+        if size is not None:
+            ShellProcessPool.size = max(0, int(size))
+        if max_idle_time is not None:
+            ShellProcessPool.max_idle_time = max(0, float(max_idle_time))
+        if startup_timeout is not None:
+            ShellProcessPool.startup_timeout = max(1, float(startup_timeout))
+
+    def __init__(self, start_process=start_shell_process):
+        self._start_process = start_process
+        self._size = ShellProcessPool.size
+        self._max_idle_time = ShellProcessPool.max_idle_time
+        self._startup_timeout = ShellProcessPool.startup_timeout
+        self._condition = threading.Condition()
+        self._ready = deque()
+        self._starting = 0
+        self._closed = False
+        self._stats = {
+            "started_processes": 0,
+            "failed_processes": 0,
+            "discarded_processes": 0,
+            "claimed_processes": 0,
+            "missed_claims": 0,
+        }
+
+        with self._condition:
+            self._fill()
+
+    def _fill(self):
+        while not self._closed and len(self._ready) + self._starting < self._size:
+            self._starting += 1
+            threading.Thread(target=self._start, daemon=True).start()
+
+    def _start(self):
+        pooled = None
+        try:
+            process = self._start_process()
+            timer = threading.Timer(self._startup_timeout, process.kill)
+            timer.start()
+            try:
+                pooled = self._wait_ready(process)
+            finally:
+                timer.cancel()
+        except Exception as e:
+            logger.error(f"Failed to start a shell process: {e}")
+
+        with self._condition:
+            self._starting -= 1
+            if pooled is None:
+                # No new process is started until the next claim, so a shell
+                # that can not be started is not retried in a loop
+                self._stats["failed_processes"] += 1
+                return
+
+            if not self._closed:
+                self._stats["started_processes"] += 1
+                self._ready.append(pooled)
+                self._condition.notify_all()
+                return
+
+        self._stop(pooled)
+
+    def _wait_ready(self, process):
+        # The shell is ready once it prints the first prompt
+        reader = ShellOutputReader(process.stdout)
+        while True:
+            lines = reader.read_lines()
+            if lines is None:
+                process.wait()
+                return None
+
+            for index, line in enumerate(lines):
+                if not line.startswith("{"):
+                    continue
+                try:
+                    reply_json = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    continue
+
+                if 'prompt_descriptor' in reply_json:
+                    reader.unread(lines[index + 1:])
+                    return PooledShell(process, reader, reply_json)
+
+    def _stop(self, pooled):
+        try:
+            pooled.process.kill()
+            pooled.process.wait()
+        except Exception as e:  # pragma: no cover
+            logger.error(f"Failed to stop a shell process: {e}")
+
+    def claim(self):
+        """Takes a started shell process out of the pool
+
+        Returns:
+            The PooledShell, or None if no process is ready
+        """
+        pooled = None
+        discarded = []
+        with self._condition:
+            while len(self._ready) > 0:
+                candidate = self._ready.popleft()
+                if candidate.process.poll() is None and \
+                        time.time() - candidate.ready_time < self._max_idle_time:
+                    pooled = candidate
+                    break
+                discarded.append(candidate)
+
+            self._stats["discarded_processes"] += len(discarded)
+            if pooled is None:
+                self._stats["missed_claims"] += 1
+            else:
+                self._stats["claimed_processes"] += 1
+
+            self._fill()
+
+        for candidate in discarded:
+            self._stop(candidate)
+
+        return pooled
+
+    def wait_ready(self, count=1, timeout=None):
+        """Waits until at least count processes are ready to be claimed"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._ready) >= count, timeout)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            ready = list(self._ready)
+            self._ready.clear()
+
+        for pooled in ready:
+            self._stop(pooled)
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats["ready_processes"] = len(self._ready)
+            stats["starting_processes"] = self._starting
+
+        return stats
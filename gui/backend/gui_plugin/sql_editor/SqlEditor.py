@@ -21,8 +21,6 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
-import json
-
 from mysqlsh.plugin_manager import \
     plugin_function  # pylint: disable=import-error
 
@@ -31,8 +29,6 @@ from gui_plugin.core.Context import get_context
 from gui_plugin.core.Db import BackendDatabase, BackendTransaction
 from gui_plugin.core.Error import MSGException
 from gui_plugin.db import backend as db_backend
-from gui_plugin.modules.Modules import (add_data, delete_data,
-                                        get_data_category_id, list_data)
 from gui_plugin.sql_editor.SqlEditorModuleSession import SqlEditorModuleSession
 
 from . import backend as sql_editor_backend
@@ -168,7 +164,32 @@ def execute(session, sql, params=None, options=None):
             {"row_packet_size": -1}
 
     Allowed options for options:
-        row_packet_size (int): The pack size for each result segment
+        row_packet_size (int): The pack size for each result segment, if not
+            given, the size of the segments is adapted to the result
+        packet_target_size (int): The approximate size in bytes of each result
+            segment when row_packet_size is not given, defaults to 65536
+        packet_target_time (int): The maximum time in milliseconds spent
+            collecting the rows of a result segment when row_packet_size is
+            not given, defaults to 50
+        result_format (str): The format used to send the result rows, either
+            "json" (default) or "binary" to send them in binary WebSocket
+            messages using a column-major layout
+        script_mode (bool): Executes the sql as a script, it is split into
+            its statements, which are executed within a single task. Instead
+            of the individual results, a summary with the number of
+            executed statements, errors and rows affected is sent
+        stop_on_error (bool): Whether the script execution stops at the first
+            failing statement, defaults to true
+        script_batch_size (int): The number of statements executed between
+            progress checks in script mode, defaults to 100
+        progress_interval (int): The minimum time in milliseconds between the
+            progress summaries sent in script mode, defaults to 1000
+        page_size (int): The maximum number of rows sent, if the result has
+            more rows it is kept open and the next pages are fetched with
+            gui.sqlEditor.fetchMore
+        result_idle_timeout (int): The time in seconds a result kept open
+            waits for the next page to be fetched before it is closed,
+            defaults to 300
 
     Returns:
         dict: the result message
@@ -178,6 +199,37 @@ def execute(session, sql, params=None, options=None):
     return session.execute(sql=sql, params=params, options=options)
 
 
+@plugin_function('gui.sqlEditor.fetchMore', shell=False, web=True)
+def fetch_more(session, result_request_id, options=None):
+    """Fetches the next page of a result kept open by gui.sqlEditor.execute
+
+    The result is closed once all its rows are fetched, when it is idle for
+    longer than its timeout or when anything else is executed in the session.
+
+    Args:
+        session (object): The session used to execute the operation
+        result_request_id (str): The id of the request that executed the query
+        options (dict): A dictionary that holds additional options, e.g.
+            {"page_size": 1000}
+
+    Allowed options for options:
+        page_size (int): The maximum number of rows sent, defaults to the
+            page size given when executing the query
+        row_packet_size (int): The pack size for each result segment
+        packet_target_size (int): The approximate size in bytes of each result
+            segment when row_packet_size is not given, defaults to 65536
+        packet_target_time (int): The maximum time in milliseconds spent
+            collecting the rows of a result segment when row_packet_size is
+            not given, defaults to 50
+
+    Returns:
+        dict: the result message
+    """
+    session = db_backend.get_db_session(session)
+
+    return session.fetch_more(result_request_id, options=options)
+
+
 @plugin_function('gui.sqlEditor.killQuery', shell=False, web=True)
 def kill_query(module_session):
     """Stops the query that is currently executing.
@@ -270,31 +322,15 @@ def add_execution_history_entry(connection_id, code, language_id, profile_id=Non
         int: the id of the new record.
     """
 
-    max_entries = 50
-    category_id = get_data_category_id("DB Notebook Code History")
-    folder_name = f"db_notebook_code_history_{connection_id}"
-    tree_identifier = "DBNotebookCodeHistoryTree"
-
     with BackendDatabase(be_session) as db:
-        context = get_context()
-        group_id = context.web_handler.user_personal_group_id if context is not None else None
-        folder_id = sql_editor_backend.get_folder_id(db, connection_id, group_id)
-
-        history_entries = list_data(folder_id, category_id, be_session)
-        history_entries.sort(key=lambda x: x['last_update'], reverse=True)
-
-        # Check if the last entry has the same code
-        if history_entries and len(history_entries) > 0:
-            previous_entry_code = sql_editor_backend.get_entry(db, history_entries[0]['id'])["code"]
-            if previous_entry_code == code:
-                return history_entries[0]['id']
-
-        entry_id = add_data(language_id, code, category_id, tree_identifier, folder_name, profile_id, be_session)
-
-        if len(history_entries) >= max_entries:
-            delete_data(history_entries[0]['id'], folder_id, be_session)
+        with BackendTransaction(db):
+            context = get_context()
+            group_id = context.web_handler.user_personal_group_id if context is not None else None
+            if profile_id is None and context is not None:
+                profile_id = context.web_handler.session_active_profile_id
 
-    return entry_id
+            return sql_editor_backend.add_history_entry(
+                db, connection_id, profile_id, group_id, code, language_id)
 
 
 @plugin_function('gui.sqlEditor.getExecutionHistoryEntry', shell=False, web=True)
@@ -320,16 +356,11 @@ def get_execution_history_entry(connection_id, index, profile_id=None, be_sessio
         with BackendTransaction(db):
             context = get_context()
             group_id = context.web_handler.user_personal_group_id if context is not None else None
-            category_id = get_data_category_id("DB Notebook Code History", be_session)
-            folder_id = sql_editor_backend.get_folder_id(db, connection_id, group_id, profile_id)
 
-            history_entries = list_data(folder_id, category_id, be_session)
-            history_entries.sort(key=lambda x: x['last_update'], reverse=True)
+            entries = sql_editor_backend.get_history_entries(
+                db, connection_id, profile_id, group_id, index=index)
 
-            if index < len(history_entries):
-                return sql_editor_backend.get_entry(db, history_entries[index]['id'])
-            else:
-                return {}
+            return entries[0] if entries else {}
 
 
 @plugin_function('gui.sqlEditor.getExecutionHistoryEntries', shell=False, web=True)
@@ -356,30 +387,12 @@ def get_execution_history_entries(connection_id, language_id="", truncate_code_l
 
     with BackendDatabase(be_session) as db:
         with BackendTransaction(db):
-            list_of_history_entries = []
             context = get_context()
             group_id = context.web_handler.user_personal_group_id if context is not None else None
-            category_id = get_data_category_id("DB Notebook Code History", be_session)
-            folder_id = sql_editor_backend.get_folder_id(db, connection_id, group_id, profile_id)
-
-            history_entries = list_data(folder_id, category_id, be_session)
-            if language_id != "":
-                history_entries = [entry for entry in history_entries if entry['caption'] == language_id]
-            history_entries.sort(key=lambda x: x['last_update'], reverse=True)
-            for entry in history_entries:
-                result = db.select("""SELECT content FROM data WHERE id = ?""", (entry['id'],))
-                try:
-                    content = json.loads(result[0]['content'])
-                    if truncate_code_length != -1:
-                        content = content[:truncate_code_length]
-                except Exception as e:
-                    raise MSGException(Error.CORE_INVALID_DATA_FORMAT,
-                                       f'Error decoding data content: {str(e)}') from e
-                list_of_history_entries.append({"code": content,
-                                                "language_id": entry['caption'],
-                                                "current_timestamp": entry['last_update']})
-
-            return list_of_history_entries
+
+            return sql_editor_backend.get_history_entries(
+                db, connection_id, profile_id, group_id, language_id,
+                truncate_code_length)
 
 
 @plugin_function('gui.sqlEditor.removeExecutionHistoryEntry', shell=False, web=True)
@@ -400,20 +413,12 @@ def remove_execution_history_entry(connection_id, index=-1, profile_id=None, be_
     """
 
     with BackendDatabase(be_session) as db:
-        context = get_context()
-        group_id = context.web_handler.user_personal_group_id if context is not None else None
-        category_id = get_data_category_id("DB Notebook Code History", be_session)
-        folder_id = sql_editor_backend.get_folder_id(db, connection_id, group_id, profile_id)
-
-        history_entries = list_data(folder_id, category_id, be_session)
-        history_entries.sort(key=lambda x: x['last_update'], reverse=True)
-
-        if index >= len(history_entries):
-            raise MSGException(Error.CORE_INVALID_PARAMETER,
-                           "Parameter 'index' is out of range.")
-
-        if index == -1:
-            for entry in history_entries:
-                delete_data(entry['id'], folder_id, be_session)
-        else:
-            delete_data(history_entries[index]['id'], folder_id, be_session)
+        with BackendTransaction(db):
+            context = get_context()
+            group_id = context.web_handler.user_personal_group_id if context is not None else None
+            removed = sql_editor_backend.remove_history_entries(
+                db, connection_id, profile_id, group_id, index)
+
+            if index != -1 and removed == 0:
+                raise MSGException(Error.CORE_INVALID_PARAMETER,
+                                   "Parameter 'index' is out of range.")
@@ -62,6 +62,8 @@ class SqlEditorModuleSession(DbModuleSession):
     # trigger the user session connection, on this one no prompts are expected
     # as they were resolved on the service session connection
     def on_connected(self, db_session):
+        self._attach_metadata_pool(db_session)
+
         if self._db_user_session is None:
             session_id = "UserSession-" + self._web_session.session_uuid
             self._db_user_session = DbSessionFactory.create(
@@ -74,6 +76,8 @@ class SqlEditorModuleSession(DbModuleSession):
                 lambda x: self.on_fail_connecting(x),
                 lambda x, o: self.on_shell_prompt(x, o),
                 self.on_session_message)
+            # DDL executed from the editor invalidates the cached metadata
+            self._db_user_session.metadata_cache = db_session.metadata_cache
         else:
             self._db_user_session.reconnect(db_session.connection_options)
 
@@ -96,4 +100,12 @@ class SqlEditorModuleSession(DbModuleSession):
         self._db_service_session.kill_query(self._db_user_session)
 
     def cancel_request(self, request_id):
-        self._db_service_session.cancel_request(request_id)
+        # The request may be running on the user session, the service session
+        # or, for metadata requests, on a session of the metadata pool
+        for db_session in [self._db_user_session, self._db_service_session]:
+            if db_session is not None:
+                db_session.cancel_request(request_id)
+
+        if self._db_service_session is not None and \
+                self._db_service_session.metadata_pool is not None:
+            self._db_service_session.metadata_pool.cancel_request(request_id)
@@ -21,58 +21,176 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
+import datetime
 import json
 from gui_plugin.core import Error
 from gui_plugin.core.Error import MSGException
-from ..modules import backend as modules_backend
 
-def get_folder_id(db, connection_id, group_id, profile_id=None):
-    """Returns the folder ID for the given connection ID
+
+# The maximum number of history entries kept for every connection and profile
+max_history_entries = 50
+
+
+def set_max_history_entries(max_entries):
+    """Sets the maximum number of history entries kept for every connection
+
+    Args:
+        max_entries (int): The maximum number of entries
+
+    Returns:
+        None
+    """
+    global max_history_entries
+
+    if type(max_entries) is not int or max_entries < 1:
+        raise ValueError("The maximum number of history entries needs to be "
+                         "a positive integer")
+
+    max_history_entries = max_entries
+
+
+def _history_owner_filter(profile_id, group_id):
+    """Returns the condition and the params selecting the history of an owner
+
+    The history is listed for the given profile, or for the given user group
+    if no profile is given.
+    """
+    if profile_id is not None:
+        return "profile_id=?", (profile_id,)
+
+    return "user_group_id=?", (group_id,)
+
+
+def _history_entry(row, truncate_code_length=-1):
+    try:
+        code = json.loads(row['code'])
+        if truncate_code_length != -1:
+            code = code[:truncate_code_length]
+    except Exception as e:
+        raise MSGException(Error.CORE_INVALID_DATA_FORMAT,
+                           f'Error decoding data content: {str(e)}') from e
+
+    return {"code": code,
+            "language_id": row['language_id'],
+            "current_timestamp": row['timestamp']}
+
+
+def add_history_entry(db, connection_id, profile_id, group_id, code,
+                      language_id, max_entries=None):
+    """Adds an entry to the execution history of a connection
+
+    The entry is not added if the code is the same as the one of the newest
+    entry. After inserting the entry, the oldest entries exceeding the
+    maximum size of the history are deleted.
 
     Args:
         db (object): The database object
         connection_id (int): The connection ID
+        profile_id (int): The profile ID
         group_id (int): The group ID
+        code (str): The code to be stored in the history
+        language_id (str): The language id of the code
+        max_entries (int): The maximum number of entries kept, defaults to
+            max_history_entries
+
+    Returns:
+        int: The ID of the entry
+    """
+    if max_entries is None:
+        max_entries = max_history_entries
+
+    content = json.dumps(code)
+    rows = db.select("""SELECT id, code FROM db_notebook_history
+        WHERE db_connection_id=? AND profile_id=?
+        ORDER BY timestamp DESC, id DESC LIMIT 1""",
+                     (connection_id, profile_id))
+    if rows and rows[0]['code'] == content:
+        return rows[0]['id']
+
+    db.execute("""INSERT INTO db_notebook_history (db_connection_id,
+        profile_id, user_group_id, language_id, code, timestamp)
+        VALUES(?, ?, ?, ?, ?, ?)""",
+               (connection_id, profile_id, group_id, language_id, content,
+                datetime.datetime.now()))
+    entry_id = db.get_last_row_id()
+
+    # The oldest entry kept is selected first, MySQL does not support LIMIT
+    # in IN subqueries nor subqueries on the table being deleted from
+    rows = db.select("""SELECT id, timestamp FROM db_notebook_history
+        WHERE db_connection_id=? AND profile_id=?
+        ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?""",
+                     (connection_id, profile_id, max_entries - 1))
+    if rows:
+        db.execute("""DELETE FROM db_notebook_history
+            WHERE db_connection_id=? AND profile_id=? AND
+                (timestamp < ? OR (timestamp = ? AND id < ?))""",
+                   (connection_id, profile_id, rows[0]['timestamp'],
+                    rows[0]['timestamp'], rows[0]['id']))
+
+    return entry_id
+
+
+def get_history_entries(db, connection_id, profile_id, group_id,
+                        language_id="", truncate_code_length=-1,
+                        index=None):
+    """Returns the execution history of a connection, newest entry first
+
+    Args:
+        db (object): The database object
+        connection_id (int): The connection ID
         profile_id (int): The profile ID
+        group_id (int): The group ID, used if profile_id is None
+        language_id (str): If given, only entries of this language are
+            returned
+        truncate_code_length (int): The length to truncate the code to
+        index (int): If given, only the entry at this position is returned
 
     Returns:
-        int: The folder ID
+        list[dict]: code, language_id, current_timestamp of the entries
     """
-    tree_identifier = "DBNotebookCodeHistoryTree"
-    folder_name = f"db_notebook_code_history_{connection_id}"
-    if profile_id is None:
-        root_folder_id = modules_backend.get_root_folder_id(
-                                        db, tree_identifier, 'group', group_id)
-    else:
-        root_folder_id = modules_backend.get_root_folder_id(
-                                        db, tree_identifier, 'profile', profile_id)
+    owner, params = _history_owner_filter(profile_id, group_id)
+    sql = f"""SELECT code, language_id, timestamp FROM db_notebook_history
+        WHERE db_connection_id=? AND {owner}"""
+    params = (connection_id,) + params
+    if language_id != "":
+        sql += " AND language_id=?"
+        params += (language_id,)
+    sql += " ORDER BY timestamp DESC, id DESC"
+    if index is not None:
+        sql += " LIMIT 1 OFFSET ?"
+        params += (index,)
 
-    return modules_backend.get_folder_id(
-                            db, root_folder_id, folder_name)
+    return [_history_entry(row, truncate_code_length)
+            for row in db.select(sql, params)]
 
 
-def get_entry(db, entry_id):
-    """Returns the entry for the given entry ID
+def remove_history_entries(db, connection_id, profile_id, group_id,
+                           index=-1):
+    """Removes an entry of the execution history of a connection
 
     Args:
         db (object): The database object
-        entry_id (int): The entry ID
+        connection_id (int): The connection ID
+        profile_id (int): The profile ID
+        group_id (int): The group ID, used if profile_id is None
+        index (int): The position of the entry, newest entry first. If -1,
+            all the entries are removed
 
     Returns:
-        dict: The entry info
+        int: The number of removed entries
     """
-    rows = db.select("""SELECT caption, content, last_update FROM data
-                             WHERE id = ?""",
-                             (entry_id,))
-    if rows:
-        row = rows[0]
-        try:
-            content = json.loads(row['content'])
-        except Exception as e:
-            raise MSGException(Error.CORE_INVALID_DATA_FORMAT,
-                                f'Error decoding data content: {str(e)}') from e
-        return {"code": content,
-                "language_id": row['caption'],
-                "current_timestamp": row['last_update']}
-
-    return {}
\ No newline at end of file
+    owner, params = _history_owner_filter(profile_id, group_id)
+    params = (connection_id,) + params
+    if index == -1:
+        return db.execute(f"""DELETE FROM db_notebook_history
+            WHERE db_connection_id=? AND {owner}""", params).rowcount
+
+    rows = db.select(f"""SELECT id FROM db_notebook_history
+        WHERE db_connection_id=? AND {owner}
+        ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?""",
+                     params + (index,))
+    if not rows:
+        return 0
+
+    return db.execute("DELETE FROM db_notebook_history WHERE id=?",
+                      (rows[0]['id'],)).rowcount
@@ -25,10 +25,15 @@
 from dataclasses import replace
 import subprocess
 from mysqlsh.plugin_manager import plugin_function  # pylint: disable=no-name-in-module
+from gui_plugin.core.BackendDbLogger import BackendDbLogger
+from gui_plugin.core.RequestExecutor import RequestExecutor
 from gui_plugin.core.ShellGuiWebSocketHandler import ShellGuiWebSocketHandler
 from gui_plugin.core.ThreadedHTTPServer import ThreadedHTTPServer
+from gui_plugin.core.AsyncHTTPServer import AsyncHTTPServer
 from gui_plugin.core.Certificates import is_shell_web_certificate_installed
 from gui_plugin.core.lib import SystemUtils
+from gui_plugin.shell.ShellProcess import ShellProcessPool
+from gui_plugin.sql_editor import backend as sql_editor_backend
 import mysqlsh
 import ssl
 import os
@@ -50,7 +55,9 @@ from gui_plugin.core import Filtering
 
 @plugin_function('gui.start.webServer', cli=True)
 def web_server(port=None, secure=None, webrootpath=None,
-               single_instance_token=None, read_token_on_stdin=False):
+               single_instance_token=None, read_token_on_stdin=False,
+               compression=None, message_logging=None, request_pool=None,
+               engine=None, shell_pool=None, execution_history_size=None):
     """Starts a web server that will serve the MySQL Shell GUI
 
     Args:
@@ -65,11 +72,70 @@ def web_server(port=None, secure=None, webrootpath=None,
             local user mode.
         read_token_on_stdin (bool): If set to True, the token will be read
             from STDIN
+        compression (dict): A dict with the permessage-deflate compression
+            options. An empty dict will use the default options. If 'None' is
+            passed, then WebSocket messages will not be compressed.
+        message_logging (dict): A dict with the options used to write the
+            log of the WebSocket messages into the backend database
+        request_pool (dict): A dict with the options of the pool of threads
+            executing the web requests
+        engine (str): The server engine, either 'threaded' to use a thread
+            per connection or 'async' to serve all the WebSocket connections
+            on a single event loop, defaults to 'threaded'
+        shell_pool (dict): A dict with the options of the pool of shell
+            processes started in advance for the Shell consoles
+        execution_history_size (int): The maximum number of entries kept in
+            the execution history of every connection, defaults to 50
 
     Allowed options for secure:
         keyfile (str): The path to the server private key file
         certfile (str): The path to the server certificate file
 
+    Allowed options for compression:
+        threshold (int): Messages smaller than this number of bytes are sent
+            uncompressed, defaults to 1024
+        level (int): The zlib compression level, from 0 to 9
+        server_no_context_takeover (bool): If set to True, the server resets
+            the compression context after every message
+        client_no_context_takeover (bool): If set to True, the client is asked
+            to reset the compression context after every message
+        server_max_window_bits (int): The maximum LZ77 window size used by
+            the server, from 9 to 15
+        client_max_window_bits (int): The maximum LZ77 window size the client
+            is asked to use, from 8 to 15
+        max_message_size (int): The maximum size in bytes of a received
+            message once decompressed, defaults to 64 MiB
+
+    Allowed options for message_logging:
+        durable (bool): If set to True, every message is committed to the
+            backend database before it is processed, otherwise messages are
+            written in batches by a background thread
+        max_batch_size (int): The maximum number of messages written in a
+            single transaction, defaults to 500
+        max_latency (float): The maximum time in seconds a message waits
+            for its batch to be written, defaults to 0.05
+        max_queue_size (int): The maximum number of messages waiting to be
+            written, defaults to 10000
+
+    Allowed options for request_pool:
+        max_workers (int): The maximum number of requests executed at the
+            same time, defaults to 16
+        max_queue_size (int): The maximum number of requests waiting to be
+            executed, defaults to 1000
+        idle_timeout (float): The time in seconds an idle worker waits for a
+            new request before exiting, defaults to 60
+        reuse_shell_context (bool): If set to True, the shell context of a
+            request is reused by the following requests of the same user and
+            web session, defaults to True
+
+    Allowed options for shell_pool:
+        size (int): The number of shell processes kept started, 0 disables
+            the pool, defaults to 1
+        max_idle_time (float): The time in seconds a shell process waits to
+            be used before being restarted, defaults to 3600
+        startup_timeout (float): The time in seconds a shell process has to
+            start before being discarded, defaults to 60
+
     Returns:
         Nothing
     """
@@ -162,13 +228,89 @@ def web_server(port=None, secure=None, webrootpath=None,
 
             logger.info('\tCertificate is installed.')
 
+        if compression is not None:
+            # try to cast from shell.Dict to dict
+            try:
+                compression = json.loads(str(compression))
+            except:
+                pass
+
+            if type(compression) is not dict:
+                raise ValueError('If specified, the compression parameter '
+                                 'need to be of type dict')
+
+        if message_logging is not None:
+            # try to cast from shell.Dict to dict
+            try:
+                message_logging = json.loads(str(message_logging))
+            except:
+                pass
+
+            if type(message_logging) is not dict:
+                raise ValueError('If specified, the message_logging parameter '
+                                 'need to be of type dict')
+
+            BackendDbLogger.configure(
+                durable=message_logging.get("durable"),
+                max_batch_size=message_logging.get("max_batch_size"),
+                max_latency=message_logging.get("max_latency"),
+                max_queue_size=message_logging.get("max_queue_size"))
+
+        if request_pool is not None:
+            # try to cast from shell.Dict to dict
+            try:
+                request_pool = json.loads(str(request_pool))
+            except:
+                pass
+
+            if type(request_pool) is not dict:
+                raise ValueError('If specified, the request_pool parameter '
+                                 'need to be of type dict')
+
+            RequestExecutor.configure(
+                max_workers=request_pool.get("max_workers"),
+                max_queue_size=request_pool.get("max_queue_size"),
+                idle_timeout=request_pool.get("idle_timeout"),
+                reuse_shell_context=request_pool.get("reuse_shell_context"))
+
+        if shell_pool is not None:
+            # try to cast from shell.Dict to dict
+            try:
+                shell_pool = json.loads(str(shell_pool))
+            except:
+                pass
+
+            if type(shell_pool) is not dict:
+                raise ValueError('If specified, the shell_pool parameter '
+                                 'need to be of type dict')
+
+            ShellProcessPool.configure(
+                size=shell_pool.get("size"),
+                max_idle_time=shell_pool.get("max_idle_time"),
+                startup_timeout=shell_pool.get("startup_timeout"))
+
+            # Starts the shell processes with the server
+            ShellProcessPool.get_instance()
+
+        if execution_history_size is not None:
+            sql_editor_backend.set_max_history_entries(execution_history_size)
+
+        if engine is None:
+            engine = 'threaded'
+        if engine not in ['threaded', 'async']:
+            raise ValueError("The engine parameter must be either 'threaded' "
+                             "or 'async'")
+
+        server_class = AsyncHTTPServer if engine == 'async' else ThreadedHTTPServer
+
         # Replace WSSimpleEcho with your own subclass of HTTPWebSocketHandler
-        server = ThreadedHTTPServer(
+        server = server_class(
             ('127.0.0.1', port), ShellGuiWebSocketHandler)
         server.daemon_threads = True
         server.host = f'{"https" if secure else "http"}://127.0.0.1'
         server.port = port
         server.single_instance_token = single_instance_token
+        server.compression = compression
 
         if secure:
             context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
@@ -193,6 +335,10 @@ def web_server(port=None, secure=None, webrootpath=None,
             # Log server start
             logger.info(f"\tPort: {port}")
             logger.info(f"\tSecure: {'version' in dir(server.socket)}")
+            logger.info(f"\tCompression: {compression is not None}")
+            logger.info(f"\tEngine: {engine}")
+            logger.info(
+                f"\tDurable message logging: {BackendDbLogger.durable}")
             logger.info(f"\tWebroot: {webrootpath}")
             logger.info(
                 f"\tMode: {f'Single user' if server.single_instance_token is not None else 'Multi-user'}")
@@ -98,6 +98,8 @@ def delete_user(username, be_session=None):
                 "DELETE FROM user_group_has_user WHERE user_id = ?", (user_id,))
             backend.remove_user_group(db, default_group_id)
 
+    backend.invalidate_command_patterns(user_id)
+
 
 @plugin_function('gui.users.grantRole', web=True)
 def grant_role(username, role, be_session=None):
@@ -138,6 +140,8 @@ def grant_role(username, role, be_session=None):
                            "user_id, role_id) "
                            "VALUES(?, ?)", (user_id, role_id))
 
+    backend.invalidate_command_patterns(user_id)
+
 
 @plugin_function('gui.users.getUserId', web=True)
 def get_user_id(username, be_session=None):
@@ -24,6 +24,8 @@
 import hashlib
 import os
 import json
+import re
+import threading
 from gui_plugin.core.Error import MSGException
 import gui_plugin.core.Error as Error
 import secrets
@@ -31,6 +33,13 @@ import secrets
 ALL_USERS_GROUP_ID = 1
 LOCAL_USERNAME = "LocalAdministrator"
 
+# Compiled command access patterns per user id, the generation is increased
+# on every invalidation so a lookup running concurrently with a privilege
+# change does not store stale patterns
+_command_patterns = {}
+_command_patterns_generation = 0
+_command_patterns_lock = threading.Lock()
+
 
 def create_group(db, name, description):
     """Returns the ID of the created user_group.
@@ -94,8 +103,67 @@ def add_user_role(db, user_id, role):
     db.execute('''INSERT INTO user_has_role(user_id, role_id)
                     VALUES(?, ?)''',
                (user_id, role_id))
+    role_row_id = db.get_last_row_id()
 
-    return db.get_last_row_id()
+    invalidate_command_patterns(user_id)
+
+    return role_row_id
+
+
+def get_command_patterns(db, user_id):
+    """Returns the compiled command access patterns of the given user.
+
+    The patterns are read from the backend database the first time they are
+    requested for a user and are kept until invalidate_command_patterns() is
+    called.
+
+    Args:
+        db (object): The db object
+        user_id (int): The id of the user.
+
+    Returns:
+        The list of compiled access patterns, in the order returned by the db
+    """
+    with _command_patterns_lock:
+        patterns = _command_patterns.get(user_id)
+        generation = _command_patterns_generation
+
+    if patterns is not None:
+        return patterns
+
+    rows = db.execute(
+        '''SELECT p.name, p.access_pattern
+        FROM privilege p
+            INNER JOIN role_has_privilege r_p
+                ON p.id = r_p.privilege_id
+            INNER JOIN user_has_role u_r
+                ON r_p.role_id = u_r.role_id
+        WHERE u_r.user_id = ? AND p.privilege_type_id = 1''',
+        (user_id,)).fetch_all()
+    patterns = [re.compile(row[1]) for row in rows]
+
+    with _command_patterns_lock:
+        if generation == _command_patterns_generation:
+            _command_patterns[user_id] = patterns
+
+    return patterns
+
+
+def invalidate_command_patterns(user_id=None):
+    """Discards the cached command access patterns.
+
+    Args:
+        user_id (int): The id of the user whose patterns should be discarded,
+            if None the patterns of all the users are discarded.
+    """
+    global _command_patterns_generation
+
+    with _command_patterns_lock:
+        _command_patterns_generation += 1
+        if user_id is None:
+            _command_patterns.clear()
+        else:
+            _command_patterns.pop(user_id, None)
 
 
 def create_user(db, username, password, role=None, allowed_hosts=None):
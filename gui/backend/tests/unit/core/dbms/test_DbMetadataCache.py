@@ -0,0 +1,155 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import time
+
+import pytest
+
+from gui_plugin.core.dbms.DbMetadataCache import DbMetadataCache, is_ddl
+from gui_plugin.core.dbms.DbSession import DbSession, DbSessionFactory
+from gui_plugin.core.dbms.DbSessionTasks import DbExecuteTask, DbSqlTask
+
+
+@DbSessionFactory.register_session('MetadataCacheTest')
+class MetadataCacheTestSession(DbSession):
+    def __init__(self, id, threaded, connection_options, data={},
+                 auto_reconnect=None, task_state_cb=None, on_connected_cb=None,
+                 on_failed_cb=None, prompt_cb=None, message_callback=None):
+        super().__init__(id, threaded, connection_options, data,
+                         auto_reconnect=auto_reconnect, task_state_cb=task_state_cb)
+        self.cursor = None
+        self.executed = []
+
+    def _get_stats(self, resultset):
+        return {"rows_affected": 0, "last_insert_id": 0}
+
+    def do_execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def row_generator(self):
+        return iter([])
+
+    def next_result(self):
+        return False
+
+
+@pytest.fixture
+def session():
+    session = MetadataCacheTestSession("cache", False, {})
+    session.metadata_cache = DbMetadataCache()
+    return session
+
+
+def run_task(session, key, sql="SELECT 1"):
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message))
+
+    task = DbExecuteTask(session, sql=sql, result_callback=on_result)
+    if not session.metadata_cache.replay(key, task):
+        session.metadata_cache.record(key, task)
+        task.execute()
+
+    return results
+
+
+@pytest.mark.parametrize("sql,expected", [
+    ("CREATE TABLE t (a INT)", True),
+    ("  drop view v", True),
+    ("/* comment */ ALTER TABLE t ADD COLUMN b INT", True),
+    ("-- comment\nRENAME TABLE a TO b", True),
+    ("TRUNCATE t", True),
+    ("SELECT * FROM created", False),
+    ("INSERT INTO t VALUES (1)", False),
+    ("", False),
+    (None, False),
+])
+def test_is_ddl(sql, expected):
+    assert is_ddl(sql) == expected
+
+
+def test_results_are_replayed(session):
+    key = ("schema_object_names", "Table", "sakila", "%", None)
+
+    first = run_task(session, key)
+    assert session.executed == ["SELECT 1"]
+
+    second = run_task(session, key)
+    assert session.executed == ["SELECT 1"]
+    assert second == first
+
+    run_task(session, ("schema_object_names", "View", "sakila", "%", None))
+    assert session.executed == ["SELECT 1", "SELECT 1"]
+
+    stats = session.metadata_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 2
+
+
+def test_entries_expire(session):
+    session.metadata_cache = DbMetadataCache(ttl=0.05)
+    key = ("table_object", "Column", "sakila", "actor", "actor_id")
+
+    run_task(session, key)
+    run_task(session, key)
+    assert len(session.executed) == 1
+
+    time.sleep(0.1)
+    run_task(session, key)
+    assert len(session.executed) == 2
+
+
+def test_failed_tasks_are_not_cached(session):
+    key = ("table_object_names", "Index", "sakila", "actor", "%")
+
+    task = DbExecuteTask(session, sql="SELECT 1")
+    session.metadata_cache.record(key, task)
+    task.dispatch_result("ERROR", message="Lost connection")
+    task.result_recorder.finish()
+
+    task = DbExecuteTask(session, sql="SELECT 1")
+    session.metadata_cache.record(key, task)
+    task.cancel()
+    task.execute()
+
+    assert session.executed == []
+    assert session.metadata_cache.get_stats()["entries"] == 0
+
+
+def test_ddl_invalidates_cache(session):
+    key = ("schema_object_names", "Table", "sakila", "%", None)
+    run_task(session, key)
+    run_task(session, key)
+    assert len(session.executed) == 1
+
+    DbSqlTask(session, sql="SELECT * FROM actor").execute()
+    run_task(session, key)
+    assert len(session.executed) == 2
+
+    DbSqlTask(session, sql="CREATE TABLE t (a INT)").execute()
+    assert session.metadata_cache.get_stats()["invalidations"] == 1
+
+    run_task(session, key)
+    assert len(session.executed) == 4
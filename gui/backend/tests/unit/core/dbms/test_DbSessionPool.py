@@ -0,0 +1,261 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from gui_plugin.core.dbms.DbSession import DbSession, DbSessionFactory
+from gui_plugin.core.dbms.DbSessionPool import DbSessionPool
+from gui_plugin.core.dbms.DbSessionTasks import DbExecuteTask
+
+
+@DbSessionFactory.register_session('PoolTest')
+class PoolTestSession(DbSession):
+    gate = threading.Event()
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def __init__(self, id, threaded, connection_options, data={},
+                 auto_reconnect=None, task_state_cb=None, on_connected_cb=None,
+                 on_failed_cb=None, prompt_cb=None, message_callback=None):
+        super().__init__(id, threaded, connection_options, data,
+                         auto_reconnect=auto_reconnect, task_state_cb=task_state_cb)
+        self._message_callback = message_callback
+        self.open()
+
+    def _do_open_database(self, notify_success=True):
+        self._on_connect()
+        return True
+
+    def _do_close_database(self, finalize):
+        pass
+
+    def _get_stats(self, resultset):
+        return {"rows_affected": 0, "last_insert_id": 0}
+
+    def do_execute(self, sql, params=None):
+        if sql == "WAIT":
+            with PoolTestSession.lock:
+                PoolTestSession.running += 1
+                PoolTestSession.max_running = max(
+                    PoolTestSession.max_running, PoolTestSession.running)
+            PoolTestSession.gate.wait()
+            with PoolTestSession.lock:
+                PoolTestSession.running -= 1
+
+
+@DbSessionFactory.register_session('PoolFailTest')
+class PoolFailTestSession(DbSession):
+    def __init__(self, *args, **kwargs):
+        raise Exception("Connection refused")
+
+
+class ContextThread(threading.Thread):
+    """A thread processing a request, like the request handlers"""
+
+    def __init__(self, target):
+        super().__init__(target=target)
+        self.context = SimpleNamespace(request_id="request", completion_event=None)
+
+    def get_context(self):
+        return self.context
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def pool_config():
+    config = {
+        "min_size": DbSessionPool.min_size,
+        "max_size": DbSessionPool.max_size,
+        "idle_timeout": DbSessionPool.idle_timeout,
+        "health_check_interval": DbSessionPool.health_check_interval,
+    }
+    PoolTestSession.gate.clear()
+    PoolTestSession.max_running = 0
+
+    yield
+
+    PoolTestSession.gate.set()
+    DbSessionPool.configure(**config)
+
+
+def test_tasks_are_executed_in_parallel(pool_config):
+    DbSessionPool.configure(min_size=2, max_size=2)
+    service_session = PoolTestSession("service", False, {})
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "test"})
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+    assert wait_until(lambda: pool.get_stats()["sessions"] == 2)
+
+    results = []
+    done = threading.Semaphore(0)
+
+    def on_result(state, message, task_id, data):
+        if state != "PENDING":
+            results.append((task_id, state))
+            done.release()
+
+    tasks = [DbExecuteTask(service_session, task_id=f"task{i}", sql="WAIT",
+                           result_callback=on_result) for i in range(3)]
+    for task in tasks:
+        assert pool.submit(task)
+
+    assert wait_until(lambda: PoolTestSession.running == 2)
+
+    PoolTestSession.gate.set()
+    for _ in tasks:
+        assert done.acquire(timeout=5)
+
+    assert sorted(results) == [("task0", "OK"), ("task1", "OK"),
+                               ("task2", "OK")]
+    assert PoolTestSession.max_running == 2
+    for task in tasks:
+        assert task.session is not service_session
+
+    stats = pool.get_stats()
+    assert stats["sessions"] == 2
+    assert stats["created_sessions"] == 2
+    assert stats["submitted_tasks"] == 3
+
+    DbSessionPool.release(key)
+    assert not pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+    assert pool.get_stats()["closed_sessions"] == 2
+
+
+def test_sessions_are_opened_in_background(pool_config):
+    DbSessionPool.configure(min_size=0, max_size=1)
+    PoolTestSession.gate.set()
+    service_session = PoolTestSession("service", False, {})
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "background"})
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+
+    # No session is available yet, the task is left to the service session
+    # while one is opened
+    assert not pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+    assert wait_until(lambda: pool.get_stats()["sessions"] == 1)
+    assert pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+
+    DbSessionPool.release(key)
+
+
+def test_failed_connections_are_retried_with_backoff(pool_config):
+    DbSessionPool.configure(min_size=0, max_size=1)
+    service_session = PoolTestSession("service", False, {})
+    key = DbSessionPool.get_key(1, "PoolFailTest", {"host": "failing"})
+    pool = DbSessionPool.acquire(key, "PoolFailTest", {})
+    pool.connect_retry_delay = 10
+
+    assert not pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+    assert wait_until(lambda: pool.get_stats()["failed_sessions"] == 1)
+    assert wait_until(lambda: not pool._opening)
+
+    # No new connection is tried until the retry delay elapses
+    assert not pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+    time.sleep(0.1)
+    assert pool.get_stats()["failed_sessions"] == 1
+    assert not pool._opening
+
+    DbSessionPool.release(key)
+
+
+def test_health_check_does_not_use_the_request_context(pool_config):
+    DbSessionPool.configure(min_size=1, max_size=1)
+    PoolTestSession.gate.set()
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "check"})
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+    assert wait_until(lambda: pool.get_stats()["sessions"] == 1)
+
+    thread = ContextThread(lambda: pool._check_session(pool._sessions[0]))
+    thread.start()
+    thread.join()
+
+    assert thread.context.completion_event is None
+    assert wait_until(lambda: pool.get_stats()["pending_tasks"] == 0)
+
+    DbSessionPool.release(key)
+
+
+def test_pool_is_shared_by_key(pool_config):
+    DbSessionPool.configure(min_size=1, max_size=2)
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "shared"})
+
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+    assert DbSessionPool.acquire(key, "PoolTest", {}) is pool
+    assert wait_until(lambda: pool.get_stats()["sessions"] == 1)
+
+    other_key = DbSessionPool.get_key(2, "PoolTest", {"host": "shared"})
+    other_pool = DbSessionPool.acquire(other_key, "PoolTest", {})
+    assert other_pool is not pool
+    DbSessionPool.release(other_key)
+
+    DbSessionPool.release(key)
+    assert pool.get_stats()["sessions"] == 1
+
+    DbSessionPool.release(key)
+    assert pool.get_stats()["sessions"] == 0
+
+
+def test_idle_sessions_are_closed(pool_config):
+    DbSessionPool.configure(min_size=0, max_size=2, idle_timeout=0,
+                            health_check_interval=0.1)
+    PoolTestSession.gate.set()
+    service_session = PoolTestSession("service", False, {})
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "idle"})
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+
+    assert not pool.submit(DbExecuteTask(service_session, sql="SELECT 1"))
+    assert wait_until(lambda: pool.get_stats()["created_sessions"] == 1)
+
+    assert wait_until(lambda: pool.get_stats()["closed_sessions"] == 1)
+    assert pool.get_stats()["sessions"] == 0
+    assert pool.get_stats()["closed_sessions"] == 1
+
+    DbSessionPool.release(key)
+
+
+def test_cancel_request(pool_config):
+    DbSessionPool.configure(min_size=1, max_size=1)
+    key = DbSessionPool.get_key(1, "PoolTest", {"host": "cancel"})
+    pool = DbSessionPool.acquire(key, "PoolTest", {})
+    try:
+        assert wait_until(lambda: pool.get_stats()["sessions"] == 1)
+        service_session = PoolTestSession("service", False, {})
+        task = DbExecuteTask(service_session, task_id="req-1", sql="WAIT")
+        assert pool.submit(task)
+
+        assert wait_until(lambda: PoolTestSession.running == 1)
+
+        pool.cancel_request("req-1")
+        assert task.cancelled
+    finally:
+        PoolTestSession.gate.set()
+        DbSessionPool.release(key)
@@ -0,0 +1,458 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import gui_plugin.core.ShellGuiWebSocketHandler as ShellGuiWebSocketHandler
+from gui_plugin.core.dbms.DbSession import DbSession, DbSessionFactory
+from gui_plugin.core.dbms.DbSessionTasks import (DbFetchMoreTask,
+                                                 DbResultCursor, DbScriptTask,
+                                                 DbSqlTask, RowPacketSizer,
+                                                 split_sql_script)
+from gui_plugin.core.dbms.DbSqliteSessionTasks import SqliteOneFieldListTask
+from gui_plugin.sql_editor.SqlEditorModuleSession import \
+    SqlEditorModuleSession
+from gui_plugin.users import backend as user_handler
+
+
+@DbSessionFactory.register_session('ScriptTest')
+class ScriptTestSession(DbSession):
+    def __init__(self, id, threaded, connection_options, data={},
+                 auto_reconnect=None, task_state_cb=None, on_connected_cb=None,
+                 on_failed_cb=None, prompt_cb=None, message_callback=None):
+        super().__init__(id, threaded, connection_options, data,
+                         auto_reconnect=auto_reconnect, task_state_cb=task_state_cb)
+        self.cursor = None
+        self.executed = []
+        self._rows = []
+
+    def _get_stats(self, resultset):
+        return {"rows_affected": 0 if self._rows else 1, "last_insert_id": 0}
+
+    def do_execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql.startswith("FAIL"):
+            raise Exception(f"Failed: {sql}")
+
+        self._rows = [(1,), (2,)] if sql.startswith("SELECT") else []
+
+    def row_generator(self):
+        return iter(self._rows)
+
+    def next_result(self):
+        return False
+
+
+@pytest.mark.parametrize("row_limit, row_count, expected", [
+    (25, 24, False),
+    (25, 25, True),
+    (0, 1000, False),
+    (-1, 1000, False),
+])
+def test_fixed_packet_size(row_limit, row_count, expected):
+    sizer = RowPacketSizer.from_options({"row_packet_size": row_limit})
+
+    assert not sizer.is_adaptive
+    assert sizer.is_full(row_count) == expected
+
+
+def test_adaptive_packet_size():
+    sizer = RowPacketSizer.from_options(
+        {"packet_target_size": 1000, "packet_target_time": 60000})
+    assert sizer.is_adaptive
+
+    row_count = 0
+    while not sizer.is_full(row_count):
+        sizer.add((row_count, "x" * 10))
+        row_count += 1
+
+    # Each row is estimated in 23 bytes
+    assert row_count == 44
+
+    sizer.reset()
+    assert not sizer.is_full(row_count)
+
+
+def test_adaptive_packet_time():
+    sizer = RowPacketSizer.from_options({"packet_target_time": 10})
+
+    sizer.add((1,))
+    assert not sizer.is_full(0)
+
+    time.sleep(0.02)
+    assert sizer.is_full(1)
+
+
+@pytest.mark.parametrize("options, expected", [
+    ({}, [1000]),
+    ({"row_packet_size": 25}, [25] * 40),
+    ({"row_packet_size": -1}, [1000]),
+])
+def test_name_list_packets(options, expected):
+    packets = []
+
+    def on_result(state, message, task_id, data):
+        if data is not None:
+            packets.append(data)
+
+    task = SqliteOneFieldListTask(SimpleNamespace(task_state_cb=None),
+                                  result_callback=on_result, options=options)
+    task.resultset = [(f"name{i}",) for i in range(1000)]
+    task.process_result()
+
+    # Small names are sent in a single packet unless a packet size is given
+    assert [len(packet) for packet in packets] == expected
+    assert sum(packets, []) == [f"name{i}" for i in range(1000)]
+
+
+@pytest.mark.parametrize("script, expected", [
+    ("SELECT 1; SELECT 2;", ["SELECT 1", "SELECT 2"]),
+    ("SELECT 'a;b'; SELECT \"c;\"", ["SELECT 'a;b'", 'SELECT "c;"']),
+    ("SELECT 'it''s;'; SELECT 'a\\';b'", ["SELECT 'it''s;'", "SELECT 'a\\';b'"]),
+    ("SELECT 1 -- a;b\n; # c;d\nSELECT 2", ["SELECT 1 -- a;b", "# c;d\nSELECT 2"]),
+    ("SELECT /* ; */ 1;;", ["SELECT /* ; */ 1"]),
+    ("DELIMITER $$\nCREATE PROCEDURE p() BEGIN SELECT 1; END$$\nDELIMITER ;\nSELECT 2;",
+     ["CREATE PROCEDURE p() BEGIN SELECT 1; END", "SELECT 2"]),
+])
+def test_split_sql_script(script, expected):
+    assert split_sql_script(script) == expected
+
+
+def run_script(sql, options):
+    session = ScriptTestSession("script", False, {})
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+
+    task = DbScriptTask(session, sql=sql, result_callback=on_result,
+                        options=options)
+    task.execute()
+
+    return session, task, results
+
+
+def test_script_summary():
+    sql = ";".join(["INSERT INTO t VALUES (1)"] * 250 + ["SELECT 1"])
+    session, task, results = run_script(
+        sql, {"script_batch_size": 100, "progress_interval": 0})
+
+    assert len(session.executed) == 251
+
+    # Besides the start message, only the progress of each batch and the
+    # final summary are sent
+    assert [message for _, message, _ in results] == [
+        "Execution started...",
+        "Executed 100 of 251 statements",
+        "Executed 200 of 251 statements",
+        "Script executed"]
+
+    summary = results[-1][2]["script_summary"]
+    assert summary["executed"] == 251
+    assert summary["succeeded"] == 251
+    assert summary["failed"] == 0
+    assert summary["rows_affected"] == 250
+    assert summary["rows_returned"] == 2
+    assert task.rows_affected == 250
+
+
+def test_script_stop_on_error():
+    session, task, results = run_script(
+        "INSERT 1; FAIL 2; INSERT 3", {})
+
+    assert session.executed == ["INSERT 1", "FAIL 2"]
+    assert results[-2][2]["script_summary"]["errors"] == [
+        {"index": 1, "message": "Failed: FAIL 2"}]
+    assert results[-1][0] == "ERROR"
+
+
+def test_script_continue_on_error():
+    session, task, results = run_script(
+        "INSERT 1; FAIL 2; INSERT 3; FAIL 4", {"stop_on_error": False})
+
+    assert session.executed == ["INSERT 1", "FAIL 2", "INSERT 3", "FAIL 4"]
+    assert results[-1][0] == "PENDING"
+
+    summary = results[-1][2]["script_summary"]
+    assert summary["succeeded"] == 2
+    assert summary["failed"] == 2
+    assert [error["index"] for error in summary["errors"]] == [1, 3]
+
+
+@DbSessionFactory.register_session('PagingTest')
+class PagingTestSession(DbSession):
+    def __init__(self, id, threaded, connection_options, data={},
+                 auto_reconnect=None, task_state_cb=None, on_connected_cb=None,
+                 on_failed_cb=None, prompt_cb=None, message_callback=None):
+        super().__init__(id, threaded, connection_options, data,
+                         auto_reconnect=auto_reconnect, task_state_cb=task_state_cb)
+        self.cursor = None
+        self.rows_read = 0
+        self.closed_results = 0
+
+    def _get_stats(self, resultset):
+        return {"rows_affected": 0, "last_insert_id": 0}
+
+    def do_execute(self, sql, params=None):
+        self._rows = iter(range(int(sql.split()[-1])))
+
+    def row_generator(self):
+        for row in self._rows:
+            self.rows_read += 1
+            yield (row,)
+
+    def next_result(self):
+        return False
+
+    def get_column_info(self, row=None):
+        return [{"name": "id", "type": "INTEGER", "length": 11}]
+
+    def row_to_container(self, row, columns):
+        return list(row)
+
+    def close_result(self):
+        self.closed_results += 1
+        super().close_result()
+
+
+def collect_rows(results):
+    rows = []
+    for state, _, data in results:
+        if state == "PENDING" and data is not None:
+            rows.extend(data.get("rows", []))
+    return rows
+
+
+def test_paged_result():
+    session = PagingTestSession("paging", False, {})
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+
+    task = DbSqlTask(session, task_id="req-1", sql="SELECT 1000",
+                     result_callback=on_result, options={"page_size": 100})
+    task.execute()
+
+    # Only the first page and the read ahead row are read
+    assert collect_rows(results) == [[row] for row in range(100)]
+    assert results[-1][2]["has_more"]
+    assert session.rows_read == 101
+    assert session.get_open_result("req-1") is not None
+
+    fetched = []
+    while session.get_open_result("req-1") is not None:
+        results = []
+        DbFetchMoreTask(session, task_id="req-2", result_request_id="req-1",
+                        result_callback=on_result, options={"page_size": 300}).execute()
+        fetched.extend(collect_rows(results))
+
+    assert fetched == [[row] for row in range(100, 1000)]
+    assert not results[-1][2].get("has_more", False)
+    assert session.closed_results == 1
+
+
+def test_fetch_more_without_open_result():
+    session = PagingTestSession("paging", False, {})
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+
+    DbFetchMoreTask(session, result_request_id="unknown",
+                    result_callback=on_result).execute()
+
+    assert results[-1][0] == "ERROR"
+
+
+def create_command_handler(monkeypatch, module_session):
+    # A handler without connection, the requests it starts are collected
+    # instead of being executed
+    handler = ShellGuiWebSocketHandler.ShellGuiWebSocketHandler.__new__(
+        ShellGuiWebSocketHandler.ShellGuiWebSocketHandler)
+    handler.server = SimpleNamespace(single_instance_token=None)
+    handler._db = object()
+    handler._session_user_id = 1
+    handler._module_sessions = {"module-1": module_session}
+    handler._requests = {}
+    handler._requests_mutex = threading.Lock()
+    handler.responses = []
+    handler.started_requests = []
+    handler.send_command_response = lambda request_id, values: handler.responses.append(
+        values)
+
+    class RequestHandler:
+        def __init__(self, request_id, func, kwargs, web_handler, lock_session=False):
+            handler.started_requests.append((request_id, func, kwargs))
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(ShellGuiWebSocketHandler,
+                        "RequestHandler", RequestHandler)
+    monkeypatch.setattr(user_handler, "get_command_patterns",
+                        lambda db, user_id: [re.compile(".*")])
+
+    return handler
+
+
+class SqlEditorModuleSessionStub(SqlEditorModuleSession):
+    def __init__(self, user_session, service_session):
+        # Not registered in any web session
+        self._db_user_session = user_session
+        self._db_service_session = service_session
+
+    def close(self):
+        # The sessions are owned by the test
+        pass
+
+
+def test_fetch_more_command(monkeypatch):
+    user_session = PagingTestSession("user", False, {})
+    service_session = PagingTestSession("service", False, {})
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+
+    DbSqlTask(user_session, task_id="req-1", sql="SELECT 50",
+              result_callback=on_result, options={"page_size": 10}).execute()
+    assert user_session.get_open_result("req-1") is not None
+
+    handler = create_command_handler(monkeypatch, SqlEditorModuleSessionStub(
+        user_session, service_session))
+    handler.execute_command_request({
+        "request_id": "req-2",
+        "command": "gui.sql_editor.fetch_more",
+        "args": {"module_session_id": "module-1", "result_request_id": "req-1",
+                 "options": {"page_size": 100}}})
+
+    assert handler.responses == []
+    request_id, func, kwargs = handler.started_requests[0]
+    assert request_id == "req-2"
+    # The open result lives on the user session
+    assert kwargs["session"] is user_session
+
+    func(**kwargs)
+    task = user_session._request_queue.get_nowait()
+    assert isinstance(task, DbFetchMoreTask)
+    assert service_session._request_queue.empty()
+
+    results = []
+    task.result_callback = on_result
+    task.execute()
+
+    assert collect_rows(results) == [[row] for row in range(10, 50)]
+    assert user_session.get_open_result("req-1") is None
+
+
+def test_open_result_idle_timeout():
+    session = PagingTestSession("paging", False, {})
+    session.execute_thread("SELECT 10", None)
+    session.set_open_result("req-1", DbResultCursor(
+        session, page_size=5, idle_timeout=0.05))
+
+    # The task comes after the idle timeout, so the result is closed while
+    # waiting for it
+    threading.Timer(0.2, lambda: session.add_task("task")).start()
+
+    assert session._get_next_task() == "task"
+    assert session.get_open_result("req-1") is None
+    assert session.closed_results == 1
+
+
+def test_cancel_running_task_between_packets():
+    session = PagingTestSession("paging", False, {})
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+        if data is not None and data.get("rows"):
+            session.cancel_request("req-1")
+
+    task = DbSqlTask(session, task_id="req-1", sql="SELECT 100000",
+                     result_callback=on_result, options={"row_packet_size": 10})
+    session._set_current_task(task)
+    task.execute()
+    session._set_current_task(None)
+
+    # The reading stops after the first packet of rows
+    assert task.cancelled
+    assert collect_rows(results) == [[row] for row in range(10)]
+    assert session.rows_read == 11
+    assert session.get_open_result("req-1") is None
+
+
+def test_cancel_queued_task(monkeypatch):
+    session = PagingTestSession("paging", False, {})
+
+    session.cancel_request("req-1")
+    task = DbSqlTask(session, task_id="req-1", sql="SELECT 1")
+    session._set_current_task(task)
+    assert task.cancelled
+    assert session._cancel_requests == {}
+
+    # Expired cancellations are ignored and purged
+    monkeypatch.setattr(DbSession, "CANCEL_REQUEST_TTL", 0)
+    session.cancel_request("req-2")
+    task = DbSqlTask(session, task_id="req-2", sql="SELECT 1")
+    session._set_current_task(task)
+    assert not task.cancelled
+
+    for index in range(100):
+        session.cancel_request(f"req-{index}")
+    assert len(session._cancel_requests) <= 1
+
+
+def test_cancel_user_session_request():
+    user_session = PagingTestSession("user", False, {})
+    service_session = PagingTestSession("service", False, {})
+    pool_cancellations = []
+    service_session.metadata_pool = SimpleNamespace(
+        cancel_request=pool_cancellations.append)
+    module_session = SqlEditorModuleSessionStub(user_session, service_session)
+    results = []
+
+    def on_result(state, message, task_id, data):
+        results.append((state, message, data))
+        if data is not None and data.get("rows"):
+            module_session.cancel_request("req-1")
+
+    task = DbSqlTask(user_session, task_id="req-1", sql="SELECT 100000",
+                     result_callback=on_result, options={"row_packet_size": 10})
+    user_session._set_current_task(task)
+    task.execute()
+    user_session._set_current_task(None)
+
+    # The query running on the user session stops after the first packet
+    assert task.cancelled
+    assert collect_rows(results) == [[row] for row in range(10)]
+    assert results[-1][0] == "CANCELLED"
+    # The request is also cancelled on the other sessions, in case it runs
+    # there
+    assert pool_cancellations == ["req-1"]
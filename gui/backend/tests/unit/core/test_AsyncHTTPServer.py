@@ -0,0 +1,204 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import base64
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+import gui_plugin.core.WebSocketCommon as WebSocket
+from gui_plugin.core.AsyncHTTPServer import AsyncHTTPServer
+from gui_plugin.core.HTTPWebSocketsHandler import HTTPWebSocketsHandler
+
+
+class EchoHandler(HTTPWebSocketsHandler):
+    # Released to let the handlers receiving a "wait" message continue
+    gate = threading.Event()
+
+    def on_ws_connected(self):
+        self.packet = None
+
+    def on_ws_message(self, frame):
+        if frame.is_initial_fragment:
+            self.packet = WebSocket.Packet()
+        self.packet.append(frame)
+        if self.packet.done():
+            message = self.packet.message
+            if message == "wait":
+                EchoHandler.gate.wait(5)
+            elif message.startswith("flood"):
+                # Sends more data than the client socket buffers can hold
+                for _ in range(int(message[5:])):
+                    self.send_message("x" * 4000)
+            self.send_message(message)
+
+    def on_ws_sending_message(self, message):
+        return message
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = AsyncHTTPServer(('127.0.0.1', 0), EchoHandler)
+    server.daemon_threads = True
+    server.single_instance_token = None
+    server.compression = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    EchoHandler.gate.clear()
+
+    yield server
+
+    EchoHandler.gate.set()
+    server.force_stop()
+    thread.join()
+    server.server_close()
+
+
+def connect(server):
+    sock = socket.create_connection(server.server_address, timeout=10)
+    key = base64.b64encode(os.urandom(16)).decode()
+    sock.sendall(("GET / HTTP/1.1\r\n"
+                  "Host: localhost\r\n"
+                  "Upgrade: websocket\r\n"
+                  "Connection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    response = b""
+    while not response.endswith(b"\r\n\r\n"):
+        response += sock.recv(1)
+    assert response.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def send_text(sock, text):
+    payload = text.encode()
+    mask_key = os.urandom(4)
+    length = len(payload)
+    if length <= 125:
+        header = struct.pack(">BB", 0x81, 0x80 | length)
+    else:
+        header = struct.pack(">BBH", 0x81, 0x80 | 126, length)
+    sock.sendall(header + mask_key + WebSocket.unmask(payload, mask_key))
+
+
+def receive_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        assert chunk
+        data += chunk
+    return data
+
+
+def receive_text(sock):
+    first, length = receive_exactly(sock, 2)
+    assert first == 0x81
+    if length == 126:
+        length = struct.unpack(">H", receive_exactly(sock, 2))[0]
+    return receive_exactly(sock, length).decode()
+
+
+def test_echo(server):
+    sock = connect(server)
+
+    for text in ["hello", "x" * 1000]:
+        send_text(sock, text)
+        assert receive_text(sock) == text
+
+    sock.close()
+
+
+def test_connections_do_not_keep_threads(server):
+    connection_count = 50
+    sockets = [connect(server) for _ in range(connection_count)]
+
+    for _ in range(100):
+        if server.connection_count == connection_count:
+            break
+        threading.Event().wait(0.01)
+    assert server.connection_count == connection_count
+
+    # The handshake threads are done once the connections are handed over
+    for _ in range(100):
+        if threading.active_count() < connection_count:
+            break
+        threading.Event().wait(0.01)
+    assert threading.active_count() < connection_count
+
+    for index, sock in enumerate(sockets):
+        send_text(sock, f"message {index}")
+    for index, sock in enumerate(sockets):
+        assert receive_text(sock) == f"message {index}"
+
+    for sock in sockets:
+        sock.close()
+
+    for _ in range(100):
+        if server.connection_count == 0:
+            break
+        threading.Event().wait(0.01)
+    assert server.connection_count == 0
+
+
+def test_handlers_do_not_block_the_event_loop(server):
+    waiting = connect(server)
+    other = connect(server)
+
+    # The message is processed by a handler worker, the other connections
+    # are still served while it waits
+    send_text(waiting, "wait")
+    send_text(other, "hello")
+    assert receive_text(other) == "hello"
+
+    EchoHandler.gate.set()
+    assert receive_text(waiting) == "wait"
+
+    waiting.close()
+    other.close()
+
+
+def test_slow_clients_do_not_block_other_connections(server):
+    slow = connect(server)
+    other = connect(server)
+
+    # The slow client does not read the responses, they are buffered by the
+    # server
+    send_text(slow, "flood2000")
+    threading.Event().wait(0.2)
+
+    send_text(other, "hello")
+    assert receive_text(other) == "hello"
+
+    for _ in range(2000):
+        assert receive_text(slow) == "x" * 4000
+    assert receive_text(slow) == "flood2000"
+
+    slow.close()
+    other.close()
@@ -0,0 +1,113 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import uuid
+
+import pytest
+
+from gui_plugin.core.BackendDbLogger import BackendDbLogger
+from gui_plugin.core.Db import GuiBackendDb
+
+
+@pytest.fixture
+def logger_config():
+    config = {
+        "durable": BackendDbLogger.durable,
+        "max_batch_size": BackendDbLogger.max_batch_size,
+        "max_latency": BackendDbLogger.max_latency,
+        "max_queue_size": BackendDbLogger.max_queue_size,
+    }
+
+    yield
+
+    BackendDbLogger.configure(**config)
+
+
+def count_log_entries(message):
+    db = GuiBackendDb()
+    try:
+        return db.execute("SELECT COUNT(*) FROM `gui_log`.`log` WHERE message = ?",
+                          (message,)).fetch_one()[0]
+    finally:
+        db.close()
+
+
+def test_batched_writes(logger_config):
+    BackendDbLogger.configure(durable=False, max_batch_size=10, max_latency=1)
+    stats = BackendDbLogger.get_stats()
+
+    message = f"__TEST BATCH {uuid.uuid1()}__"
+    for _ in range(25):
+        assert BackendDbLogger.log("INFO", message)
+    BackendDbLogger.flush()
+
+    new_stats = BackendDbLogger.get_stats()
+    assert new_stats["written_entries"] - stats["written_entries"] == 25
+    assert new_stats["batches"] - stats["batches"] == 3
+    assert new_stats["max_batch_size"] == 10
+    assert new_stats["queue_depth"] == 0
+
+    assert count_log_entries(message) == 25
+
+
+def test_durable_writes(logger_config):
+    BackendDbLogger.configure(durable=True)
+    stats = BackendDbLogger.get_stats()
+
+    message = f"__TEST DURABLE {uuid.uuid1()}__"
+    assert BackendDbLogger.log("INFO", message)
+
+    # The entry is written before returning
+    assert count_log_entries(message) == 1
+    assert BackendDbLogger.get_stats()["batches"] == stats["batches"]
+
+
+def test_configure_while_logging(logger_config):
+    BackendDbLogger.configure(durable=False)
+    stats = BackendDbLogger.get_stats()
+
+    message = f"__TEST CONFIGURE {uuid.uuid1()}__"
+
+    def log_entries():
+        for _ in range(100):
+            assert BackendDbLogger.log("INFO", message)
+
+    threads = [threading.Thread(target=log_entries) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    # Reconfiguring does not drop the entries queued meanwhile
+    for i in range(20):
+        BackendDbLogger.configure(max_batch_size=1 + i % 5,
+                                  max_latency=0.001 * i,
+                                  max_queue_size=50 + i)
+
+    for thread in threads:
+        thread.join()
+    BackendDbLogger.flush()
+
+    new_stats = BackendDbLogger.get_stats()
+    assert new_stats["queued_entries"] - stats["queued_entries"] == 400
+    assert new_stats["rejected_entries"] == stats["rejected_entries"]
+    assert count_log_entries(message) == 400
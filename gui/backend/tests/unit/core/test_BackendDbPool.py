@@ -0,0 +1,98 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import datetime
+
+import pytest
+
+from gui_plugin.core.BackendDbPool import BackendDbPool
+from gui_plugin.core.Db import BackendDatabase, GuiBackendDb
+
+
+@pytest.fixture
+def pool():
+    max_idle_connections = BackendDbPool.max_idle_connections
+    pool = BackendDbPool.get_instance()
+    pool.clear()
+
+    yield pool
+
+    BackendDbPool.configure(max_idle_connections=max_idle_connections)
+
+
+def test_connections_are_reused(pool):
+    stats = pool.get_stats()
+
+    with BackendDatabase() as db:
+        db.select("SELECT * FROM data_category")
+        assert pool.get_stats()["checked_out_connections"] == \
+            stats["checked_out_connections"] + 1
+
+    with BackendDatabase() as db:
+        db.select("SELECT * FROM data_category")
+
+    new_stats = pool.get_stats()
+    assert new_stats["created_connections"] == stats["created_connections"] + 1
+    assert new_stats["reused_connections"] == stats["reused_connections"] + 1
+    assert new_stats["checked_out_connections"] == stats["checked_out_connections"]
+    assert new_stats["idle_connections"] == 1
+
+
+def test_connections_are_checked_out_once(pool):
+    db1 = GuiBackendDb()
+    db2 = GuiBackendDb()
+    assert db1._db is not db2._db
+
+    db1.close()
+    db1.close()
+    db2.close()
+
+    assert pool.get_stats()["idle_connections"] == 2
+
+
+def test_open_transaction_is_rolled_back(pool):
+    db = GuiBackendDb()
+    count = db.execute("SELECT COUNT(*) FROM log").fetch_one()[0]
+
+    db.start_transaction()
+    db.execute('''INSERT INTO log(event_time, event_type, message)
+                  VALUES(?, ?, ?)''',
+               (datetime.datetime.now(), 'INFO', '__TEST MESSAGE__'))
+    db.close()
+
+    db = GuiBackendDb()
+    assert db.execute("SELECT COUNT(*) FROM log").fetch_one()[0] == count
+    db.close()
+
+
+def test_idle_connections_are_limited(pool):
+    BackendDbPool.configure(max_idle_connections=1)
+    stats = pool.get_stats()
+
+    dbs = [GuiBackendDb() for _ in range(3)]
+    for db in dbs:
+        db.close()
+
+    new_stats = pool.get_stats()
+    assert new_stats["idle_connections"] == 1
+    assert new_stats["closed_connections"] == stats["closed_connections"] + 2
@@ -0,0 +1,94 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import base64
+import datetime
+import decimal
+import json
+
+import pytest
+
+import gui_plugin.core.ColumnarResult as ColumnarResult
+
+
+def make_message(rows, **result):
+    return {
+        "request_state": {"type": "PENDING", "msg": "Executing..."},
+        "request_id": "2d3a7a5c-9a3b-11ee-b9d1-0242ac120002",
+        "result": {"rows": ColumnarResult.ColumnarRows(rows), **result}
+    }
+
+
+def test_get_rows():
+    assert ColumnarResult.get_rows(None) is None
+    assert ColumnarResult.get_rows({"result": {"rows": []}}) is None
+    assert ColumnarResult.get_rows(make_message([(1,)])) == [(1,)]
+
+
+@pytest.mark.parametrize("rows, expected", [
+    ([], []),
+    ([(1, 1.5, "a", b"\x00\xff", None)],
+     [[1, 1.5, "a", b"\x00\xff", None]]),
+    ([(None, None), (-2 ** 63, "ñandú"), (2 ** 63 - 1, None)],
+     [[None, None], [-2 ** 63, "ñandú"], [2 ** 63 - 1, None]]),
+    # Values without a native representation are sent as strings
+    ([(2 ** 64 - 1, decimal.Decimal("1.10"), datetime.date(2024, 1, 2))],
+     [["18446744073709551615", "1.10", "2024-01-02"]]),
+    # Columns with mixed types are sent as strings
+    ([(1,), (1.5,), ("a",)], [["1"], ["1.5"], ["a"]]),
+    # Booleans are kept as booleans, not as integers
+    ([(True, 1), (None, 0), (False, None)],
+     [[True, 1], [None, 0], [False, None]]),
+    ([(True,), (2,)], [["True"], ["2"]]),
+])
+def test_encode_decode(rows, expected):
+    message = make_message(rows, columns=[{"name": "c"}], done=False)
+
+    envelope, data = ColumnarResult.encode(message)
+
+    assert "rows" not in json.loads(envelope)["result"]
+    assert data.startswith(ColumnarResult.MAGIC)
+
+    decoded = ColumnarResult.decode(data)
+    assert decoded["request_id"] == message["request_id"]
+    assert decoded["result"]["columns"] == [{"name": "c"}]
+    assert decoded["result"]["done"] is False
+    assert decoded["result"]["rows"] == expected
+    assert [[type(value) for value in row] for row in decoded["result"]["rows"]] == \
+        [[type(value) for value in row] for row in expected]
+
+
+def test_invalid_message():
+    with pytest.raises(ValueError):
+        ColumnarResult.decode(b"{}")
+
+
+def test_size_compared_to_json():
+    rows = [(index, f"name_{index}", index * 1.5, bytes(range(64)))
+            for index in range(1000)]
+
+    json_size = len(json.dumps(make_message(
+        [(r[0], r[1], r[2], base64.b64encode(r[3]).decode()) for r in rows])))
+    _, data = ColumnarResult.encode(make_message(rows))
+
+    assert len(data) < json_size
@@ -22,7 +22,8 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
 import shutil
-from gui_plugin.core.Db import GuiBackendDb, BackendSqliteDbManager, convert_workbench_sql_file_to_sqlite, convert_all_workbench_sql_files_to_sqlite
+from gui_plugin.core.Db import GuiBackendDb, convert_workbench_sql_file_to_sqlite, convert_all_workbench_sql_files_to_sqlite
+from gui_plugin.core.GuiBackendDbManager import BackendSqliteDbManager
 import datetime
 import os
 import sqlite3
@@ -129,6 +130,40 @@ def test_GuiBackendDb_select_rows():
     backend_db.close()
 
 
+def test_GuiBackendDb_select_json_columns():
+    backend_db = GuiBackendDb()
+
+    result = backend_db.select(
+        """SELECT '{"a": 1}' AS options, '{"b": 2}' AS caption""")
+
+    # Only the columns registered as JSON are decoded
+    assert result == [{"options": {"a": 1}, "caption": '{"b": 2}'}]
+
+    # The first of the columns with the same name is used
+    result = backend_db.select("SELECT 1 AS name, 2 AS id, 3 AS name")
+    assert result == [{"name": 1, "id": 2}]
+
+    backend_db.close()
+
+
+def test_GuiBackendDb_select_iter():
+    backend_db = GuiBackendDb()
+
+    rows = backend_db.select_iter("""WITH RECURSIVE
+            numbers(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM numbers
+                WHERE i < 100000)
+        SELECT i AS id, '{"index": ' || i || '}' AS options FROM numbers""")
+
+    assert next(rows) == {"id": 1, "options": {"index": 1}}
+    assert sum(1 for _ in rows) == 99999
+
+    assert list(backend_db.select_iter(
+        "CREATE TEMP TABLE select_iter_test(id INTEGER)")) == []
+    backend_db.execute("DROP TABLE temp.select_iter_test")
+
+    backend_db.close()
+
+
 def test_GuiBackendDb_check_for_previous_version_and_upgrade():
     backend_db = BackendSqliteDbManager()
 
@@ -300,3 +335,62 @@ def test_backup_logs():
 
         os.chdir(current_dir)
         assert os.path.exists(backup_file)
+
+
+def test_rotate_logs_in_batches():
+    current_dir = os.getcwd()
+    current_create_script = os.path.join(
+        current_dir, 'gui_plugin', 'core', 'db_schema', f'mysqlsh_gui_backend.sqlite.sql')
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        os.chdir(tmpdirname)
+        conn = sqlite3.connect(os.path.join(tmpdirname, "mysqlsh_gui_backend.sqlite3"))
+        with open(current_create_script, 'r') as sql_file:
+            conn.executescript(sql_file.read())
+        conn.execute("PRAGMA foreign_keys = OFF")
+
+        yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
+        now = datetime.datetime.now()
+        conn.executemany("INSERT INTO logs.log(event_time, event_type, message) VALUES(?, 'INFO', ?)",
+                         [(yesterday if i < 250 else now, f"log {i}") for i in range(300)])
+        conn.executemany("INSERT INTO logs.message(session_id, is_response, message, sent) VALUES(1, 0, ?, ?)",
+                         [(f"message {i}", yesterday if i < 95 else now) for i in range(100)])
+        conn.commit()
+        conn.close()
+        os.chdir(current_dir)
+
+        connection_options = {"db_dir": tmpdirname,
+                              "database_name": "main",
+                              "db_file": os.path.join(tmpdirname, f'mysqlsh_gui_backend.sqlite3'),
+                              "attach": [
+                                  {
+                                      "database_name": "gui_log",
+                                      "db_file": os.path.join(tmpdirname, f'mysqlsh_gui_backend_log.sqlite3')
+                                  }]}
+        db_manager = BackendSqliteDbManager(log_rotation=False,
+                                            session_uuid=None,
+                                            connection_options=connection_options)
+        db_manager._config["log_rotation_batch_size"] = 40
+        db_manager._config["log_rotation_batch_delay"] = 0
+
+        db_manager.rotate_logs(wait=True)
+
+        backup_file = os.path.join(tmpdirname,
+                                   f"mysqlsh_gui_backend_log_{datetime.date.today().strftime('%Y.%m.%d')}.sqlite3")
+        conn = sqlite3.connect(backup_file)
+        assert conn.execute("SELECT COUNT(*) FROM log").fetchone()[0] == 250
+        assert conn.execute("SELECT COUNT(*) FROM message").fetchone()[0] == 95
+        conn.close()
+
+        conn = sqlite3.connect(os.path.join(tmpdirname, "mysqlsh_gui_backend_log.sqlite3"))
+        assert conn.execute("SELECT COUNT(*) FROM log").fetchone()[0] == 50
+        assert conn.execute("SELECT COUNT(*) FROM message").fetchone()[0] == 5
+        # Incremental vacuum is enabled after the first rotation
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+
+        db = db_manager.open_database()
+        try:
+            assert not db_manager.check_if_logs_need_rotation(db)
+        finally:
+            db.close()
@@ -0,0 +1,209 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+
+import pytest
+
+from gui_plugin.core.RequestExecutor import RequestExecutor
+
+
+class Request:
+    def __init__(self, name, executed, gate=None):
+        self.name = name
+        self.executed = executed
+        self.gate = gate
+        self.done = threading.Event()
+
+    def get_context(self):
+        return None
+
+    def on_shell_print(self, text):
+        pass
+
+    on_shell_print_diag = on_shell_print
+    on_shell_print_error = on_shell_print
+
+    def on_shell_prompt(self, text, options):
+        return [False, None]
+
+    def execute(self, shell):
+        if self.gate:
+            self.gate.wait()
+        self.executed.append(self.name)
+        self.done.set()
+
+
+@pytest.fixture
+def executor():
+    config = {
+        "max_workers": RequestExecutor.max_workers,
+        "max_queue_size": RequestExecutor.max_queue_size,
+        "idle_timeout": RequestExecutor.idle_timeout,
+    }
+    executor = RequestExecutor.get_instance()
+
+    yield executor
+
+    RequestExecutor.configure(**config)
+
+
+def wait_until_idle(executor):
+    for _ in range(500):
+        stats = executor.get_stats()
+        if stats["queue_depth"] == 0 and stats["active_requests"] == 0:
+            return
+        threading.Event().wait(0.01)
+    raise Exception("The requests were not executed")
+
+
+def wait_until_active(executor):
+    for _ in range(500):
+        if executor.get_stats()["active_requests"] == 1:
+            return
+        threading.Event().wait(0.01)
+    raise Exception("The request was not started")
+
+
+def test_sessions_are_served_in_turns(executor):
+    RequestExecutor.configure(max_workers=1)
+    wait_until_idle(executor)
+
+    executed = []
+    gate = threading.Event()
+    blocker = Request("blocker", executed, gate)
+    executor.submit(blocker, "session_a")
+    wait_until_active(executor)
+
+    for i in range(3):
+        executor.submit(Request(f"a{i}", executed), "session_a")
+    for i in range(3):
+        executor.submit(Request(f"b{i}", executed), "session_b")
+
+    gate.set()
+    wait_until_idle(executor)
+
+    assert executed == ["blocker", "a0", "b0", "a1", "b1", "a2", "b2"]
+
+
+def test_queue_limit(executor):
+    RequestExecutor.configure(max_workers=1, max_queue_size=2)
+    wait_until_idle(executor)
+    stats = executor.get_stats()
+
+    executed = []
+    gate = threading.Event()
+    blocker = Request("blocker", executed, gate)
+    executor.submit(blocker, "session")
+    # Wait for the worker to pick the request so it is not in the queue
+    wait_until_active(executor)
+
+    executor.submit(Request("first", executed), "session")
+    executor.submit(Request("second", executed), "session")
+    with pytest.raises(Exception, match="too many requests"):
+        executor.submit(Request("third", executed), "session")
+
+    gate.set()
+    wait_until_idle(executor)
+
+    assert executed == ["blocker", "first", "second"]
+    new_stats = executor.get_stats()
+    assert new_stats["rejected_requests"] - stats["rejected_requests"] == 1
+    assert new_stats["max_queue_size"] == 2
+
+
+def test_workers_are_reused(executor):
+    RequestExecutor.configure(max_workers=4)
+    wait_until_idle(executor)
+    stats = executor.get_stats()
+
+    executed = []
+    for i in range(20):
+        request = Request(i, executed)
+        executor.submit(request, "session")
+        request.done.wait()
+
+    wait_until_idle(executor)
+    new_stats = executor.get_stats()
+
+    assert executed == list(range(20))
+    assert new_stats["completed_requests"] - stats["completed_requests"] == 20
+    assert new_stats["workers"] <= 4
+    assert new_stats["created_workers"] - stats["created_workers"] <= 1
+    assert new_stats["created_shell_contexts"] - \
+        stats["created_shell_contexts"] <= 1
+
+
+def test_shell_contexts_are_scoped_by_key(executor):
+    RequestExecutor.configure(max_workers=1)
+    wait_until_idle(executor)
+    stats = executor.get_stats()
+
+    executed = []
+    for key in ["user_a", "user_b", "user_a", "user_b"]:
+        request = Request(key, executed)
+        executor.submit(request, "session", context_key=key)
+        request.done.wait()
+
+    wait_until_idle(executor)
+    new_stats = executor.get_stats()
+
+    # The context of a user is never given to the requests of another one
+    assert new_stats["created_shell_contexts"] - \
+        stats["created_shell_contexts"] == 2
+    assert new_stats["reused_shell_contexts"] - \
+        stats["reused_shell_contexts"] == 2
+
+
+class PromptRequest(Request):
+    def execute(self, shell):
+        # Like a request waiting for the reply to a prompt
+        executor = RequestExecutor.get_instance()
+        executor.begin_wait()
+        try:
+            self.gate.wait()
+        finally:
+            executor.end_wait()
+        super().execute(shell)
+
+
+def test_waiting_requests_do_not_hold_workers(executor):
+    RequestExecutor.configure(max_workers=1)
+    wait_until_idle(executor)
+
+    executed = []
+    gate = threading.Event()
+    prompt = PromptRequest("prompt", executed, gate)
+    executor.submit(prompt, "session_a")
+    wait_until_active(executor)
+
+    request = Request("other", executed)
+    executor.submit(request, "session_b")
+    assert request.done.wait(5)
+
+    gate.set()
+    assert prompt.done.wait(5)
+    wait_until_idle(executor)
+
+    assert executed == ["other", "prompt"]
+    assert executor.get_stats()["blocked_workers"] == 0
@@ -0,0 +1,88 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+
+import gui_plugin.core.Context as context
+from gui_plugin.core.RequestHandler import RequestHandler
+
+
+class WebHandler:
+    session_user_id = 1
+    session_uuid = "session"
+
+    def __init__(self):
+        self.responses = []
+        self.done = threading.Event()
+
+    def send_command_response(self, request_id, response):
+        self.responses.append((request_id, response))
+
+    def send_command_done(self, request_id):
+        self.responses.append((request_id, "done"))
+        self.done.set()
+
+
+class Worker(threading.Thread):
+    """Executes a request like the RequestExecutor workers"""
+
+    def __init__(self, request):
+        super().__init__(target=lambda: request.execute(None))
+        self.request = request
+
+    def get_context(self):
+        return self.request.get_context()
+
+
+def test_worker_is_released_while_the_task_runs():
+    web_handler = WebHandler()
+    events = []
+
+    def submit_task():
+        # Like a DB session task created by the API
+        events.append(context.set_completion_event())
+
+    worker = Worker(RequestHandler("req-1", submit_task, {}, web_handler))
+    worker.start()
+    worker.join(5)
+
+    # The worker is done before the task completes
+    assert not worker.is_alive()
+    assert web_handler.responses == []
+
+    # The request is completed by the thread setting the completion event
+    events[0].add_error(Exception("Query failed"))
+    assert not web_handler.done.is_set()
+    assert [request_id for request_id, _ in web_handler.responses] == ["req-1"]
+    assert web_handler.responses[0][1]["request_state"]["type"] == "ERROR"
+
+
+def test_request_without_task_completes_on_the_worker():
+    web_handler = WebHandler()
+
+    worker = Worker(RequestHandler("req-1", lambda: None, {}, web_handler))
+    worker.start()
+    worker.join(5)
+
+    assert web_handler.done.is_set()
+    assert web_handler.responses == [("req-1", "done")]
@@ -0,0 +1,348 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import io
+import json
+import os
+import struct
+import zlib
+
+import pytest
+
+import gui_plugin.core.WebSocketCommon as WebSocket
+
+
+class Buffer:
+    def __init__(self):
+        self.data = b""
+
+    def send(self, data):
+        self.data += data
+
+
+def build_frame(payload, opcode=WebSocket.Operation.TextFrame, final=True,
+                mask_key=b"\x12\x34\x56\x78", compressed=False):
+    """Builds a masked client frame as a browser would send it"""
+    word0 = WebSocket.Word0()
+    word0.bits.final_fragment = final
+    word0.bits.compressed = compressed
+    word0.bits.opcode = opcode
+    word0.bits.masked = True
+
+    length = len(payload)
+    extended = b""
+    if length <= 125:
+        word0.bits.payload = length
+    elif length <= 65535:
+        word0.bits.payload = 126
+        extended = struct.pack(">H", length)
+    else:
+        word0.bits.payload = 127
+        extended = struct.pack(">Q", length)
+
+    masked = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload)) \
+        if length <= 65535 else WebSocket.unmask(payload, mask_key)
+
+    return struct.pack("<H", word0.bytes) + extended + mask_key + masked
+
+
+@pytest.mark.parametrize("length", [0, 1, 3, 4, 5, 125, 126, 65535, 65536])
+def test_unmask(length):
+    payload = os.urandom(length)
+    mask_key = os.urandom(4)
+    expected = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload))
+
+    assert WebSocket.unmask(payload, mask_key) == expected
+    assert WebSocket.unmask(expected, mask_key) == payload
+
+
+def test_receive_text_frame():
+    message = "SELECT 'ñandú' FROM dual;" * 10
+    frame = WebSocket.FrameReceiver(io.BytesIO(build_frame(message.encode())))
+
+    assert frame.opcode == WebSocket.Operation.TextFrame
+    assert frame.is_final_fragment
+    assert frame.message == message
+
+
+@pytest.mark.parametrize("length", [0, 125, 126, 65535, 65536])
+def test_frame_size(length):
+    data = build_frame(b"x" * length)
+
+    assert WebSocket.FrameReceiver.frame_size(data[:1]) is None
+    if length > 125:
+        assert WebSocket.FrameReceiver.frame_size(data[:3]) is None
+    assert WebSocket.FrameReceiver.frame_size(data) == len(data)
+    assert WebSocket.FrameReceiver.frame_size(data + b"next") == len(data)
+
+
+def test_receive_control_frames():
+    frame = WebSocket.FrameReceiver(io.BytesIO(
+        build_frame(b"ping", opcode=WebSocket.Operation.Ping)))
+    assert frame.is_control_message
+    assert frame.message == "ping"
+    assert frame.payload == b"ping"
+
+    frame = WebSocket.FrameReceiver(io.BytesIO(
+        build_frame(struct.pack(">H", WebSocket.WEBSOCKET_CLOSED_BY_CLIENT) + b"bye",
+                    opcode=WebSocket.Operation.Close)))
+    assert frame.error == WebSocket.WEBSOCKET_CLOSED_BY_CLIENT
+    assert frame.message == "bye"
+
+
+def test_packet_assembles_fragments():
+    # The split point falls in the middle of a multi byte UTF-8 sequence
+    encoded = ("abc" + "ñ" * 100).encode()
+    fragments = [encoded[:4], encoded[4:101], encoded[101:]]
+
+    stream = io.BytesIO(
+        build_frame(fragments[0], final=False) +
+        build_frame(fragments[1], opcode=WebSocket.Operation.ContinuationFrame,
+                    final=False) +
+        build_frame(fragments[2], opcode=WebSocket.Operation.ContinuationFrame))
+
+    packet = WebSocket.Packet()
+    for _ in fragments:
+        packet.append(WebSocket.FrameReceiver(stream))
+
+    assert packet.done()
+    assert packet.message == encoded.decode()
+
+
+def test_packet_send_fragments():
+    message = "ñ" * (WebSocket.FRAGMENT_SIZE * 2 + 10)
+    packet = WebSocket.Packet(message)
+    assert len(packet.frames) == 3
+    assert packet.message == message
+
+    buffer = Buffer()
+    packet.send(buffer)
+
+    # The declared payload length must match the UTF-8 encoded length
+    word0 = WebSocket.Word0()
+    word0.bytes = struct.unpack("<H", buffer.data[:2])[0]
+    assert word0.bits.payload == 126
+    assert struct.unpack(">H", buffer.data[2:4])[0] == \
+        len(("ñ" * WebSocket.FRAGMENT_SIZE).encode())
+
+
+def test_packet_send_binary():
+    data = os.urandom(WebSocket.FRAGMENT_SIZE + 10)
+    packet = WebSocket.Packet(data)
+
+    assert packet.is_binary
+    assert len(packet.frames) == 2
+    assert packet.frames[0].opcode == WebSocket.Operation.BinaryFrame
+    assert packet.frames[1].opcode == WebSocket.Operation.ContinuationFrame
+    assert bytes(packet.payload) == data
+
+
+def read_server_messages(data, decompressor=None):
+    """Parses the unmasked frames sent by the server as a client would"""
+    messages = []
+    payload = b""
+    compressed = False
+    stream = io.BytesIO(data)
+    while stream.tell() < len(data):
+        word0 = WebSocket.Word0()
+        word0.bytes = struct.unpack("<H", stream.read(2))[0]
+        length = word0.bits.payload
+        if length == 126:
+            length = struct.unpack(">H", stream.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", stream.read(8))[0]
+
+        if word0.bits.opcode != WebSocket.Operation.ContinuationFrame:
+            compressed = bool(word0.bits.compressed)
+        payload += stream.read(length)
+
+        if word0.bits.final_fragment:
+            if compressed:
+                payload = decompressor.decompress(
+                    payload + WebSocket.DEFLATE_TAIL)
+            messages.append(payload.decode())
+            payload = b""
+
+    return messages
+
+
+@pytest.mark.parametrize("header, options, expected", [
+    (None, {}, None),
+    ("x-webkit-deflate-frame", {}, None),
+    ("permessage-deflate; client_max_window_bits", {}, "permessage-deflate"),
+    ("permessage-deflate; client_max_window_bits",
+     {"client_max_window_bits": 10},
+     "permessage-deflate; client_max_window_bits=10"),
+    ("permessage-deflate; server_max_window_bits=10", {},
+     "permessage-deflate; server_max_window_bits=10"),
+    ("permessage-deflate; server_no_context_takeover", {},
+     "permessage-deflate; server_no_context_takeover"),
+    ("permessage-deflate", {"client_no_context_takeover": True},
+     "permessage-deflate; client_no_context_takeover"),
+    ("permessage-deflate; unknown_param, permessage-deflate", {},
+     "permessage-deflate"),
+    ("permessage-deflate; server_max_window_bits=20", {}, None),
+    # zlib can not produce raw deflate streams with a window of 8 bits
+    ("permessage-deflate; server_max_window_bits=8", {}, None),
+    ("permessage-deflate; server_max_window_bits=8, permessage-deflate; server_max_window_bits=9",
+     {}, "permessage-deflate; server_max_window_bits=9"),
+])
+def test_deflate_negotiation(header, options, expected):
+    deflate = WebSocket.PerMessageDeflate.negotiate(header, options)
+
+    if expected is None:
+        assert deflate is None
+    else:
+        assert deflate.response_header() == expected
+
+
+@pytest.mark.parametrize("context_takeover", [True, False])
+def test_deflate_send(context_takeover):
+    deflate = WebSocket.PerMessageDeflate.negotiate(
+        "permessage-deflate",
+        {"threshold": 100, "server_no_context_takeover": not context_takeover})
+    decompressor = zlib.decompressobj(-15)
+
+    messages = ["small", json.dumps(list(range(5000))),
+                json.dumps(list(range(5000)))]
+    buffer = Buffer()
+    packets = [WebSocket.Packet(message, deflate) for message in messages]
+    for packet in packets:
+        packet.send(buffer)
+
+    assert not packets[0].is_compressed
+    assert packets[1].is_compressed
+    assert packets[1].message == messages[1]
+    assert read_server_messages(buffer.data, decompressor) == messages
+
+    # With context takeover the repeated message is just a back reference
+    if context_takeover:
+        assert len(packets[2].payload) < len(packets[1].payload)
+    else:
+        assert len(packets[2].payload) == len(packets[1].payload)
+
+
+def test_deflate_receive():
+    deflate = WebSocket.PerMessageDeflate.negotiate("permessage-deflate", {})
+    message = json.dumps({"request": "execute", "args": {
+        "sql": "SELECT 1;" * 1000}})
+
+    compressor = zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(message.encode()) + \
+        compressor.flush(zlib.Z_SYNC_FLUSH)
+    compressed = compressed[:-len(WebSocket.DEFLATE_TAIL)]
+
+    stream = io.BytesIO(
+        build_frame(compressed[:10], final=False, compressed=True) +
+        build_frame(compressed[10:], opcode=WebSocket.Operation.ContinuationFrame))
+
+    packet = WebSocket.Packet(deflate=deflate)
+    packet.append(WebSocket.FrameReceiver(stream))
+    packet.append(WebSocket.FrameReceiver(stream))
+
+    assert packet.done()
+    assert packet.message == message
+
+    # Without the negotiated extension the message can not be decoded
+    stream.seek(0)
+    packet = WebSocket.Packet()
+    packet.append(WebSocket.FrameReceiver(stream))
+    packet.append(WebSocket.FrameReceiver(stream))
+    with pytest.raises(WebSocket.MessageError) as error:
+        packet.message
+    assert error.value.status == WebSocket.CloseStatus.ProtocolError
+
+
+def test_deflate_window_bits():
+    with pytest.raises(ValueError):
+        WebSocket.PerMessageDeflate.negotiate(
+            "permessage-deflate", {"server_max_window_bits": 8})
+
+    deflate = WebSocket.PerMessageDeflate.negotiate(
+        "permessage-deflate; server_max_window_bits=9", {"threshold": 0})
+    message = "".join(f"{index:05}" for index in range(20000))
+
+    # The client decompresses with the negotiated window
+    decompressor = zlib.decompressobj(-9)
+    compressed = deflate.compress(message.encode())
+    assert decompressor.decompress(
+        compressed + WebSocket.DEFLATE_TAIL).decode() == message
+
+
+def test_deflate_receive_limits():
+    deflate = WebSocket.PerMessageDeflate.negotiate(
+        "permessage-deflate", {"max_message_size": 1000})
+
+    compressor = zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(b"x" * 1000000) + \
+        compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    with pytest.raises(WebSocket.MessageError) as error:
+        deflate.decompress(compressed[:-len(WebSocket.DEFLATE_TAIL)])
+    assert error.value.status == WebSocket.CloseStatus.MessageTooBig
+
+    deflate = WebSocket.PerMessageDeflate.negotiate("permessage-deflate", {})
+    with pytest.raises(WebSocket.MessageError) as error:
+        deflate.decompress(b"\xff\xff\xff\xff")
+    assert error.value.status == WebSocket.CloseStatus.InvalidData
+
+
+def test_deflate_result_size():
+    # Emulates the PENDING responses of a 10k row result sent in packets of
+    # 25 rows
+    rows = [(index, f"name_{index}", f"2024-01-01 00:00:{index % 60:02}",
+             index * 1.5, None) for index in range(10000)]
+    messages = [json.dumps({
+        "request_state": {"type": "PENDING", "msg": "Executing..."},
+        "request_id": "2d3a7a5c-9a3b-11ee-b9d1-0242ac120002",
+        "rows": rows[offset:offset + 25],
+        "done": False}) for offset in range(0, len(rows), 25)]
+
+    sizes = {}
+    for name, deflate in [("uncompressed", None), ("deflate", WebSocket.PerMessageDeflate.negotiate(
+            "permessage-deflate", {}))]:
+        decompressor = zlib.decompressobj(-15)
+        buffer = Buffer()
+        buffer.data = bytearray()
+        for message in messages:
+            WebSocket.Packet(message, deflate).send(buffer)
+
+        assert read_server_messages(bytes(buffer.data), decompressor) == messages
+        sizes[name] = len(buffer.data)
+
+    assert sizes["deflate"] < sizes["uncompressed"] / 2
+
+
+@pytest.mark.parametrize("size", [1024, 64 * 1024, 16 * 1024 * 1024],
+                         ids=["1KB", "64KB", "16MB"])
+def test_receive_large_frames(size):
+    message = os.urandom(size // 2).hex()
+    mask_key = os.urandom(4)
+    frame = WebSocket.FrameReceiver(io.BytesIO(
+        build_frame(message.encode(), mask_key=mask_key)))
+
+    assert frame.is_final_fragment
+    assert frame.length == size
+    assert frame.message == message
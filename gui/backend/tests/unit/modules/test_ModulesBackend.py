@@ -0,0 +1,127 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+import pytest
+
+import gui_plugin.core.Error as Error
+from gui_plugin.core.Db import BackendDatabase
+from gui_plugin.core.Error import MSGException
+from gui_plugin.modules import backend
+
+TREE_IDENTIFIER = "TestModulesBackendTree"
+USER_ID = 987654
+PROFILE_ID = 987654
+USER_GROUP_ID = 987654
+
+
+@pytest.fixture
+def db():
+    # Everything is rolled back at the end of the test
+    with BackendDatabase() as db:
+        db.start_transaction()
+        yield db
+        db.rollback()
+
+
+def test_folder_paths(db):
+    root_folder_id = backend.create_profile_data_tree(
+        db, TREE_IDENTIFIER, PROFILE_ID)
+    folder_id, _ = backend.create_folder(db, "/scripts/server1",
+                                         root_folder_id)
+    other_id, _ = backend.create_folder(db, "server1", root_folder_id)
+
+    assert backend.get_folder_id(db, root_folder_id, "/scripts/server1") == \
+        folder_id
+    assert backend.get_folder_id(db, root_folder_id, "scripts/server1") == \
+        folder_id
+    assert backend.get_folder_id(db, root_folder_id, "server1") == other_id
+    assert backend.get_folder_id(db, root_folder_id, "/") == root_folder_id
+    assert backend.get_folder_id(db, root_folder_id, "scripts/server2") is None
+
+    folders = db.select(backend.FOLDERS_TREE_SQL, (root_folder_id,))
+    assert sorted(folder['caption'] for folder in folders) == \
+        sorted([TREE_IDENTIFIER, "scripts", "server1", "server1"])
+
+    # The folders are listed parent first
+    listed = set()
+    for folder in folders:
+        assert folder['parent_folder_id'] is None or \
+            folder['parent_folder_id'] in listed
+        listed.add(folder['id'])
+
+
+def test_user_privileges_for_data(db):
+    db.execute("INSERT INTO profile (id, user_id, name) VALUES(?, ?, ?)",
+               (PROFILE_ID, USER_ID, "test"))
+    db.execute("INSERT INTO user_group (id, name) VALUES(?, ?)",
+               (USER_GROUP_ID, "test"))
+    db.execute("""INSERT INTO user_group_has_user (user_group_id, user_id,
+                    owner) VALUES(?, ?, 1)""", (USER_GROUP_ID, USER_ID))
+    db.execute("""INSERT INTO data (data_category_id, caption)
+                    VALUES(1, 'test')""")
+    data_id = db.get_last_row_id()
+
+    backend.add_data_associations(db, data_id, TREE_IDENTIFIER,
+                                  "/scripts/server1", PROFILE_ID,
+                                  USER_GROUP_ID)
+
+    privileges = backend.get_user_privileges_for_data(db, data_id, USER_ID)
+    assert sorted(privileges, key=lambda p: p['type']) == [
+        {"type": "GROUP", "id": USER_GROUP_ID, "read_only": 0},
+        {"type": "PROFILE", "id": PROFILE_ID, "read_only": 0}]
+
+    with pytest.raises(MSGException) as e:
+        backend.get_user_privileges_for_data(db, data_id, USER_ID + 1)
+    assert e.value.code == Error.MODULES_NO_PRIVILEGES_FOUND_FOR_MODULE_DATA
+
+
+def test_folder_lookup(db):
+    # A tree of 10 folders with 10 subfolders each, created in an order that
+    # does not match the depth of the folders
+    root_folder_id = backend.create_profile_data_tree(
+        db, TREE_IDENTIFIER, PROFILE_ID)
+    paths = {}
+    for i in range(10):
+        paths[f"/folder{i}/folder{i}"], _ = backend.create_folder(
+            db, f"/folder{i}/folder{i}", root_folder_id)
+        paths[f"/folder{i}"] = backend.get_folder_id(
+            db, root_folder_id, f"/folder{i}")
+        for j in range(10):
+            if j != i:
+                paths[f"/folder{i}/folder{j}"], _ = backend.create_folder(
+                    db, f"folder{j}", paths[f"/folder{i}"])
+
+    assert len(set(paths.values())) == 110
+    for path, folder_id in paths.items():
+        assert backend.get_folder_id(db, root_folder_id, path) == folder_id
+        assert backend.get_folder_id(db, root_folder_id, path + "/") == \
+            folder_id
+        assert backend.get_folder_id(db, root_folder_id, path[1:]) == \
+            folder_id
+
+    assert backend.get_folder_id(db, root_folder_id, "/folder10") is None
+    assert backend.get_folder_id(db, root_folder_id, "/folder1/folder10") \
+        is None
+
+    folders = db.select(backend.FOLDERS_TREE_SQL, (root_folder_id,))
+    assert [folder['id'] for folder in folders[:11]] == \
+        [root_folder_id] + sorted(paths[f"/folder{i}"] for i in range(10))
@@ -0,0 +1,70 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+# Fake Shell process talking the JSON interactive protocol of the Shell
+# consoles, the startup delay can be set with FAKE_SHELL_STARTUP_DELAY
+
+import json
+import os
+import sys
+import time
+
+host = ""
+
+
+def output(data):
+    sys.stdout.write(json.dumps(data) + "\n")
+    sys.stdout.flush()
+
+
+def prompt():
+    output({"prompt_descriptor": {"user": "", "host": host, "port": "",
+                                  "socket": "", "schema": "", "mode": "Py",
+                                  "session": "", "ssl": False,
+                                  "is_production": False}})
+
+
+time.sleep(float(os.environ.get("FAKE_SHELL_STARTUP_DELAY", "0")))
+if os.environ.get("FAKE_SHELL_CRASH_ON_STARTUP"):
+    sys.exit(1)
+
+prompt()
+
+for line in sys.stdin:
+    command = json.loads(line)
+    # Commands are printed back in interactive=full mode
+    output(command)
+
+    statement = command.get("execute", "")
+    if statement == "\\quit":
+        sys.stdout.write("Bye!\n")
+        sys.stdout.flush()
+        break
+
+    if statement.startswith("\\connect "):
+        host = statement.split(" ", 1)[1]
+        output({"value": f"Creating a session to '{host}'\n"})
+    else:
+        output({"value": f"Executed: {statement}\n"})
+
+    prompt()
@@ -0,0 +1,147 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from gui_plugin.shell.ShellModuleSession import (ShellModuleSession,
+                                                 ShellOutputReader)
+
+# Child process printing the given lines the way the shell does in JSON mode
+STUB_SHELL = """
+import sys
+sys.stdout.write(sys.stdin.read() + "\\n")
+sys.stdout.flush()
+"""
+
+
+class FakeRequest:
+    def __init__(self):
+        self.command = {"execute": "print(1)"}
+        self.outputs = []
+        self.completed = []
+
+    def send_output(self, data):
+        self.outputs.append(data)
+
+    def complete(self, message=None, data=None):
+        self.completed.append(data)
+
+
+def run_stub_shell(lines):
+    process = subprocess.Popen([sys.executable, "-c", STUB_SHELL],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               encoding='utf-8', text=True)
+
+    def write_input():
+        process.stdin.write("\n".join(lines))
+        process.stdin.close()
+
+    threading.Thread(target=write_input).start()
+    return process
+
+
+class StubShellSession(ShellModuleSession):
+    """Shell session reading the output of the stub shell"""
+
+    def __init__(self, lines, chunk_size=None):
+        self._module_session_id = "stub"
+        self._shell = run_stub_shell(lines)
+        self._reader = ShellOutputReader(self._shell.stdout) if chunk_size is None \
+            else ShellOutputReader(self._shell.stdout, chunk_size=chunk_size)
+        self._shell_exited = False
+        self._last_prompt = {}
+        self._pending_request = FakeRequest()
+        self._initialize_complete = threading.Event()
+        self._initialize_complete.set()
+        self._command_complete = threading.Event()
+
+    def close(self):
+        pass
+
+
+def read_output(lines, chunk_size=None):
+    session = StubShellSession(lines, chunk_size)
+    request = session._pending_request
+    session.handle_shell_output()
+
+    return request
+
+
+def test_lines_split_between_reads():
+    read_fd, write_fd = os.pipe()
+    stream = os.fdopen(read_fd, 'rb')
+    reader = ShellOutputReader(stream, chunk_size=5)
+
+    data = '{"value": "café"}\n{"value": "x"}\n{"par'.encode("utf-8")
+    os.write(write_fd, data)
+
+    lines = []
+    while len(lines) < 2:
+        lines += reader.read_lines()
+    assert lines == ['{"value": "café"}', '{"value": "x"}']
+
+    os.write(write_fd, b'tial": 1}\r\n')
+    assert reader.read_lines() == ['{"partial": 1}\r']
+
+    os.close(write_fd)
+    assert reader.read_lines() is None
+    stream.close()
+
+
+def test_values_are_batched():
+    lines = [json.dumps({"value": f"line {i}\n"}) for i in range(5)]
+    lines += [json.dumps({"error": "first "}), json.dumps({"error": "error"})]
+    lines += [json.dumps({"value": "after error"})]
+    lines += ['[{"a": 1}]']
+    lines += [json.dumps({"value": "last"})]
+    lines += [json.dumps({"prompt_descriptor": {"mode": "py"}}), "Bye!"]
+
+    request = read_output(lines)
+
+    assert request.outputs == [
+        {"value": "".join(f"line {i}\n" for i in range(5))},
+        {"error": "first error"},
+        {"value": "after error"},
+        {"rows": [{"a": 1}]},
+        {"value": "last"},
+    ]
+    assert request.completed[0] == {"prompt_descriptor": {"mode": "py"}}
+
+
+def test_output_read_in_small_chunks():
+    # Every line is split between several reads, some of them in the middle
+    # of a multi-byte character
+    values = [f"| {i} | café ñ {'x' * (i % 13)} |\n" for i in range(1000)]
+    lines = [json.dumps({"value": value}, ensure_ascii=False)
+             for value in values]
+    lines += [json.dumps({"prompt_descriptor": {"mode": "sql"}}), "Bye!"]
+
+    request = read_output(lines, chunk_size=7)
+
+    assert "".join(output["value"] for output in request.outputs) == \
+        "".join(values)
+    assert request.completed[0] == {"prompt_descriptor": {"mode": "sql"}}
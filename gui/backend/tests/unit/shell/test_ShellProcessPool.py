@@ -0,0 +1,159 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from gui_plugin.shell.ShellProcess import ShellProcessPool
+
+FAKE_SHELL = os.path.join(os.path.dirname(__file__), "fake_shell.py")
+
+
+def start_fake_shell(env=None):
+    return subprocess.Popen([sys.executable, FAKE_SHELL],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, encoding='utf-8',
+                            text=True, env=dict(os.environ, **(env or {})))
+
+
+@pytest.fixture
+def pool_config():
+    config = {
+        "size": ShellProcessPool.size,
+        "max_idle_time": ShellProcessPool.max_idle_time,
+        "startup_timeout": ShellProcessPool.startup_timeout,
+    }
+    pools = []
+
+    def create_pool(start_process=start_fake_shell, **options):
+        ShellProcessPool.configure(**options)
+        pool = ShellProcessPool(start_process)
+        pools.append(pool)
+        return pool
+
+    yield create_pool
+
+    for pool in pools:
+        pool.close()
+    ShellProcessPool.configure(**config)
+
+
+def wait_for_failure(pool, timeout):
+    end_time = time.time() + timeout
+    while time.time() < end_time:
+        if pool.get_stats()["failed_processes"] > 0:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def execute(pooled, statement):
+    pooled.process.stdin.write(json.dumps({"execute": statement}) + "\n")
+    pooled.process.stdin.flush()
+
+    replies = []
+    while True:
+        for line in pooled.reader.read_lines():
+            if line == "Bye!":
+                return replies
+            replies.append(json.loads(line))
+            if "prompt_descriptor" in replies[-1]:
+                return replies
+
+
+def test_claimed_process_is_ready(pool_config):
+    pool = pool_config(size=2)
+    assert pool.wait_ready(2, timeout=30)
+
+    pooled = pool.claim()
+    assert pooled is not None
+    assert pooled.prompt["prompt_descriptor"]["host"] == ""
+
+    replies = execute(pooled, "\\connect root@localhost")
+    assert replies[1] == {"value": "Creating a session to 'root@localhost'\n"}
+    assert replies[-1]["prompt_descriptor"]["host"] == "root@localhost"
+
+    # The claimed process is replaced
+    assert pool.wait_ready(2, timeout=30)
+    stats = pool.get_stats()
+    assert stats["claimed_processes"] == 1
+    assert stats["started_processes"] == 3
+
+    execute(pooled, "\\quit")
+    pooled.process.wait()
+
+
+def test_exited_processes_are_discarded(pool_config):
+    pool = pool_config(size=1)
+    assert pool.wait_ready(1, timeout=30)
+
+    pool._ready[0].process.kill()
+    pool._ready[0].process.wait()
+
+    assert pool.claim() is None
+    stats = pool.get_stats()
+    assert stats["discarded_processes"] == 1
+    assert stats["missed_claims"] == 1
+
+    assert pool.wait_ready(1, timeout=30)
+    assert pool.claim() is not None
+
+
+def test_idle_processes_are_restarted(pool_config):
+    pool = pool_config(size=1, max_idle_time=0)
+    assert pool.wait_ready(1, timeout=30)
+
+    assert pool.claim() is None
+    assert pool.get_stats()["discarded_processes"] == 1
+
+
+def test_failed_processes_are_not_retried(pool_config):
+    pool = pool_config(
+        lambda: start_fake_shell({"FAKE_SHELL_CRASH_ON_STARTUP": "1"}), size=1)
+
+    assert wait_for_failure(pool, timeout=30)
+    stats = pool.get_stats()
+    assert stats["failed_processes"] == 1
+    assert stats["starting_processes"] == 0
+    assert pool.claim() is None
+
+
+def test_slow_processes_are_discarded(pool_config):
+    pool = pool_config(
+        lambda: start_fake_shell({"FAKE_SHELL_STARTUP_DELAY": "30"}),
+        size=1, startup_timeout=1)
+
+    assert wait_for_failure(pool, timeout=10)
+    assert pool.get_stats()["ready_processes"] == 0
+
+
+def test_disabled_pool(pool_config):
+    pool = pool_config(size=0)
+
+    assert pool.claim() is None
+    assert pool.get_stats()["starting_processes"] == 0
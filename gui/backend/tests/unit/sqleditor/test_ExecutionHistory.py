@@ -0,0 +1,141 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import pytest
+
+from gui_plugin.core.Db import BackendDatabase, BackendTransaction
+from gui_plugin.core.Error import MSGException
+from gui_plugin.sql_editor import backend
+from gui_plugin.sql_editor import SqlEditor
+
+CONNECTION_ID = 987654
+PROFILE_ID = 1
+GROUP_ID = 1
+
+
+@pytest.fixture
+def db():
+    with BackendDatabase() as db:
+        yield db
+
+        db.execute("DELETE FROM db_notebook_history WHERE db_connection_id=?",
+                   (CONNECTION_ID,))
+
+
+def add_entries(db, count, max_entries=None):
+    with BackendTransaction(db):
+        for i in range(count):
+            backend.add_history_entry(db, CONNECTION_ID, PROFILE_ID, GROUP_ID,
+                                      f"SELECT {i}", "mysql", max_entries)
+
+
+def test_entries_are_listed_newest_first(db):
+    add_entries(db, 3)
+
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID)
+    assert [entry["code"] for entry in entries] == \
+        ["SELECT 2", "SELECT 1", "SELECT 0"]
+    assert entries == backend.get_history_entries(db, CONNECTION_ID, None,
+                                                  GROUP_ID)
+
+    entry = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                        GROUP_ID, index=1)
+    assert entry == [entries[1]]
+    assert backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                       GROUP_ID, index=3) == []
+
+
+def test_repeated_code_is_not_added(db):
+    add_entries(db, 1)
+    entry_id = backend.add_history_entry(db, CONNECTION_ID, PROFILE_ID,
+                                         GROUP_ID, "SELECT 0", "mysql")
+    add_entries(db, 1)
+
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID)
+    assert len(entries) == 1
+    assert entry_id == db.select("""SELECT id FROM db_notebook_history
+        WHERE db_connection_id=?""", (CONNECTION_ID,))[0]["id"]
+
+
+def test_size_is_capped(db):
+    add_entries(db, 12, max_entries=5)
+
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID)
+    assert [entry["code"] for entry in entries] == \
+        [f"SELECT {i}" for i in range(11, 6, -1)]
+
+
+def test_add_entry_without_context(db):
+    # Called out of a web request, e.g. from the shell
+    SqlEditor.add_execution_history_entry(CONNECTION_ID, "SELECT 1", "mysql",
+                                          profile_id=PROFILE_ID)
+
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID)
+    assert [entry["code"] for entry in entries] == ["SELECT 1"]
+
+
+def test_filter_and_truncate(db):
+    add_entries(db, 2)
+    backend.add_history_entry(db, CONNECTION_ID, PROFILE_ID, GROUP_ID,
+                              "print('hello')", "python")
+
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID, "python", 5)
+    assert len(entries) == 1
+    assert entries[0]["code"] == "print"
+    assert entries[0]["language_id"] == "python"
+
+
+def test_remove_entries(db):
+    add_entries(db, 3)
+
+    assert backend.remove_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID, 0) == 1
+    entries = backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID)
+    assert [entry["code"] for entry in entries] == ["SELECT 1", "SELECT 0"]
+
+    assert backend.remove_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID, 5) == 0
+    assert backend.remove_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                          GROUP_ID) == 2
+    assert backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID,
+                                       GROUP_ID) == []
+
+
+def test_invalid_content(db):
+    db.execute("""INSERT INTO db_notebook_history (db_connection_id,
+        profile_id, user_group_id, language_id, code) VALUES(?, ?, ?, ?, ?)""",
+               (CONNECTION_ID, PROFILE_ID, GROUP_ID, "mysql", "{invalid"))
+
+    with pytest.raises(MSGException):
+        backend.get_history_entries(db, CONNECTION_ID, PROFILE_ID, GROUP_ID)
+
+
+def test_max_history_entries():
+    with pytest.raises(ValueError):
+        backend.set_max_history_entries(0)
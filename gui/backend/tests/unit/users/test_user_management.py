@@ -22,6 +22,8 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
 from gui_plugin.users import UserManagement
+from gui_plugin.users import backend
+from gui_plugin.core.Db import BackendDatabase
 from gui_plugin.core.Error import MSGException
 import gui_plugin.core.Logger as logger
 import pytest
@@ -312,6 +314,28 @@ def test_user_group():
     assert not value_in_message("description", "Second user group", msg)
 
 
+def test_command_patterns_cache():
+    user = "pytest_cache_user"
+    user_id = UserManagement.create_user(user, "password", role=None)
+
+    with BackendDatabase() as db:
+        assert backend.get_command_patterns(db, user_id) == []
+
+        # The patterns are cached until the user privileges change
+        assert backend.get_command_patterns(db, user_id) is \
+            backend.get_command_patterns(db, user_id)
+
+        UserManagement.grant_role(user, "Administrator")
+        patterns = backend.get_command_patterns(db, user_id)
+        assert len(patterns) == 1
+        assert patterns[0].match("gui.sqlEditor.execute")
+
+    UserManagement.delete_user(user)
+
+    with BackendDatabase() as db:
+        assert backend.get_command_patterns(db, user_id) == []
+
+
 @pytest.mark.parametrize("user, password, role", test_users_data)
 def test_delete_user(user, password, role):
     msg = UserManagement.delete_user(user)
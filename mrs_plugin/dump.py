@@ -64,15 +64,11 @@ def dump(path, **kwargs):
 
         export = {'type': f"mrs{target_object.capitalize()}", 'version': lib.core.select(
             'mrs_user_schema_version').exec(session).first}
-        if target_object == "service":
-            export['service'] = lib.dump.get_service_dump(session, object_id)
-        elif target_object == "schema":
-            export['schema'] = lib.dump.get_db_schema_dump(session, object_id)
-        else:
-            export['object'] = lib.dump.get_db_object_dump(session, object_id)
+        export[target_object] = lib.dump.get_streamed_dump(
+            session, target_object, object_id)
 
         with open(path, 'w') as file:
-            file.write(json.dumps(export, indent=4))
+            lib.dump.write_dump(file, export)
 
 
 @plugin_function('mrs.dump.service', shell=True, cli=True, web=True)
@@ -474,6 +474,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     session=self.session,
                     url_host_name=url_host_name,
                     service=mrs_object,
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 # If this is the first service, make it the current one
@@ -546,6 +547,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     comments=mrs_object.get("comments"),
                     options=mrs_object.get("options"),
                     session=self.session,
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 # If this is the first schema of the REST service, make it the current one
@@ -681,6 +683,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     ),
                     objects=mrs_object.get("objects"),
                     metadata=mrs_object.get("metadata", None),
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 for grant in grants:
@@ -724,17 +727,51 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
 
                 # If the OR REPLACE was specified, check if there is an existing content set on the same service
                 # and delete it.
+                content_set = None
                 if do_replace == True:
                     content_set = lib.content_sets.get_content_set(
                         service_id=service_id,
                         request_path=mrs_object.get("request_path"),
                         session=self.session,
                     )
-                    if content_set is not None:
-                        lib.content_sets.delete_content_set(
-                            content_set_ids=[content_set.get("id")],
-                            session=self.session,
-                        )
+
+                content_dir = mrs_object.get("directory_file_path")
+                if content_set is not None and content_set.get("content_type") == "STATIC" and \
+                        mrs_object["content_type"] == "STATIC" and content_dir is not None and \
+                        content_dir.lower() != "open-api-ui":
+                    # A static content set replaced by the contents of a directory is kept, only the files
+                    # that changed are uploaded
+                    file_list = lib.content_sets.update_content_set(
+                        session=self.session,
+                        content_set_id=content_set["id"],
+                        value={
+                            "requires_auth": int(mrs_object.get("requires_auth", True)),
+                            "enabled": int(mrs_object.get("enabled", 1)),
+                            "comments": mrs_object.get("comments"),
+                            "options": mrs_object.get("options", None),
+                        },
+                        file_ignore_list=mrs_object.get("file_ignore_list", ""),
+                        content_dir=content_dir,
+                    )
+
+                    self.results.append(
+                        {
+                            "statementIndex": len(self.results) + 1,
+                            "type": "success",
+                            "message": f"REST content set `{full_path}` created successfully. "
+                            f"{len(file_list)} file(s) synchronized.",
+                            "operation": self.current_operation,
+                            "id": content_set["id"],
+                            "executionTime": timer.elapsed(),
+                        }
+                    )
+                    return
+
+                if content_set is not None:
+                    lib.content_sets.delete_content_set(
+                        content_set_ids=[content_set.get("id")],
+                        session=self.session,
+                    )
 
                 # Check if scripts should be loaded
                 options = mrs_object.get("options", None)
@@ -845,6 +882,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     options=mrs_object.get("options"),
                     data=data,
                     enabled=mrs_object.get("enabled", 1),
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 self.results.append(
@@ -1014,6 +1052,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     mapped_user_id=mapped_user_id,
                     app_options=app_options,
                     auth_string=password,
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 self.results.append(
@@ -1087,6 +1126,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     ),
                     description=comments,
                     options=json_options,
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 self.results.append(
@@ -1155,7 +1195,8 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
 
             # Add the service
             service_id = lib.services.add_service(
-                session=self.session, url_host_name=new_url_host_name, service=service
+                session=self.session, url_host_name=new_url_host_name, service=service,
+                block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
             )
 
             # TODO: Making the correct entry into service_has_auth_app, using the same auth_apps_ids as the parent
@@ -1892,6 +1933,7 @@ class MrsDdlExecutor(MrsDdlExecutorInterface):
                     service_path=service_path,
                     schema_path=schema_request_path,
                     object_path=object_request_path,
+                    block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE,
                 )
 
                 self.results.append(
@@ -63,7 +63,8 @@ class MrsDdlListener(MRSListener):
         self.mrs_object = {}
 
     def get_uuid(self):
-        return lib.core.convert_id_to_string(lib.core.get_sequence_id(self.session))
+        return lib.core.convert_id_to_string(lib.core.get_sequence_id(
+            self.session, block_size=lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE))
 
     # ------------------------------------------------------------------------------------------------------------------
     # Common handlers
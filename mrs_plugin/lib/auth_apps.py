@@ -75,7 +75,12 @@ def get_auth_vendors(session, enabled=None):
         sql += "WHERE enabled = ?"
         params.append(enabled)
 
-    return core.MrsDbExec(sql, params).exec(session).items
+    # The vendors are only changed by the metadata schema scripts, so they
+    # are kept in the metadata cache of the session
+    vendors = core.cached_metadata(session, ("auth_vendors", enabled),
+                                   lambda: core.MrsDbExec(sql, params).exec(session).items)
+
+    return [dict(vendor) for vendor in vendors]
 
 
 def get_auth_vendor(session, vendor_id=None, name=None):
@@ -84,16 +89,20 @@ def get_auth_vendor(session, vendor_id=None, name=None):
             SELECT * FROM `mysql_rest_service_metadata`.`auth_vendor`
             WHERE id = ?
         """
-
-        return core.MrsDbExec(sql, [vendor_id]).exec(session).first
-
-    if name is not None:
+        params = [vendor_id]
+    elif name is not None:
         sql = """
             SELECT * FROM `mysql_rest_service_metadata`.`auth_vendor`
             WHERE name LIKE ?
         """
+        params = [name]
+    else:
+        return None
+
+    vendor = core.cached_metadata(session, ("auth_vendor", vendor_id, name),
+                                  lambda: core.MrsDbExec(sql, params).exec(session).first)
 
-        return core.MrsDbExec(sql, [name]).exec(session).first
+    return dict(vendor) if vendor is not None else None
 
 
 def get_auth_app(session, app_id=None, service_id=None, name=None):
@@ -22,10 +22,18 @@
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 from mrs_plugin.lib import core, content_sets
 from mrs_plugin.lib.MrsDdlExecutor import MrsDdlExecutor
+from concurrent.futures import ThreadPoolExecutor
 import os
 import re
 import pathlib
 import datetime
+import hashlib
+
+# Limits of the multi-row INSERT statements used to upload the files
+CONTENT_FILE_BATCH_ROWS = 100
+CONTENT_FILE_BATCH_SIZE = 8 * 1024 * 1024
+# Number of threads used to read the files of a content directory
+CONTENT_FILE_READ_THREADS = 8
 
 
 def sizeof_fmt(num, suffix="B"):
@@ -162,7 +170,16 @@ def get_content_files(session, content_set_id: bytes, include_enable_state: bool
     return core.MrsDbExec(sql, [content_set_id]).exec(session).items
 
 
-def add_content_dir(session, content_set_id, content_dir, requires_auth, ignore_list, send_gui_message=None):
+def get_content_dir_files(content_dir, ignore_list):
+    """Returns the files of the given directory that are not ignored
+
+    Args:
+        content_dir (str): The path of the directory
+        ignore_list (str): A comma separated list of file patterns to ignore
+
+    Returns:
+        A list of (fullname, request_path) tuples
+    """
     file_list = []
     ignore_patterns = []
     full_ignore_pattern = None
@@ -188,32 +205,158 @@ def add_content_dir(session, content_set_id, content_dir, requires_auth, ignore_
             if full_ignore_pattern is not None and re.match(full_ignore_pattern, fullname.replace("\\", "/")):
                 continue
 
-            file_list.append(fullname)
-            # Read the file content
-            with open(fullname, 'rb') as f:
-                data = f.read()
-
             request_path = fullname[len(content_dir):]
             if os.name == 'nt':
                 request_path = request_path.replace("\\", "/")
 
-            if send_gui_message is not None:
-                send_gui_message("info", f"Adding file {file} ...")
+            file_list.append((fullname, request_path))
 
-            options = {
-                "last_modification": datetime.datetime.fromtimestamp(
-                    pathlib.Path(fullname).stat().st_mtime, tz=datetime.timezone.utc).strftime("%F %T.%f")[:-3],
-            }
+    return file_list
 
-            add_content_file(session, content_set_id,
-                             request_path, requires_auth, options=options, data=data)
 
-    return file_list
+def add_content_dir(session, content_set_id, content_dir, requires_auth, ignore_list, send_gui_message=None):
+    return sync_content_dir(session, content_set_id, content_dir, requires_auth, ignore_list,
+                            send_gui_message=send_gui_message)
+
+
+def _read_content_file(fullname):
+    with open(fullname, 'rb') as f:
+        data = f.read()
+
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _get_file_options(stat):
+    return {
+        "last_modification": datetime.datetime.fromtimestamp(
+            stat.st_mtime, tz=datetime.timezone.utc).strftime("%F %T.%f")[:-3],
+    }
+
+
+def _insert_content_files(session, content_set_id, requires_auth, files):
+    place_holders = ",".join(
+        [f"({core._generate_qualified_name('get_sequence_id()')}, ?, ?, ?, 1, ?, ?)"] * len(files))
+    params = []
+    for request_path, data, options in files:
+        params.extend([content_set_id, request_path,
+                      int(requires_auth), data, options])
+
+    core.MrsDbExec(f"""
+        INSERT INTO {core._generate_table("content_file")}
+            (id, content_set_id, request_path, requires_auth, enabled, content, options)
+        VALUES {place_holders}""", params).exec(session)
+
+
+def sync_content_dir(session, content_set_id, content_dir, requires_auth, ignore_list, send_gui_message=None):
+    """Synchronizes the files of a content set with the given directory
+
+    Only the files that are new or changed are uploaded and the files no
+    longer in the directory are deleted. A file is considered unchanged if its
+    size and modification time match the ones stored in the options of its
+    content_file row, or if its content hash does. The requires_auth flag is
+    set on all the files, including the unchanged ones. The files are read on
+    a thread pool and inserted with multi-row INSERT statements, within the
+    transaction of the caller.
+
+    Args:
+        session (object): The database session to use
+        content_set_id: The id of the content set
+        content_dir (str): The path of the directory
+        requires_auth (bool): Whether the files require authentication
+        ignore_list (str): A comma separated list of file patterns to ignore
+        send_gui_message (callback): Function used to report the progress
+
+    Returns:
+        The list of files of the directory
+    """
+    file_list = get_content_dir_files(content_dir, ignore_list)
+
+    existing_files = {
+        row["request_path"]: row for row in core.MrsDbExec(f"""
+            SELECT id, request_path, size, options
+            FROM {core._generate_table("content_file")}
+            WHERE content_set_id = ?""", [content_set_id]).exec(session).items}
+
+    # Find the files that need to be read, the unchanged ones are skipped
+    # without reading them
+    pending_files = []
+    for fullname, request_path in file_list:
+        stat = pathlib.Path(fullname).stat()
+        options = _get_file_options(stat)
+        existing_file = existing_files.pop(request_path, None)
+
+        if existing_file is not None:
+            existing_options = existing_file.get("options") or {}
+            if existing_file["size"] == stat.st_size and \
+                    existing_options.get("last_modification") == options["last_modification"]:
+                continue
+
+        pending_files.append((fullname, request_path, options, existing_file))
+
+    # The files remaining in existing_files are no longer in the directory
+    removed_ids = [row["id"] for row in existing_files.values()]
+    for i in range(0, len(removed_ids), CONTENT_FILE_BATCH_ROWS):
+        ids = removed_ids[i:i + CONTENT_FILE_BATCH_ROWS]
+        core.delete(table="content_file",
+                    where=f"id IN ({','.join(['?'] * len(ids))})").exec(session, ids)
+
+    # The files that are kept get the requires_auth flag of the content set
+    core.update(table="content_file", sets={"requires_auth": int(requires_auth)},
+                where="content_set_id=?").exec(session, [content_set_id])
+
+    if send_gui_message is not None and (pending_files or removed_ids):
+        send_gui_message(
+            "info", f"Uploading {len(pending_files)} new or changed file(s) and "
+            f"removing {len(removed_ids)} file(s) ...")
+
+    uploaded = 0
+    with ThreadPoolExecutor(max_workers=CONTENT_FILE_READ_THREADS) as executor:
+        for i in range(0, len(pending_files), CONTENT_FILE_BATCH_ROWS):
+            batch = pending_files[i:i + CONTENT_FILE_BATCH_ROWS]
+            contents = executor.map(
+                _read_content_file, [fullname for fullname, _, _, _ in batch])
+
+            inserts = []
+            inserts_size = 0
+            for (fullname, request_path, options, existing_file), (data, content_hash) in zip(batch, contents):
+                options["content_hash"] = content_hash
+
+                if existing_file is not None:
+                    existing_options = existing_file.get("options") or {}
+                    if existing_options.get("content_hash") == content_hash:
+                        # Only the modification time changed
+                        core.update(table="content_file", sets={"options": options},
+                                    where="id=?").exec(session, [existing_file["id"]])
+                    else:
+                        core.update(table="content_file", sets={"content": data, "options": options},
+                                    where="id=?").exec(session, [existing_file["id"]])
+                    continue
+
+                if inserts and inserts_size + len(data) > CONTENT_FILE_BATCH_SIZE:
+                    _insert_content_files(
+                        session, content_set_id, requires_auth, inserts)
+                    inserts = []
+                    inserts_size = 0
+
+                inserts.append((request_path, data, options))
+                inserts_size += len(data)
+
+            if inserts:
+                _insert_content_files(
+                    session, content_set_id, requires_auth, inserts)
+
+            uploaded += len(batch)
+            if send_gui_message is not None:
+                send_gui_message(
+                    "info", f"{uploaded} of {len(pending_files)} file(s) uploaded ...")
+
+    return [fullname for fullname, _ in file_list]
 
 
-def add_content_file(session, content_set_id, request_path, requires_auth, data, enabled=1, options=None):
+def add_content_file(session, content_set_id, request_path, requires_auth, data, enabled=1, options=None,
+                     block_size=None):
     # Upload it to the content table
-    id = core.get_sequence_id(session)
+    id = core.get_sequence_id(session, block_size)
     core.insert(table="content_file", values={
         "id": id,
         "content_set_id": content_set_id,
@@ -340,12 +340,13 @@ def add_content_set(session, service_id, request_path, requires_auth=False, comm
     return values["id"], len(file_list) if file_list is not None else 0
 
 
-def update_content_set(session, content_set_id, value, file_ignore_list=None, send_gui_message=None):
+def update_content_set(session, content_set_id, value, file_ignore_list=None, send_gui_message=None,
+                       content_dir=None):
     if value is None:
         raise ValueError(
             "Failed to update REST content set. No values specified.")
 
-    options = value.get("options", {})
+    options = value.get("options") or {}
 
     contains_mrs_scripts = options.get("contains_mrs_scripts", False)
     mrs_script_language = options.get("mrs_scripting_language", None)
@@ -362,11 +363,27 @@ def update_content_set(session, content_set_id, value, file_ignore_list=None, se
         where=["id=?"]
     ).exec(session, [content_set_id])
 
+    # If a content_dir has been provided, only the new or changed files are
+    # uploaded
+    file_list = None
+    if content_dir is not None:
+        content_dir = os.path.abspath(os.path.expanduser(content_dir))
+        if not os.path.isdir(content_dir):
+            raise ValueError(
+                f"The given content directory path '{content_dir}' "
+                "does not exist.")
+
+        file_list = content_files.sync_content_dir(
+            session, content_set_id, content_dir,
+            value.get("requires_auth", False), file_ignore_list,
+            send_gui_message=send_gui_message)
+
     if contains_mrs_scripts:
         # Update db_schemas/db_objects based on script definition
         script_def = update_scripts_from_content_set(
             session=session, content_set_id=content_set_id,
             language=mrs_script_language,
+            content_dir=content_dir,
             ignore_list=file_ignore_list,
             send_gui_message=send_gui_message)
 
@@ -375,6 +392,8 @@ def update_content_set(session, content_set_id, value, file_ignore_list=None, se
                 "The following errors occurred when parsing the MRS Scripts:\n"
                 + json.dumps(script_def["errors"]))
 
+    return file_list
+
 
 def get_current_content_set(session):
     """Returns the current content_set
@@ -1129,6 +1148,12 @@ def map_ts_type_to_database_type(type: str):
     return type
 
 
+def _get_script_sequence_id(session):
+    # A script adds many objects and fields, their ids are reserved in blocks
+    return core.get_sequence_id(
+        session, block_size=core.BULK_SEQUENCE_ID_BLOCK_SIZE)
+
+
 def update_scripts_from_content_set(session, content_set_id, language, content_dir=None, ignore_list=None,
                                     send_gui_message=None):
     if send_gui_message is None:
@@ -1273,6 +1298,7 @@ def update_scripts_from_content_set(session, content_set_id, language, content_d
                 metadata=get_mrs_script_property(properties, "metadata", None),
                 comments=get_mrs_script_property(properties, "comments", None),
                 schema_type="SCRIPT_MODULE",
+                block_size=core.BULK_SEQUENCE_ID_BLOCK_SIZE,
             )
 
             schema = schemas.get_schema(session=session, schema_id=schema_id)
@@ -1295,15 +1321,15 @@ def update_scripts_from_content_set(session, content_set_id, language, content_d
             send_gui_message(
                 "info", f"Adding MRS script {script["function_name"]} at {func_request_path} ...")
 
-            db_object_id = core.get_sequence_id(session=session)
+            db_object_id = _get_script_sequence_id(session)
             objects = []
 
             # Build parameters object with all parameter as object_fields
-            object_id = core.get_sequence_id(session=session)
+            object_id = _get_script_sequence_id(session)
             object_fields = []
             pos = 0
             for param in script["parameters"]:
-                object_field_id = core.get_sequence_id(session=session)
+                object_field_id = _get_script_sequence_id(session)
                 if param["name"] == row_ownership_param:
                     row_ownership_field_id = object_field_id
 
@@ -1344,14 +1370,14 @@ def update_scripts_from_content_set(session, content_set_id, language, content_d
             objects.append(obj)
 
             # Build result object
-            object_id = core.get_sequence_id(session=session)
+            object_id = _get_script_sequence_id(session)
             object_fields = []
             returns_array = False
             return_type = script["return_type"]["type"]
             returns_array = script["return_type"]["is_array"]
             if is_simple_typescript_type(return_type):
                 object_field = {
-                    "id": core.get_sequence_id(session=session),
+                    "id": _get_script_sequence_id(session),
                     "object_id": object_id,
                     "name": "result",
                     "position": 0,
@@ -1483,7 +1509,7 @@ def add_object_fields_from_interface(
             field_array = True
 
         object_field = {
-            "id": core.get_sequence_id(session=session),
+            "id": _get_script_sequence_id(session),
             "object_id": object_id,
             "name": field["name"],
             "position": len(object_fields),
@@ -1506,7 +1532,7 @@ def add_object_fields_from_interface(
         if is_simple_typescript_type(field_type):
             object_fields.append(object_field)
         else:
-            object_ref_id = core.get_sequence_id(session=session)
+            object_ref_id = _get_script_sequence_id(session)
             object_ref = {
                 "id": object_ref_id,
                 "unnest": False,
@@ -32,6 +32,7 @@ import re
 import json
 from enum import IntEnum
 import threading
+import weakref
 import base64
 import datetime
 import pathlib
@@ -314,7 +315,7 @@ def get_current_session(session=None):
     return session
 
 
-def get_mrs_schema_version(session):
+def _fetch_mrs_schema_version(session):
     row = (
         select(
             table="schema_version",
@@ -335,6 +336,11 @@ def get_mrs_schema_version(session):
     return [row["major"], row["minor"], row["patch"]]
 
 
+def get_mrs_schema_version(session):
+    return list(cached_metadata(session, "schema_version",
+                                lambda: _fetch_mrs_schema_version(session)))
+
+
 def get_mrs_schema_version_int(session):
     row = get_mrs_schema_version(session)
     return row[0] * 10000 + row[1] * 100 + row[2]
@@ -475,6 +481,8 @@ def update_mrs_metadata_schema(session, current_db_version_str):
             "INFO", f"The MRS metadata schema version has been successfully updated to version {general.DB_VERSION_STR}.")
 
     finally:
+        invalidate_metadata_cache(session)
+
         if mrs_lock == 1:
             MrsDbExec('SELECT RELEASE_LOCK("MRS_METADATA_LOCK")').exec(session)
 
@@ -557,6 +565,8 @@ def create_mrs_metadata_schema(session, drop_existing=False):
         write_to_metadata_schema_update_log(
             "INFO", f"MRS metadata schema version {version_str} created successfully.")
     finally:
+        invalidate_metadata_cache(session)
+
         if mrs_lock == 1:
             MrsDbExec('SELECT RELEASE_LOCK("MRS_METADATA_LOCK")').exec(session)
 
@@ -706,6 +716,54 @@ def prompt_for_comments():
     return prompt("Comments: ").strip()
 
 
+def _get_column_converters(cols, binary_formatter=None):
+    """Returns the label and the converter of each column of a result set
+
+    The converter is None for the columns whose values are used as they are.
+    """
+    def convert_bit(value):
+        return value == 1
+
+    def convert_set(value):
+        return value.split(",") if value else []
+
+    def convert_json(value):
+        return json.loads(value) if value else None
+
+    def convert_binary(value):
+        return binary_formatter(value) if isinstance(value, bytes) else value
+
+    converters = []
+    for col in cols:
+        # The right way to get the column type is with "get_type().data". Using
+        # get_type() may return "Constant" or the data type depending if the shell
+        # is started in with --json or not.
+        col_type = col.get_type().data
+        if col_type == "BIT" and col.get_length() == 1:
+            converter = convert_bit
+        elif col_type == "SET":
+            converter = convert_set
+        elif col_type == "JSON":
+            converter = convert_json
+        elif binary_formatter is not None:
+            converter = convert_binary
+        else:
+            converter = None
+
+        converters.append((col.get_column_label(), converter))
+
+    return converters
+
+
+def _row_to_dict(row, converters):
+    item = {}
+    for col_name, converter in converters:
+        field_val = row.get_field(col_name)
+        item[col_name] = field_val if converter is None else converter(field_val)
+
+    return item
+
+
 def get_sql_result_as_dict_list(res, binary_formatter=None):
     """Returns the result set as a list of dicts
 
@@ -719,33 +777,33 @@ def get_sql_result_as_dict_list(res, binary_formatter=None):
     if not res:
         return []
 
-    cols = res.get_columns()
-    rows = res.fetch_all()
-    dict_list = []
-
-    for row in rows:
-        item = {}
-        for col in cols:
-            col_name = col.get_column_label()
-            field_val = row.get_field(col_name)
-            # The right way to get the column type is with "get_type().data". Using
-            # get_type() may return "Constant" or the data type depending if the shell
-            # is started in with --json or not.
-            col_type = col.get_type().data
-            if col_type == "BIT" and col.get_length() == 1:
-                item[col_name] = field_val == 1
-            elif col_type == "SET":
-                item[col_name] = field_val.split(",") if field_val else []
-            elif col_type == "JSON":
-                item[col_name] = json.loads(field_val) if field_val else None
-            elif binary_formatter is not None and isinstance(field_val, bytes):
-                item[col_name] = binary_formatter(field_val)
-            else:
-                item[col_name] = field_val
+    converters = _get_column_converters(res.get_columns(), binary_formatter)
+
+    return [_row_to_dict(row, converters) for row in res.fetch_all()]
 
-        dict_list.append(item)
 
-    return dict_list
+def iter_sql_result_as_dicts(res, binary_formatter=None):
+    """Returns a generator of the rows of the result set as dicts
+
+    The rows are fetched one at a time, so the result set does not need to be
+    kept in memory.
+
+    Args:
+        res: (object): The sql result set
+        binary_formatter (callback): function receiving binary data and returning formatted value
+
+    Returns:
+        A generator of dicts
+    """
+    if not res:
+        return
+
+    converters = _get_column_converters(res.get_columns(), binary_formatter)
+
+    row = res.fetch_one()
+    while row:
+        yield _row_to_dict(row, converters)
+        row = res.fetch_one()
 
 
 def get_current_config(mrs_config=None):
@@ -1027,6 +1085,10 @@ class MrsDbExec:
     def items(self):
         return get_sql_result_as_dict_list(self._result, self._binary_formatter)
 
+    @property
+    def iter_items(self):
+        return iter_sql_result_as_dicts(self._result, self._binary_formatter)
+
     @property
     def first(self):
         result = get_sql_result_as_dict_list(self._result, self._binary_formatter)
@@ -1109,12 +1171,187 @@ def insert(table, values={}):
     return MrsDbExec(sql, params)
 
 
-def get_sequence_id(session):
-    return (
-        MrsDbExec(f"SELECT {_generate_qualified_name('get_sequence_id()')} as id")
-        .exec(session)
-        .first["id"]
-    )
+def insert_rows(table, rows):
+    """Returns a multi-row INSERT for the given rows
+
+    Args:
+        table (str): The name of the table
+        rows (list): The values of the rows as dicts, all using the same keys
+
+    Returns:
+        The MrsDbExec of the statement
+    """
+    cols = list(rows[0].keys())
+    row_place_holders = f"({','.join(['?' for col in cols])})"
+    params = []
+    for values in rows:
+        params.extend([values[col] for col in cols])
+
+    sql = f"""
+        INSERT INTO {_generate_table(table)}
+        ({",".join(cols)})
+        VALUES
+        {",".join([row_place_holders] * len(rows))}
+    """
+    return MrsDbExec(sql, params)
+
+
+class SequenceIdAllocator:
+    """Reserves the ids of the metadata objects in blocks per session
+
+    The ids are generated by the get_sequence_id() function of the metadata
+    schema. Callers that insert many objects pass a larger block size, a block
+    of ids is then fetched with a single query and handed out until it is
+    exhausted, so inserting an object does not take an extra round trip to get
+    its id. As the ids are UUIDs, the ids left in a block when the session is
+    released or garbage collected are simply discarded.
+    """
+
+    DEFAULT_BLOCK_SIZE = 1
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE) -> None:
+        self.block_size = block_size
+        # session -> [lock, ids], the blocks go away with their sessions
+        self._blocks = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _fetch_block(self, session, block_size):
+        sql = f"""
+            WITH RECURSIVE seq (n) AS (
+                SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            SELECT {_generate_qualified_name('get_sequence_id()')} AS id
+            FROM seq"""
+
+        ids = [row["id"] for row in MrsDbExec(sql, [block_size]).exec(session).items]
+        # Handed out from the end of the list, in generation order
+        ids.reverse()
+        return ids
+
+    def _get_block(self, session):
+        with self._lock:
+            try:
+                return self._blocks.setdefault(session, [threading.Lock(), []])
+            except TypeError:
+                # The session can not be weakly referenced, no block is kept
+                return None
+
+    def get(self, session, block_size=None):
+        if block_size is None:
+            block_size = self.block_size
+
+        block = self._get_block(session)
+        if block is None:
+            return self._fetch_block(session, 1)[0]
+
+        # Only the callers using the same session wait for the round trip
+        lock, ids = block
+        with lock:
+            if not ids:
+                ids.extend(self._fetch_block(session, max(block_size, 1)))
+
+            return ids.pop()
+
+    def release(self, session):
+        """Drops the ids left in the block of the given session"""
+        with self._lock:
+            try:
+                self._blocks.pop(session, None)
+            except TypeError:
+                pass
+
+
+_sequence_id_allocator = SequenceIdAllocator()
+
+# The block size used by the callers adding many objects at once
+BULK_SEQUENCE_ID_BLOCK_SIZE = 100
+
+
+def get_sequence_id(session, block_size=None):
+    return _sequence_id_allocator.get(session, block_size)
+
+
+class MrsMetadataCache:
+    """Keeps the results of rarely changing metadata lookups
+
+    A cache is attached to a session while it is used through MrsDbSession,
+    so the lookups done by the functions called within, e.g. the version of
+    the metadata schema, are only executed once.
+    """
+
+    def __init__(self) -> None:
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+
+        self.misses += 1
+        value = loader()
+        self._values[key] = value
+
+        return value
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
+
+
+# The caches of the sessions used through MrsDbSession, as
+# id(session) -> [session, cache, reference count]
+_metadata_caches = {}
+_metadata_caches_lock = threading.Lock()
+
+
+def get_metadata_cache(session):
+    """Returns the metadata cache attached to the given session, if any"""
+    entry = _metadata_caches.get(id(session))
+
+    return entry[1] if entry is not None and entry[0] is session else None
+
+
+def cached_metadata(session, key, loader):
+    """Returns the value of the given lookup, using the session cache if any"""
+    cache = get_metadata_cache(session)
+    if cache is None:
+        return loader()
+
+    return cache.get(key, loader)
+
+
+def invalidate_metadata_cache(session, key=None):
+    cache = get_metadata_cache(session)
+    if cache is not None:
+        cache.invalidate(key)
+
+
+def _attach_metadata_cache(session):
+    with _metadata_caches_lock:
+        entry = _metadata_caches.get(id(session))
+        if entry is None or entry[0] is not session:
+            entry = [session, MrsMetadataCache(), 0]
+            _metadata_caches[id(session)] = entry
+        entry[2] += 1
+
+
+def _detach_metadata_cache(session):
+    """Detaches the cache, returns True if the session is no longer used"""
+    with _metadata_caches_lock:
+        entry = _metadata_caches.get(id(session))
+        if entry is not None and entry[0] is session:
+            entry[2] -= 1
+            if entry[2] <= 0:
+                del _metadata_caches[id(session)]
+                return True
+
+    return False
 
 
 class MrsDbSession:
@@ -1133,9 +1370,13 @@ class MrsDbSession:
                 )
 
     def __enter__(self):
+        _attach_metadata_cache(self._session)
         return self._session
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
+        if _detach_metadata_cache(self._session):
+            _sequence_id_allocator.release(self._session)
+
         if exc_type is None:
             return
 
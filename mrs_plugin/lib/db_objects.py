@@ -289,11 +289,21 @@ def get_db_objects(session, schema_id: bytes, include_enable_state=None, object_
         include_enable_state=include_enable_state, object_types=object_types)
 
 
-def add_db_object(session, schema_id, db_object_name, request_path, db_object_type,
-                  enabled, items_per_page, requires_auth, crud_operation_format,
-                  comments, media_type, auto_detect_media_type, auth_stored_procedure,
-                  options, objects, metadata=None, internal=False, db_object_id=None, reuse_ids=False,
-                  row_user_ownership_enforced=None, row_user_ownership_column=None):
+def get_db_object_values(session, schema_id, db_object_name, request_path, db_object_type,
+                         enabled, items_per_page, requires_auth, crud_operation_format,
+                         comments, media_type, auto_detect_media_type, auth_stored_procedure,
+                         options, objects, metadata=None, internal=False, db_object_id=None,
+                         row_user_ownership_enforced=None, row_user_ownership_column=None,
+                         block_size=None):
+    """Validates a db_object and returns the values of its db_object row
+
+    The parameters are the ones of add_db_object(). A new id is assigned if
+    no db_object_id is given, reserving block_size ids when many db_objects
+    are added with the same session.
+
+    Returns:
+        The values of the db_object row as dict
+    """
     if not isinstance(db_object_name, str):
         raise Exception('Invalid object name.')
 
@@ -319,11 +329,8 @@ def add_db_object(session, schema_id, db_object_name, request_path, db_object_ty
     if not comments:
         comments = ""
 
-    schema = schemas.get_schema(session=session,
-                                schema_id=schema_id, auto_select_single=True)
-
     if db_object_id is None:
-        db_object_id = core.get_sequence_id(session)
+        db_object_id = core.get_sequence_id(session, block_size)
 
     crud_operations = calculate_crud_operations(db_object_type, objects)
 
@@ -368,10 +375,16 @@ def add_db_object(session, schema_id, db_object_name, request_path, db_object_ty
         values.pop("metadata", None)
         values.pop("internal", None)
 
-    core.insert(table="db_object", values=values).exec(session)
+    return values
 
-    set_objects(session, db_object_id, objects)
 
+def get_db_object_grant_statements(session, schema_name, db_object_name, db_object_type,
+                                   crud_operations, objects):
+    """Returns the grant statements needed to serve a db_object
+
+    Returns:
+        The list of grant statements, None for a SCRIPT
+    """
     if db_object_type == "PROCEDURE" or db_object_type == "FUNCTION":
         grant_privileges = ["EXECUTE"]
     else:
@@ -380,17 +393,50 @@ def add_db_object(session, schema_id, db_object_name, request_path, db_object_ty
     if not grant_privileges:
         raise ValueError("No valid CRUD Operation specified")
 
+    if db_object_type == "SCRIPT":
+        return None
+
+    return database.get_grant_statements(
+        session,
+        schema_name,
+        db_object_name,
+        grant_privileges,
+        objects,
+        db_object_type,
+    )
+
+
+def add_db_object(session, schema_id, db_object_name, request_path, db_object_type,
+                  enabled, items_per_page, requires_auth, crud_operation_format,
+                  comments, media_type, auto_detect_media_type, auth_stored_procedure,
+                  options, objects, metadata=None, internal=False, db_object_id=None, reuse_ids=False,
+                  row_user_ownership_enforced=None, row_user_ownership_column=None,
+                  block_size=None):
+    values = get_db_object_values(
+        session, schema_id, db_object_name, request_path, db_object_type,
+        enabled, items_per_page, requires_auth, crud_operation_format,
+        comments, media_type, auto_detect_media_type, auth_stored_procedure,
+        options, objects, metadata=metadata, internal=internal, db_object_id=db_object_id,
+        row_user_ownership_enforced=row_user_ownership_enforced,
+        row_user_ownership_column=row_user_ownership_column,
+        block_size=block_size)
+    db_object_id = values["id"]
+
+    schema = schemas.get_schema(session=session,
+                                schema_id=schema_id, auto_select_single=True)
+
+    core.insert(table="db_object", values=values).exec(session)
+
+    set_objects(session, db_object_id, objects)
+
+    grants = get_db_object_grant_statements(
+        session, schema["name"], db_object_name, db_object_type,
+        values["crud_operations"], objects)
+
     if db_object_type == "SCRIPT":
         return db_object_id
     else:
-        return db_object_id, database.get_grant_statements(
-            session,
-            schema["name"],
-            db_object_name,
-            grant_privileges,
-            objects,
-            db_object_type,
-        )
+        return db_object_id, grants
 
 
 def get_crud_operations(session, db_object_id: bytes):
@@ -534,8 +580,19 @@ def set_objects(session, db_object_id, objects):
         set_object_fields_with_references(session, db_object_id, obj)
 
 
-def set_object_fields_with_references(session, db_object_id, obj):
-    values = {
+def get_object_rows(current_version, db_object_id, obj):
+    """Returns the rows needed to store an object with its fields and references
+
+    Args:
+        current_version (tuple): The version of the MRS metadata schema
+        db_object_id: The id of the db_object the object belongs to
+        obj (dict): The object, as used by set_object_fields_with_references()
+
+    Returns:
+        A tuple with the values of the object row, the list of values of the
+        object_reference rows and the list of values of the object_field rows
+    """
+    object_values = {
         "id": core.id_to_binary(obj.get("id"), "object.id"),
         "db_object_id": core.id_to_binary(db_object_id, "db_object_id"),
         "name": obj.get("name"),
@@ -545,26 +602,24 @@ def set_object_fields_with_references(session, db_object_id, obj):
         "comments": obj.get("comments"),
     }
 
-    current_version = core.get_mrs_schema_version(session=session)
     if current_version[0] >= 3:
-        values["options"] = obj.get("options", None)
+        object_values["options"] = obj.get("options", None)
         row_ownership_field_id = obj.get("row_ownership_field_id", None)
         if row_ownership_field_id is not None:
-            values["row_ownership_field_id"] = core.id_to_binary(
+            object_values["row_ownership_field_id"] = core.id_to_binary(
                 row_ownership_field_id, "row_ownership_field_id")
 
-    core.insert(table="object", values=values).exec(session)
-
     fields = obj.get("fields", [])
 
-    # Insert object_references first
-    inserted_object_references_ids = []
+    # Collect the object_references first
+    reference_rows = []
+    inserted_object_references_ids = set()
     for field in fields:
         obj_ref = field.get("object_reference")
 
         if (obj_ref is not None and
                 (not (obj_ref.get("id") in inserted_object_references_ids))):
-            inserted_object_references_ids.append(obj_ref.get("id"))
+            inserted_object_references_ids.add(obj_ref.get("id"))
 
             # make sure to covert the sub Dict with dict()
             ref_map = obj_ref.get("reference_mapping")
@@ -610,15 +665,14 @@ def set_object_fields_with_references(session, db_object_id, obj):
                     values["row_ownership_field_id"] = core.id_to_binary(row_ownership_field_id,
                                                                          "objectReference.row_ownership_field_id")
 
-            core.insert(table="object_reference", values=values).exec(session)
+            reference_rows.append(values)
 
-    # Then insert object_fields
-    inserted_field_ids = []
+    # Then the object_fields
+    field_rows = []
+    inserted_field_ids = set()
     for field in fields:
-        obj_ref = field.get("object_reference")
-
         if (not (field.get("id") in inserted_field_ids)):
-            inserted_field_ids.append(field.get("id"))
+            inserted_field_ids.add(field.get("id"))
 
             values = {
                 "id": core.id_to_binary(field.get("id"), "field.id"),
@@ -642,9 +696,27 @@ def set_object_fields_with_references(session, db_object_id, obj):
             if current_version[0] >= 3:
                 values["options"] = field.get("options", None)
 
-            core.insert(table="object_field", values=values).exec(session)
+            field_rows.append(values)
+
+    return object_values, reference_rows, field_rows
 
 
+def set_object_fields_with_references(session, db_object_id, obj):
+    current_version = core.get_mrs_schema_version(session=session)
+
+    object_values, reference_rows, field_rows = get_object_rows(
+        current_version, db_object_id, obj)
+
+    core.insert(table="object", values=object_values).exec(session)
+
+    # Insert object_references first
+    for values in reference_rows:
+        core.insert(table="object_reference", values=values).exec(session)
+
+    # Then insert object_fields
+    for values in field_rows:
+        core.insert(table="object_field", values=values).exec(session)
+
 def calculate_crud_operations(db_object_type, objects=None):
     if db_object_type == "PROCEDURE" or db_object_type == "FUNCTION" or db_object_type == "SCRIPT":
         return ["UPDATE"]
@@ -21,9 +21,24 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
+import json
+import types
+
 from mrs_plugin import lib
 from mrs_plugin.lib import core, db_objects
 
+# The maximum number of rows inserted by a single INSERT statement when a dump
+# is loaded
+DUMP_INSERT_BATCH_ROWS = 500
+
+# The conditions on the db_object table selecting the db_objects of a dump of
+# the given type, each taking the id of the dumped item as parameter
+_DUMP_DB_OBJECT_CONDITIONS = {
+    "service": f"db_schema_id IN (SELECT id FROM {core._generate_table('db_schema')} WHERE service_id = ?)",
+    "schema": "db_schema_id = ?",
+    "object": "id = ?",
+}
+
 
 def get_object_fields(session, id):
     return lib.core.select('field', where=['db_object_id=?'],
@@ -70,21 +85,69 @@ def reformat_field(field):
         object_reference['id'] = field['represents_reference_id']
 
 
-def get_object_dump(session, id):
-    'Gets a dump of the objects associated to a db_object'
-    objects = lib.core.select(
-        'object', where=['db_object_id=?'],
-        binary_formatter=lambda x: f"0x{x.hex()}").exec(
-        session, params=[id]).items
+def _group_rows(rows, key):
+    'Returns the rows as dict of lists, grouped by the value of the given key'
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def _get_dump_rows(session, dump_type, id):
+    """Fetches the db_objects, objects and fields of a dump
+
+    Each table is read with a single query for the whole dump instead of one
+    query per parent item. This matters most for the fields, as the
+    object_fields_with_references view is evaluated once instead of once per
+    object.
+
+    Args:
+        session (object): The database session to use
+        dump_type (str): Either "service", "schema" or "object"
+        id: The id of the service, schema or db_object being dumped
+
+    Returns:
+        A tuple with the db_objects grouped by db_schema_id, the objects
+        grouped by db_object_id and the fields grouped by object_id
+    """
+    db_object_condition = _DUMP_DB_OBJECT_CONDITIONS[dump_type]
+
+    db_objects_by_schema = _group_rows(
+        lib.core.select('db_object', where=[db_object_condition],
+                        binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).iter_items,
+        'db_schema_id')
+
+    object_condition = f"""db_object_id IN (
+        SELECT id FROM {core._generate_table('db_object')} WHERE {db_object_condition})"""
+
+    objects_by_db_object = _group_rows(
+        lib.core.select('object', where=[object_condition],
+                        binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).iter_items,
+        'db_object_id')
+
+    fields_by_object = _group_rows(
+        core.MrsDbExec(f"""
+            SELECT *
+            FROM `mysql_rest_service_metadata`.`object_fields_with_references`
+            WHERE object_id IN (
+                SELECT id FROM {core._generate_table('object')} WHERE {object_condition})""",
+            binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).iter_items,
+        'object_id')
+
+    return db_objects_by_schema, objects_by_db_object, fields_by_object
+
+
+def _assemble_objects(db_object_id, objects_by_db_object, fields_by_object):
+    'Returns the objects of a db_object with their fields, taken from the indexes'
+    objects = objects_by_db_object.pop(db_object_id, [])
 
     for obj in objects:
         # Removes fields if they are None in object
         cleanup_object(obj)
-        id = core.id_to_binary(obj['id'], 'object.id')
-        obj['fields'] = db_objects.get_object_fields_with_references(
-            session,
-            id,
-            binary_formatter=lambda x: f"0x{x.hex()}")
+        obj['fields'] = fields_by_object.pop(obj['id'], [])
 
         for field in obj['fields']:
             reformat_field(field)
@@ -92,51 +155,207 @@ def get_object_dump(session, id):
     return objects
 
 
-def get_db_object_dump(session, id):
-    'Gets a dump for a db_object'
-    obj = lib.core.select('db_object', where=['id=?'],
-                          binary_formatter=lambda x: f"0x{x.hex()}").exec(
-        session, params=[id]).first
+def _iter_db_object_dumps(db_objects, objects_by_db_object, fields_by_object):
+    'Assembles the dump of each db_object when it is consumed'
+    for obj in db_objects:
+        # A db_object may have one or more associated objects (from the object table)
+        obj["objects"] = _assemble_objects(
+            obj["id"], objects_by_db_object, fields_by_object)
+        yield obj
+
+
+def _iter_db_schema_dumps(schemas, db_objects_by_schema, objects_by_db_object, fields_by_object):
+    'Sets the db_objects of each schema when it is consumed'
+    for schema in schemas:
+        schema["objects"] = _iter_db_object_dumps(
+            db_objects_by_schema.pop(schema["id"], []),
+            objects_by_db_object, fields_by_object)
+        yield schema
+
+
+def get_streamed_dump(session, dump_type, id):
+    """Gets the dump of a service, schema or db_object to be written by write_dump()
+
+    All the metadata is fetched upfront, but the lists of schemas and
+    db_objects of the dump are generators that assemble each entry only when
+    it is consumed, so write_dump() can write the dump one db_object at a
+    time. The generators can only be consumed once.
+
+    Args:
+        session (object): The database session to use
+        dump_type (str): Either "service", "schema" or "object"
+        id: The id of the service, schema or db_object to dump
+
+    Returns:
+        The dump as dict, None if the item was not found
+    """
+    if dump_type == "object":
+        db_objects_by_schema, objects_by_db_object, fields_by_object = _get_dump_rows(
+            session, dump_type, id)
+
+        for rows in db_objects_by_schema.values():
+            return next(_iter_db_object_dumps(
+                rows, objects_by_db_object, fields_by_object))
+        return None
+
+    if dump_type == "service":
+        dump = lib.core.select('service', where=['id=?'],
+                               binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).first
+        schemas = lib.core.select('db_schema', where=['service_id=?'],
+                                  binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).items
+    elif dump_type == "schema":
+        dump = lib.core.select('db_schema', where=['id=?'],
+                               binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[id]).first
+        schemas = [dump]
+    else:
+        raise ValueError(f"Invalid dump type {dump_type}.")
+
+    if dump is None:
+        return None
+
+    schema_dumps = _iter_db_schema_dumps(
+        schemas, *_get_dump_rows(session, dump_type, id))
+
+    if dump_type == "service":
+        dump["schemas"] = schema_dumps
+    else:
+        # Sets the objects of the schema
+        next(schema_dumps)
+
+    return dump
+
+
+def _iter_json(value, level):
+    'Yields the chunks of the JSON encoding of value, see write_dump()'
+    indent = " " * (4 * level)
+
+    if isinstance(value, dict):
+        if not value:
+            yield "{}"
+            return
+
+        separator = "{"
+        for key, item in value.items():
+            yield f"{separator}\n{indent}    {json.dumps(str(key))}: "
+            yield from _iter_json(item, level + 1)
+            separator = ","
+        yield f"\n{indent}}}"
+    elif isinstance(value, types.GeneratorType):
+        separator = "["
+        for item in value:
+            yield f"{separator}\n{indent}    "
+            yield from _iter_json(item, level + 1)
+            separator = ","
+        yield "[]" if separator == "[" else f"\n{indent}]"
+    else:
+        yield json.dumps(value, indent=4).replace("\n", f"\n{indent}")
+
+
+def write_dump(file, dump):
+    """Writes a dump to a file as JSON
+
+    The output is the same as the one of json.dumps(dump, indent=4), but it is
+    written in chunks and generators are written as lists, one item at a
+    time, so the JSON text of the whole dump is never held in memory.
+
+    Args:
+        file (object): The file to write to
+        dump (dict): The dump, as returned by get_streamed_dump()
+    """
+    for chunk in _iter_json(dump, 0):
+        file.write(chunk)
 
-    # A db_object may have one or more associated objects (from the object table)
-    obj["objects"] = get_object_dump(session, id)
 
-    return obj
+def get_object_dump(session, id):
+    'Gets a dump of the objects associated to a db_object'
+    _, objects_by_db_object, fields_by_object = _get_dump_rows(
+        session, "object", id)
 
+    return _assemble_objects(
+        core.convert_id_to_string(core.id_to_binary(id, 'db_object.id')),
+        objects_by_db_object, fields_by_object)
 
-def get_db_schema_dump(session, id):
-    schema = lib.core.select('db_schema', where=['id=?'],
-                             binary_formatter=lambda x: f"0x{x.hex()}").exec(
-        session, params=[id]).first
 
-    schema["objects"] = []
+def get_db_object_dump(session, id):
+    'Gets a dump for a db_object'
+    return get_streamed_dump(session, "object", id)
 
-    objects = lib.core.select('db_object', cols=['id'], where=['db_schema_id=?']).exec(
-        session, params=[id]).items
 
-    schema["objects"] = [get_db_object_dump(
-        session, object['id']) for object in objects]
+def get_db_schema_dump(session, id):
+    schema = get_streamed_dump(session, "schema", id)
+
+    schema["objects"] = list(schema["objects"])
 
     return schema
 
 
 def get_service_dump(session, id):
-    service = lib.core.select('service', where=['id=?'],
-                              binary_formatter=lambda x: f"0x{x.hex()}").exec(
-        session, params=[id]).first
+    service = get_streamed_dump(session, "service", id)
 
-    service["schemas"] = []
+    service["schemas"] = list(service["schemas"])
+    for schema in service["schemas"]:
+        schema["objects"] = list(schema["objects"])
 
-    schemas = lib.core.select('db_schema', cols=['id'], where=['service_id=?']).exec(
-        session, params=[id]).items
+    return service
 
-    service["schemas"] = [get_db_schema_dump(
-        session, schema['id']) for schema in schemas]
 
-    return service
+class DumpRowInserter:
+    """Collects the rows of the db_objects of a dump being loaded and inserts
+    them with multi-row INSERT statements
 
+    The rows are inserted once DUMP_INSERT_BATCH_ROWS rows are pending and on
+    flush(). The tables are always written in the order of TABLES, so the rows
+    referenced by foreign keys are inserted first.
+    """
 
-def load_object_dump(session, target_schema_id, object, reuse_ids):
+    TABLES = ["db_object", "object", "object_reference", "object_field"]
+
+    def __init__(self, session, batch_rows=DUMP_INSERT_BATCH_ROWS) -> None:
+        self.statement_count = 0
+        self._session = session
+        self._batch_rows = batch_rows
+        self._rows = {table: {} for table in self.TABLES}
+        self._row_count = 0
+
+    def add(self, table, values):
+        # Optional columns may be missing from some rows, so the rows of a
+        # table are grouped by their columns
+        self._rows[table].setdefault(
+            tuple(values.keys()), []).append(values)
+        self._row_count += 1
+
+        if self._row_count >= self._batch_rows:
+            self.flush()
+
+    def add_db_object(self, current_version, values, objects):
+        'Adds the rows of a db_object, its objects and their fields'
+        self.add("db_object", values)
+
+        for obj in objects or []:
+            object_values, reference_rows, field_rows = db_objects.get_object_rows(
+                current_version, values["id"], obj)
+
+            self.add("object", object_values)
+            for reference_values in reference_rows:
+                self.add("object_reference", reference_values)
+            for field_values in field_rows:
+                self.add("object_field", field_values)
+
+    def flush(self):
+        for table in self.TABLES:
+            for rows in self._rows[table].values():
+                core.insert_rows(table, rows).exec(self._session)
+                self.statement_count += 1
+            self._rows[table] = {}
+
+        self._row_count = 0
+
+
+def _get_db_object_args(session, object, reuse_ids):
+    'Returns the db_object arguments of add_db_object() for a db_object dump'
     db_object_id = None
     if reuse_ids:
         db_object_id = lib.core.id_to_binary(object["id"], "object.id")
@@ -161,32 +380,45 @@ def load_object_dump(session, target_schema_id, object, reuse_ids):
 
             objects[0]["options"] = options
 
+    return {
+        "db_object_name": object["name"],
+        "request_path": object["request_path"],
+        "db_object_type": object["object_type"],
+        "enabled": object["enabled"],
+        "items_per_page": object["items_per_page"],
+        "requires_auth": object["requires_auth"],
+        "crud_operation_format": object["format"],
+        "comments": object["comments"],
+        "media_type": object["media_type"],
+        "auto_detect_media_type": object["auto_detect_media_type"],
+        "auth_stored_procedure": object["auth_stored_procedure"],
+        "options": object["options"],
+        "objects": objects,
+        "metadata": object.get("metadata", None),
+        "db_object_id": db_object_id,
+        "row_user_ownership_enforced": object.get(
+            "row_user_ownership_enforced", None),
+        "row_user_ownership_column": object.get(
+            "row_user_ownership_column", None),
+    }
+
 
+def load_object_dump(session, target_schema_id, object, reuse_ids):
     return lib.db_objects.add_db_object(
-        session=session, schema_id=target_schema_id,
-        db_object_name=object["name"],
-        request_path=object["request_path"],
-        db_object_type=object["object_type"],
-        enabled=object["enabled"],
-        items_per_page=object["items_per_page"],
-        requires_auth=object["requires_auth"],
-        crud_operation_format=object["format"],
-        comments=object["comments"],
-        media_type=object["media_type"],
-        auto_detect_media_type=object["auto_detect_media_type"],
-        auth_stored_procedure=object["auth_stored_procedure"],
-        options=object["options"],
-        objects=objects,
-        metadata=object.get("metadata", None),
-        db_object_id=db_object_id,
-        reuse_ids=reuse_ids,
-        row_user_ownership_enforced=object.get(
-            "row_user_ownership_enforced", None),
-        row_user_ownership_column=object.get(
-            "row_user_ownership_column", None))
+        session=session, schema_id=target_schema_id, reuse_ids=reuse_ids,
+        **_get_db_object_args(session, object, reuse_ids))
 
 
 def load_schema_dump(session, target_service_id, schema, reuse_ids):
+    """Loads a schema dump into a service
+
+    The rows of the db_objects are inserted in batches by a DumpRowInserter,
+    so this should be called within a transaction.
+
+    Returns:
+        A tuple with the id of the new schema and the list of the grant
+        statements of each of its db_objects
+    """
     schema_id = None
     if reuse_ids:
         schema_id = lib.core.id_to_binary(schema["id"], "object.id")
@@ -200,11 +432,26 @@ def load_schema_dump(session, target_service_id, schema, reuse_ids):
                                        schema["items_per_page"],
                                        schema["comments"],
                                        schema["options"],
-                                       schema_id=schema_id)
+                                       schema_id=schema_id,
+                                       block_size=core.BULK_SEQUENCE_ID_BLOCK_SIZE)
+
+    current_version = core.get_mrs_schema_version(session)
+    inserter = DumpRowInserter(session)
 
     grants = []
     for obj in schema["objects"]:
-        _, grant = load_object_dump(session, schema_id, obj, reuse_ids)
-        grants.append(grant)
+        args = _get_db_object_args(session, obj, reuse_ids)
+        values = db_objects.get_db_object_values(
+            session, schema_id, block_size=core.BULK_SEQUENCE_ID_BLOCK_SIZE, **args)
+
+        inserter.add_db_object(current_version, values, args["objects"])
+
+        grant = db_objects.get_db_object_grant_statements(
+            session, schema["name"], args["db_object_name"], args["db_object_type"],
+            values["crud_operations"], args["objects"])
+        if grant is not None:
+            grants.append(grant)
+
+    inserter.flush()
 
     return schema_id, grants
@@ -150,6 +150,7 @@ def add_role(
     caption,
     description,
     options={},
+    block_size=None,
 ):
     sql = """
     INSERT INTO `mysql_rest_service_metadata`.mrs_role
@@ -158,7 +159,7 @@ def add_role(
         (?, ?, ?, ?, ?, ?)
     """
 
-    id = core.get_sequence_id(session)
+    id = core.get_sequence_id(session, block_size)
 
     params = [
         id,
@@ -223,6 +224,7 @@ def add_role_privilege(
     service_path=None,
     schema_path=None,
     object_path=None,
+    block_size=None,
 ):
     md_version = core.get_mrs_schema_version_int(session)
 
@@ -260,7 +262,7 @@ def add_role_privilege(
             else:
                 raise Exception(f"Object `{object_path}` was not found.")
 
-    id = core.get_sequence_id(session)
+    id = core.get_sequence_id(session, block_size)
 
     if md_version < 30001:
         sql = """
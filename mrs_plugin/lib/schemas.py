@@ -235,7 +235,7 @@ def get_schema(session, schema_id: bytes = None, service_id: bytes = None,
 
 def add_schema(session, schema_name, service_id: bytes = None, request_path=None, requires_auth=None,
                enabled=True, items_per_page=None, comments=None, options=None, metadata=None,
-               schema_type="DATABASE_SCHEMA", internal=False, schema_id=None):
+               schema_type="DATABASE_SCHEMA", internal=False, schema_id=None, block_size=None):
     """Add a schema to the given MRS service
 
     Args:
@@ -251,6 +251,8 @@ def add_schema(session, schema_name, service_id: bytes = None, request_path=None
         metadata (dict): Metadata of the schema
         schema_type (str): Either "DATABASE_SCHEMA" or "SCRIPT_MODULE"
         session (object): The database session to use.
+        block_size (int): The number of ids to reserve when adding many
+            objects with the same session
 
     Returns:
         The id of the inserted schema
@@ -290,7 +292,7 @@ def add_schema(session, schema_name, service_id: bytes = None, request_path=None
         options = ""
 
     if schema_id is None:
-        schema_id = core.get_sequence_id(session)
+        schema_id = core.get_sequence_id(session, block_size)
     values = {
         "id": schema_id,
         "service_id": service_id,
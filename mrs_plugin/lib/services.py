@@ -103,7 +103,31 @@ def format_metadata(host_ctx, version):
     return f"{'ID':>3} {'ROOT PATH':25} {'VERSION':15}\n{1:>3} {host_ctx[:24]:25} {version}"
 
 
-def add_service(session, url_host_name, service):
+def get_url_host_id(session, url_host_name):
+    """Returns the id of the url_host with the given name, if any
+
+    The ids of existing hosts are kept in the metadata cache of the session as
+    hosts are not deleted.
+    """
+    def fetch_url_host_id():
+        host = core.select(table="url_host",
+                           where="name=?"
+                           ).exec(session, [url_host_name]).first
+        return host["id"] if host else None
+
+    cache = core.get_metadata_cache(session)
+    if cache is None:
+        return fetch_url_host_id()
+
+    host_id = cache.get(("url_host_id", url_host_name), fetch_url_host_id)
+    if host_id is None:
+        # The host may be created afterwards, so it is looked up again
+        cache.invalidate(("url_host_id", url_host_name))
+
+    return host_id
+
+
+def add_service(session, url_host_name, service, block_size=None):
     if "options" in service:
         service["options"] = core.convert_json(service["options"])
     else:
@@ -137,14 +161,12 @@ def add_service(session, url_host_name, service):
 
     # If there is no id for the given host yet, create a host entry
     if service.get("url_host_id") is None:
-        host = core.select(table="url_host",
-                           where=["name=?"]
-                           ).exec(session, [url_host_name if url_host_name else '']).first
+        host_id = get_url_host_id(session, url_host_name or '')
 
-        if host:
-            service["url_host_id"] = host["id"]
+        if host_id:
+            service["url_host_id"] = host_id
         else:
-            service["url_host_id"] = core.get_sequence_id(session)
+            service["url_host_id"] = core.get_sequence_id(session, block_size)
             core.insert(table="url_host",
                         values={
                             "id": service["url_host_id"],
@@ -152,7 +174,7 @@ def add_service(session, url_host_name, service):
                         }
                         ).exec(session)
 
-    service["id"] = core.get_sequence_id(session)
+    service["id"] = core.get_sequence_id(session, block_size)
 
     # metadata column was only added in 3.0.0
     current_version = core.get_mrs_schema_version(session)
@@ -203,13 +225,9 @@ def update_services(session, service_ids, value):
                 f"The specified service with id {core.convert_id_to_string(service_id)} was not found.")
 
         if "url_host_name" in value:
-            host = core.select(table="url_host",
-                               where="name=?"
-                               ).exec(session, [value["url_host_name"]]).first
+            host_id = get_url_host_id(session, value["url_host_name"])
 
-            if host:
-                host_id = host["id"]
-            else:
+            if not host_id:
                 host_id = core.get_sequence_id(session)
                 core.insert(table="url_host",
                             values={
@@ -170,6 +170,7 @@ def add_user(
     mapped_user_id,
     app_options,
     auth_string,
+    block_size=None,
 ):
 
     if password_requires_cypher(session, auth_app_id):
@@ -190,7 +191,7 @@ def add_user(
         VALUES(?,?,?,?,?,?,?,?,?)
     """
 
-    id = core.get_sequence_id(session)
+    id = core.get_sequence_id(session, block_size)
     params = [
         id,
         auth_app_id,
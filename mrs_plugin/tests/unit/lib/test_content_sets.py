@@ -21,6 +21,7 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
+import os
 import pytest
 import tempfile
 import mysqlsh
@@ -124,3 +125,51 @@ def test_get_content_set(phone_book, table_contents):
         del args["service_id"]
         sets = lib.content_sets.get_content_set(**args)
         assert sets is None
+
+
+def test_sync_content_dir(phone_book, table_contents):
+    with lib.core.MrsDbSession(session=phone_book["session"]) as session:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["index.html", "app.js", "old.css"]:
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(f"content of {name}")
+
+            content_set_init = get_default_content_set_init(
+                phone_book["service_id"], content_dir=tmp)
+            with ContentSetCT(session, **content_set_init) as content_set_id:
+                files = {file["request_path"]: file for file in lib.content_files.get_content_files(
+                    session, content_set_id, None)}
+                assert sorted(files.keys()) == ["/app.js", "/index.html", "/old.css"]
+                assert files["/app.js"]["options"]["content_hash"]
+
+                # Change a file, remove another and add a new one
+                with open(os.path.join(tmp, "app.js"), "w") as f:
+                    f.write("changed content")
+                os.utime(os.path.join(tmp, "app.js"), (0, 0))
+                os.remove(os.path.join(tmp, "old.css"))
+                with open(os.path.join(tmp, "new.css"), "w") as f:
+                    f.write("new content")
+
+                file_list = lib.content_files.sync_content_dir(
+                    session, content_set_id, tmp, False, None)
+                assert len(file_list) == 3
+
+                synced_files = {file["request_path"]: file for file in lib.content_files.get_content_files(
+                    session, content_set_id, None, include_file_content=True)}
+                assert sorted(synced_files.keys()) == ["/app.js", "/index.html", "/new.css"]
+                assert synced_files["/app.js"]["content"] == b"changed content"
+                assert synced_files["/new.css"]["content"] == b"new content"
+
+                # The unchanged file is kept as it was
+                assert synced_files["/index.html"]["id"] == files["/index.html"]["id"]
+                assert synced_files["/app.js"]["id"] == files["/app.js"]["id"]
+                assert not any(file["requires_auth"] for file in synced_files.values())
+
+                # Requiring authentication applies to the unchanged files too
+                lib.content_files.sync_content_dir(
+                    session, content_set_id, tmp, True, None)
+
+                synced_files = {file["request_path"]: file for file in lib.content_files.get_content_files(
+                    session, content_set_id, None)}
+                assert synced_files["/index.html"]["id"] == files["/index.html"]["id"]
+                assert all(file["requires_auth"] for file in synced_files.values())
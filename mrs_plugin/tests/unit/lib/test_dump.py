@@ -0,0 +1,174 @@
+# Copyright (c) 2024, Oracle and/or its affiliates.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2.0,
+# as published by the Free Software Foundation.
+#
+# This program is designed to work with certain software (including
+# but not limited to OpenSSL) that is licensed under separate terms, as
+# designated in a particular file or component or in included license
+# documentation.  The authors of MySQL hereby grant you an additional
+# permission to link the program and your derivative works with the
+# separately licensed software that they have either included with
+# the program or referenced in the documentation.
+#
+# This program is distributed in the hope that it will be useful,  but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See
+# the GNU General Public License, version 2.0, for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import io
+import json
+import math
+import os
+import re
+import tempfile
+
+from mrs_plugin import lib
+
+
+def test_write_dump():
+    def schemas():
+        for i in range(3):
+            yield {"id": i, "objects": (obj for obj in [{"fields": [1, {"a": None}], "options": {}}]),
+                   "empty": (obj for obj in [])}
+
+    dump = {"type": "mrsService", "service": {"id": "0x01", "comments": "a\n\"b\"",
+                                              "options": {}, "schemas": schemas()}}
+    expected = {"type": "mrsService", "service": {"id": "0x01", "comments": "a\n\"b\"",
+                                                  "options": {}, "schemas": [
+                                                      {"id": i, "objects": [{"fields": [1, {"a": None}], "options": {}}],
+                                                       "empty": []} for i in range(3)]}}
+
+    file = io.StringIO()
+    lib.dump.write_dump(file, dump)
+
+    assert file.getvalue() == json.dumps(expected, indent=4)
+
+
+class _QueryCounter:
+    """Wraps a session to count the statements it runs"""
+
+    def __init__(self, session):
+        self._session = session
+        self.statements = []
+
+    def run_sql(self, sql, *args):
+        self.statements.append(sql)
+        return self._session.run_sql(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def count(self, prefix=""):
+        return len([sql for sql in self.statements
+                    if sql.lstrip().upper().startswith(prefix)])
+
+
+def _get_db_schema_dump_per_item(session, id):
+    # The dump issuing one query per schema, db_object and object, used as
+    # reference for the expected content
+    schema = lib.core.select('db_schema', where=['id=?'],
+                             binary_formatter=lambda x: f"0x{x.hex()}").exec(
+        session, params=[id]).first
+
+    db_objects = lib.core.select('db_object', cols=['id'], where=['db_schema_id=?']).exec(
+        session, params=[id]).items
+
+    schema["objects"] = []
+    for db_object in db_objects:
+        obj = lib.core.select('db_object', where=['id=?'],
+                              binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[db_object['id']]).first
+        obj["objects"] = lib.core.select(
+            'object', where=['db_object_id=?'],
+            binary_formatter=lambda x: f"0x{x.hex()}").exec(
+            session, params=[db_object['id']]).items
+
+        for object in obj["objects"]:
+            lib.dump.cleanup_object(object)
+            object['fields'] = lib.db_objects.get_object_fields_with_references(
+                session, lib.core.id_to_binary(object['id'], 'object.id'),
+                binary_formatter=lambda x: f"0x{x.hex()}")
+
+            for field in object['fields']:
+                lib.dump.reformat_field(field)
+
+        schema["objects"].append(obj)
+
+    return schema
+
+
+def _copy_db_object_dump(db_object, index):
+    # Every copy needs its own ids for the objects, references and fields
+    ids = {}
+    text = re.sub(r'"0x[0-9a-f]{32}"',
+                  lambda m: ids.setdefault(m.group(0), f'"0x{os.urandom(16).hex()}"'),
+                  json.dumps(db_object))
+
+    copy = json.loads(text)
+    copy["request_path"] = f"/copy{index}"
+    return copy
+
+
+def _sort_db_schema_dump(schema):
+    # Neither dump guarantees the order of the db_objects and fields
+    schema["objects"].sort(key=lambda obj: obj["id"])
+    for db_object in schema["objects"]:
+        for obj in db_object["objects"]:
+            obj["fields"].sort(key=lambda field: field["id"])
+    return schema
+
+
+def test_dump_and_load_queries(phone_book):
+    session = phone_book["session"]
+    db_object_count = 1000
+
+    schema_dump = lib.dump.get_db_schema_dump(session, phone_book["schema_id"])
+    db_object = next(obj for obj in schema_dump["objects"] if obj["objects"])
+
+    schema_dump["request_path"] = "/dumpQueries"
+    schema_dump["objects"] = [_copy_db_object_dump(db_object, i)
+                              for i in range(db_object_count)]
+
+    session.run_sql("START TRANSACTION")
+    try:
+        counter = _QueryCounter(session)
+        schema_id, grants = lib.dump.load_schema_dump(
+            counter, phone_book["service_id"], schema_dump, reuse_ids=False)
+
+        assert len(grants) == db_object_count
+        assert len(lib.db_objects.get_db_objects(session, schema_id)) == db_object_count
+        # The rows are inserted with multi-row statements, not one by one
+        assert 0 < counter.count("INSERT") < db_object_count // 10
+        # The ids of the schema and the db_objects are reserved in blocks
+        assert counter.count("WITH RECURSIVE") == math.ceil(
+            (db_object_count + 1) / lib.core.BULK_SEQUENCE_ID_BLOCK_SIZE)
+
+        expected = _get_db_schema_dump_per_item(session, schema_id)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "schema.json")
+
+            counter = _QueryCounter(session)
+            with open(path, "w") as file:
+                lib.dump.write_dump(file, {"schema": lib.dump.get_streamed_dump(
+                    counter, "schema", schema_id)})
+
+            with open(path) as file:
+                dump = json.load(file)["schema"]
+
+        # One query for the schema and one for each of the db_object, object
+        # and field tables, whatever the number of db_objects
+        assert counter.count() == 4
+
+        assert len(dump["objects"]) == db_object_count
+        assert sorted(obj["request_path"] for obj in dump["objects"]) == \
+            sorted(f"/copy{i}" for i in range(db_object_count))
+        assert _sort_db_schema_dump(dump) == _sort_db_schema_dump(expected)
+    finally:
+        session.run_sql("ROLLBACK")
@@ -23,6 +23,7 @@
 
 import pytest
 import json
+import threading
 from ...lib.core import *
 from ...lib.services import *
 from ...lib.content_sets import *
@@ -181,3 +182,195 @@ def test_validate_service_path(phone_book):
         with pytest.raises(ValueError) as exc_info:
             service, schema, content_set = validate_service_path(session, "127.0.0.1/test")
         assert str(exc_info.value) == "The given MRS service was not found."
+
+
+def test_sequence_id_allocator(phone_book):
+    allocator = SequenceIdAllocator(block_size=10)
+    session = phone_book["session"]
+    ids = []
+
+    def allocate():
+        for _ in range(25):
+            ids.append(allocator.get(session))
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ids) == 200
+    assert len(set(ids)) == 200
+    assert all(isinstance(id, bytes) and len(id) == 16 for id in ids)
+
+
+class _CountingSession:
+    def __init__(self, session):
+        self._session = session
+        self.queries = 0
+
+    def run_sql(self, sql, *args):
+        self.queries += 1
+        return self._session.run_sql(sql, *args)
+
+
+def test_sequence_id_allocator_blocks(phone_book):
+    allocator = SequenceIdAllocator()
+    session = _CountingSession(phone_book["session"])
+
+    # Single ids are not reserved in advance
+    allocator.get(session)
+    allocator.get(session)
+    assert session.queries == 2
+
+    ids = [allocator.get(session, block_size=5) for _ in range(5)]
+    assert session.queries == 3
+    assert len(set(ids)) == 5
+
+    # The ids left in the block are dropped with the session
+    allocator.get(session, block_size=5)
+    assert len(allocator._blocks) == 1
+    allocator.release(session)
+    assert len(allocator._blocks) == 0
+
+    allocator.get(session, block_size=5)
+    del session
+    assert len(allocator._blocks) == 0
+
+
+def test_metadata_cache(phone_book):
+    session = phone_book["session"]
+    assert get_metadata_cache(session) is None
+
+    with MrsDbSession(session=session) as session:
+        cache = get_metadata_cache(session)
+        assert cache is not None
+
+        version = get_mrs_schema_version(session)
+        for _ in range(10):
+            assert get_mrs_schema_version(session) == version
+        assert cache.misses == 1
+        assert cache.hits == 10
+
+        # Nested sessions share the cache
+        with MrsDbSession(session=session) as nested_session:
+            assert get_metadata_cache(nested_session) is cache
+
+        assert get_metadata_cache(session) is cache
+
+        invalidate_metadata_cache(session)
+        assert get_mrs_schema_version(session) == version
+        assert cache.misses == 2
+
+    assert get_metadata_cache(session) is None
+
+
+class _FakeType:
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeColumn:
+    calls = 0
+
+    def __init__(self, label, type, length=0):
+        self._label = label
+        self._type = type
+        self._length = length
+
+    def get_column_label(self):
+        _FakeColumn.calls += 1
+        return self._label
+
+    def get_type(self):
+        _FakeColumn.calls += 1
+        return _FakeType(self._type)
+
+    def get_length(self):
+        _FakeColumn.calls += 1
+        return self._length
+
+
+class _FakeRow:
+    def __init__(self, values):
+        self._values = values
+
+    def get_field(self, name):
+        return self._values[name]
+
+
+class _FakeResult:
+    def __init__(self, columns, rows):
+        self._columns = columns
+        self._rows = rows
+        self._index = 0
+
+    def get_columns(self):
+        return self._columns
+
+    def fetch_all(self):
+        rows = self._rows[self._index:]
+        self._index = len(self._rows)
+        return rows
+
+    def fetch_one(self):
+        if self._index >= len(self._rows):
+            return None
+        self._index += 1
+        return self._rows[self._index - 1]
+
+
+def _get_listing_result(row_count):
+    columns = [_FakeColumn("id", "BYTES"), _FakeColumn("name", "STRING"),
+               _FakeColumn("enabled", "BIT", 1), _FakeColumn("options", "JSON"),
+               _FakeColumn("crud_operations", "SET")]
+    rows = [_FakeRow({"id": i.to_bytes(16, "big"), "name": f"object_{i}", "enabled": 1,
+                      "options": '{"a": 1}', "crud_operations": "CREATE,READ"})
+            for i in range(row_count)]
+    return _FakeResult(columns, rows)
+
+
+def _get_sql_result_as_dict_list_per_cell(res, binary_formatter=None):
+    # The conversion checking the column types for every cell, used as
+    # reference for the expected results
+    cols = res.get_columns()
+    dict_list = []
+    for row in res.fetch_all():
+        item = {}
+        for col in cols:
+            col_name = col.get_column_label()
+            field_val = row.get_field(col_name)
+            col_type = col.get_type().data
+            if col_type == "BIT" and col.get_length() == 1:
+                item[col_name] = field_val == 1
+            elif col_type == "SET":
+                item[col_name] = field_val.split(",") if field_val else []
+            elif col_type == "JSON":
+                item[col_name] = json.loads(field_val) if field_val else None
+            elif binary_formatter is not None and isinstance(field_val, bytes):
+                item[col_name] = binary_formatter(field_val)
+            else:
+                item[col_name] = field_val
+        dict_list.append(item)
+    return dict_list
+
+
+def test_sql_result_as_dicts():
+    expected = _get_sql_result_as_dict_list_per_cell(
+        _get_listing_result(10), convert_id_to_string)
+
+    _FakeColumn.calls = 0
+    items = get_sql_result_as_dict_list(
+        _get_listing_result(10), convert_id_to_string)
+    assert items == expected
+    # The column information is only read once per result set
+    assert _FakeColumn.calls == 11
+
+    assert list(iter_sql_result_as_dicts(
+        _get_listing_result(10), convert_id_to_string)) == expected
+    assert items[0] == {"id": convert_id_to_string((0).to_bytes(16, "big")),
+                        "name": "object_0", "enabled": True,
+                        "options": {"a": 1},
+                        "crud_operations": ["CREATE", "READ"]}
+    assert get_sql_result_as_dict_list(None) == []
+    assert list(iter_sql_result_as_dicts(None)) == []